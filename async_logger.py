@@ -0,0 +1,166 @@
+# async_logger.py
+# Kuyruklu, arka planda yazan log: çağıran iş parçacığı diske hiç beklemez.
+# Toplu yazma, boyut/süre ile döndürme, düz metin veya JSON satırları,
+# sık mesajlar için anahtar başına hız sınırı, kritik mesajda anında flush + fsync.
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+
+COLORS = {
+    "debug": "\033[90m[DEBUG] ", "info": "\033[94m[INFO] ", "warning": "\033[93m[WARN] ",
+    "danger": "\033[91m[ERROR] ", "success": "\033[92m[SUCCESS] ",
+}
+COLOR_END = "\033[0m"
+CRITICAL_LEVELS = ("danger",)
+
+
+class AsyncLogger:
+    """
+    log() kaydı sınırlı bir kuyruğa koyar ve döner; kuyruk doluysa kayıt atılır
+    (`dropped` artar), asla bloklamaz. Yazıcı iş parçacığı kayıtları `batch_size`
+    adede ya da `flush_interval` saniyeye kadar biriktirip tek seferde yazar.
+
+    `key` verilen mesajlar o anahtar için `rate_interval` saniyede en fazla bir kez
+    yazılır; arada bastırılanların sayısı bir sonraki mesaja eklenir.
+    """
+
+    def __init__(self, path="drone_server.log", fmt="text", console=True, max_bytes=5 * 1024 * 1024,
+                 rotate_interval=None, backups=3, flush_interval=1.0, batch_size=64,
+                 queue_size=4096, rate_interval=1.0):
+        self.path = path
+        self.fmt = fmt
+        self.console = console
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.rate_interval = rate_interval
+        self.dropped = 0
+        self.written = 0
+        self.suppressed = 0
+        self._queue = queue.Queue(queue_size)
+        self._last_emit = {}   # anahtar → son yazma zamanı
+        self._pending = {}     # anahtar → bastırılan sayısı
+        self._file = None
+        self._opened_at = 0.0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ---------- ÇAĞIRAN TARAF ----------
+    def log(self, msg, level="info", key=None, flush=False, **fields):
+        now = time.time()
+        if key is not None:
+            last = self._last_emit.get(key)
+            if last is not None and now - last < self.rate_interval:
+                self._pending[key] = self._pending.get(key, 0) + 1
+                self.suppressed += 1
+                return
+            self._last_emit[key] = now
+            skipped = self._pending.pop(key, 0)
+            if skipped:
+                fields["suppressed"] = skipped
+        record = (now, level, msg, fields, flush or level in CRITICAL_LEVELS)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=2.0):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+    # ---------- YAZICI ----------
+    def _format(self, record):
+        ts, level, msg, fields, _ = record
+        if self.fmt == "json":
+            return json.dumps(dict({"ts": ts, "level": level, "msg": msg}, **fields), ensure_ascii=False) + "\n"
+        extra = f" (+{fields['suppressed']} bastırıldı)" if "suppressed" in fields else ""
+        stamp = datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+        return f"{stamp} - [{level.upper()}] {msg}{extra}\n"
+
+    def _open(self):
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._opened_at = time.monotonic()
+
+    def _rotate_if_needed(self):
+        too_big = self.max_bytes and self._file.tell() >= self.max_bytes
+        too_old = self.rotate_interval and time.monotonic() - self._opened_at >= self.rotate_interval
+        if not (too_big or too_old):
+            return
+        self._file.close()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def _write(self, batch):
+        critical = False
+        lines = []
+        for record in batch:
+            lines.append(self._format(record))
+            critical = critical or record[4]
+            if self.console:
+                ts, level, msg, fields, _ = record
+                extra = f" (+{fields['suppressed']} bastırıldı)" if "suppressed" in fields else ""
+                sys.stdout.write(f"{COLORS.get(level, '')}{msg}{extra}{COLOR_END}\n")
+        try:
+            if self._file is None:
+                self._open()
+            self._file.write("".join(lines))
+            self._file.flush()
+            if critical:
+                os.fsync(self._file.fileno())
+            self._rotate_if_needed()
+        except OSError as e:
+            sys.stderr.write(f"Log yazılamadı: {e}\n")
+        if self.console:
+            sys.stdout.flush()
+        self.written += len(batch)
+
+    def _run(self):
+        while True:
+            try:
+                record = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            if record is None:
+                break
+            batch = [record]
+            # Kritik kayıt beklemeden yazılır; diğerleri kısa süre biriktirilir
+            deadline = time.monotonic() + (0 if record[4] else self.flush_interval)
+            while len(batch) < self.batch_size and not batch[-1][4]:
+                remaining = deadline - time.monotonic()
+                try:
+                    record = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    self._write(batch)
+                    self._close_file()
+                    return
+                batch.append(record)
+            self._write(batch)
+        self._close_file()
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,145 @@
+# backends.py
+# yolo_server için çıkarım arka uçları: PyTorch, ONNX Runtime, OpenVINO (isteğe bağlı INT8)
+#
+# Hepsi ultralytics sonuç nesnesi (Results) döndürür; results_to_records kayıt dizisine çevirir.
+# ONNX / OpenVINO modelleri ilk kullanımda .pt ağırlıklarından dışa aktarılır ve
+# ağırlıkların yanına kaydedilir; sonraki açılışlarda hazır dosya kullanılır
+# (giriş boyutu değişirse eski dosyayı silin).
+import os
+import time
+
+import numpy as np
+
+from protocol import empty_records
+
+
+class InferenceBackend:
+    """
+    Ortak arayüz: load() → warmup() → predict(frames, conf, classes).
+    Alt sınıflar yalnız `_prepare()` ile yüklenecek model yolunu hazırlar.
+    """
+    name = None
+
+    def __init__(self, weights="yolov8s.pt", imgsz=640, int8=False):
+        self.weights = weights
+        self.imgsz = imgsz
+        self.int8 = int8
+        self.model = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+
+    @property
+    def label(self):
+        return f"{self.name}{'-int8' if self.int8 else ''}"
+
+    @property
+    def names(self):
+        return self.model.names
+
+    def _prepare(self):
+        return self.weights
+
+    def _yolo(self, path=None):
+        from ultralytics import YOLO
+        return YOLO(path or self.weights, task="detect")
+
+    def load(self):
+        started = time.monotonic()
+        self.model = self._yolo(self._prepare())
+        self.load_seconds = time.monotonic() - started
+        return self
+
+    def predict(self, frames, conf=0.25, classes=None):
+        return self.model(frames, imgsz=self.imgsz, conf=conf, classes=classes, verbose=False)
+
+    def warmup(self, runs=3, shape=(320, 640, 3)):
+        """İlk çağrıların tembel ilklendirme maliyetini bağlantı kabul edilmeden öder."""
+        started = time.monotonic()
+        frame = np.zeros(shape, dtype=np.uint8)
+        for _ in range(runs):
+            self.predict([frame])
+        self.warmup_seconds = time.monotonic() - started
+        return self.warmup_seconds
+
+
+class PyTorchBackend(InferenceBackend):
+    name = "pytorch"
+
+    def _prepare(self):
+        if self.int8:
+            raise ValueError("PyTorch arka ucu INT8 desteklemiyor (onnx veya openvino kullanın)")
+        return self.weights
+
+
+class OnnxBackend(InferenceBackend):
+    """ONNX Runtime (CPUExecutionProvider). INT8: dinamik niceleme (kalibrasyon verisi gerekmez)."""
+    name = "onnx"
+
+    def _prepare(self):
+        path = os.path.splitext(self.weights)[0] + ".onnx"
+        if not os.path.exists(path):
+            print(f"📦 ONNX'e aktarılıyor: {self.weights} → {path}")
+            path = self._yolo().export(format="onnx", imgsz=self.imgsz, dynamic=True, simplify=True)
+        if not self.int8:
+            return path
+        int8_path = os.path.splitext(path)[0] + "_int8.onnx"
+        if not os.path.exists(int8_path):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            print(f"📦 INT8 nicemleme: {path} → {int8_path}")
+            quantize_dynamic(path, int8_path, weight_type=QuantType.QUInt8, op_types_to_quantize=["Conv", "MatMul"])
+        return int8_path
+
+
+class OpenVinoBackend(InferenceBackend):
+    """OpenVINO. INT8: NNCF ile eğitim sonrası niceleme (ultralytics kalibrasyon için `int8_data` kullanır)."""
+    name = "openvino"
+
+    def __init__(self, weights="yolov8s.pt", imgsz=640, int8=False, int8_data="coco8.yaml"):
+        super().__init__(weights, imgsz, int8)
+        self.int8_data = int8_data
+
+    def _prepare(self):
+        stem = os.path.splitext(self.weights)[0]
+        path = f"{stem}_int8_openvino_model" if self.int8 else f"{stem}_openvino_model"
+        if not os.path.isdir(path):
+            print(f"📦 OpenVINO'ya aktarılıyor: {self.weights} → {path}")
+            options = dict(int8=True, data=self.int8_data) if self.int8 else {}
+            path = self._yolo().export(format="openvino", imgsz=self.imgsz, dynamic=True, **options)
+        return path
+
+
+def results_to_records(results, conf=0.0, classes=None):
+    """
+    Tek karenin sonucunu protocol.DETECTION_DTYPE kayıt dizisine çevirir (dx/dy karenin merkezine göre).
+    Tensör tek seferde NumPy'a alınır; `classes` verilirse yalnız o sınıf id'leri tutulur.
+    """
+    height, width = results.orig_shape
+    return boxes_to_records(results.boxes.data.cpu().numpy(), width, height, conf, classes)
+
+
+def boxes_to_records(data, width, height, conf=0.0, classes=None):
+    """(n, 6) x1, y1, x2, y2, conf, cls dizisini width x height karenin kayıtlarına çevirir."""
+    keep = data[:, 4] > conf
+    if classes is not None:
+        keep &= np.isin(data[:, 5], classes)
+    data = data[keep]
+    xyxy = data[:, :4].astype(np.int32)
+    records = empty_records(len(data))
+    records["cls"] = data[:, 5]
+    records["conf"] = data[:, 4]
+    records["x1"], records["y1"], records["x2"], records["y2"] = xyxy.T
+    records["dx"] = (xyxy[:, 0] + xyxy[:, 2]) // 2 - width // 2
+    records["dy"] = (xyxy[:, 1] + xyxy[:, 3]) // 2 - height // 2
+    records["area"] = (xyxy[:, 2] - xyxy[:, 0]) * (xyxy[:, 3] - xyxy[:, 1])
+    return records
+
+
+BACKENDS = {cls.name: cls for cls in (PyTorchBackend, OnnxBackend, OpenVinoBackend)}
+
+
+def create_backend(name, weights="yolov8s.pt", imgsz=640, int8=False):
+    try:
+        cls = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Bilinmeyen arka uç: {name} (seçenekler: {', '.join(BACKENDS)})") from None
+    return cls(weights, imgsz, int8)
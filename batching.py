@@ -0,0 +1,80 @@
+# batching.py
+# Birden fazla kamera istemcisinin en yeni karelerini tek bir toplu (batch) çağrıda birleştirir
+import threading
+import time
+
+from pipeline import LatestQueue
+
+
+class FrameBatcher:
+    """
+    Her istemci için tek kare yuvası tutar (en yeni kazanır).
+    `next_batch` ilk kare geldikten sonra en fazla `max_wait` saniye diğer
+    istemcileri bekler, sonra hazır olanların hepsini tek listede döndürür.
+    """
+
+    def __init__(self, max_batch=8, max_wait=0.010):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.closed = False
+        self._slots = {}
+        self._cond = threading.Condition()
+
+    def add(self, key):
+        with self._cond:
+            self._slots[key] = LatestQueue(1)
+
+    def remove(self, key):
+        with self._cond:
+            slot = self._slots.pop(key, None)
+            if slot is not None:
+                slot.close()
+            self._cond.notify_all()
+
+    def submit(self, key, item):
+        with self._cond:
+            slot = self._slots.get(key)
+            if slot is None:
+                return
+            slot.put(item)
+            self._cond.notify_all()
+
+    def dropped(self, key):
+        """Toplu çağrıya girmeden yenisiyle ezilen kare sayısı."""
+        slot = self._slots.get(key)
+        return slot.dropped if slot is not None else 0
+
+    def _ready(self):
+        return [key for key, slot in self._slots.items() if len(slot)]
+
+    def next_batch(self, timeout=None):
+        """[(key, item), ...] döndürür; zaman aşımı veya kapanışta boş liste."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self._ready():
+                if self.closed:
+                    return []
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return []
+                self._cond.wait(remaining)
+
+            # İlk kare geldi: diğer istemciler için kısa bir pencere bekle
+            window_end = time.monotonic() + self.max_wait
+            while len(self._ready()) < min(len(self._slots), self.max_batch):
+                remaining = window_end - time.monotonic()
+                if remaining <= 0 or self.closed:
+                    break
+                self._cond.wait(remaining)
+
+            batch = []
+            for key in self._ready()[:self.max_batch]:
+                batch.append((key, self._slots[key].get_nowait()))
+                # Sıraya en sona al: max_batch'ten fazla istemci varsa adil dönüşüm
+                self._slots[key] = self._slots.pop(key)
+            return batch
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
@@ -0,0 +1,103 @@
+# bench_backends.py
+# Çıkarım arka uçlarını (backends.py) aynı kare kümesinde karşılaştırır: yükleme, ısınma,
+# çağrı başına gecikme ve toplam işlem hızı. GPU gerektirmez.
+#
+# Kullanım:
+#   python bench_backends.py --backends pytorch onnx openvino --int8
+#   python bench_backends.py --source video:ucus.mp4 --frames 200 --batch 1 4
+import argparse
+import json
+import time
+
+import numpy as np
+
+from backends import BACKENDS, create_backend
+from frame_source import open_source
+
+
+def collect_frames(spec, count, width, height):
+    """Kaynaktan `count` ardışık kare kopyalar; tüm arka uçlar aynı karelerle ölçülür."""
+    source = open_source(spec, width, height, fps=1000).start()
+    frames, last_seq = [], 0
+    try:
+        while len(frames) < count:
+            frame = source.wait_newer(last_seq, timeout=2.0)
+            if frame is None:
+                break
+            last_seq = frame.seq
+            frames.append(frame.image.copy())
+            source.release(frame)
+    finally:
+        source.stop()
+    return frames
+
+
+def measure(backend, frames, batch, conf):
+    latencies, detections = [], 0
+    started = time.perf_counter()
+    for i in range(0, len(frames) - batch + 1, batch):
+        t0 = time.perf_counter()
+        results = backend.predict(frames[i:i + batch], conf)
+        latencies.append(time.perf_counter() - t0)
+        detections += sum(len(r.boxes) for r in results)
+    total = time.perf_counter() - started
+    done = len(latencies) * batch
+    p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+    return {
+        "batch": batch,
+        "kare": done,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "kare_basi_ms": total / done * 1000,
+        "fps": done / total,
+        "ort_tespit": detections / done,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Çıkarım arka ucu karşılaştırması")
+    parser.add_argument("--backends", nargs="+", default=["pytorch", "onnx", "openvino"], choices=sorted(BACKENDS))
+    parser.add_argument("--int8", action="store_true", help="onnx/openvino için INT8 sürümü de ölç")
+    parser.add_argument("--model", default="yolov8s.pt")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--source", default="synthetic", help='"synthetic" veya "video:<dosya>"')
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=320)
+    parser.add_argument("--batch", type=int, nargs="+", default=[1])
+    parser.add_argument("--conf", type=float, default=0.4)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--out", default="bench_backends.json")
+    args = parser.parse_args()
+
+    frames = collect_frames(args.source, args.frames, args.width, args.height)
+    print(f"🎞️ {len(frames)} kare ({args.source}, {args.width}x{args.height})")
+
+    variants = [(name, False) for name in args.backends]
+    if args.int8:
+        variants += [(name, True) for name in args.backends if name != "pytorch"]
+
+    results = []
+    for name, int8 in variants:
+        backend = create_backend(name, args.model, args.imgsz, int8)
+        try:
+            backend.load()
+            backend.warmup(args.warmup, frames[0].shape)
+        except Exception as e:
+            print(f"⚠️ {backend.label} atlandı: {e}")
+            continue
+        for batch in args.batch:
+            row = dict(arka_uc=backend.label, yukleme_sn=backend.load_seconds,
+                       isinma_sn=backend.warmup_seconds, **measure(backend, frames, batch, args.conf))
+            results.append(row)
+            print(f"  {row['arka_uc']:<14} batch {batch:<2} p50 {row['p50_ms']:7.1f} ms  p95 {row['p95_ms']:7.1f} ms  "
+                  f"{row['fps']:6.1f} FPS  ısınma {row['isinma_sn']:.2f} sn  tespit/kare {row['ort_tespit']:.2f}")
+
+    with open(args.out, "w") as f:
+        json.dump({"zaman": time.strftime("%Y-%m-%dT%H:%M:%S"), "model": args.model, "imgsz": args.imgsz,
+                   "kaynak": args.source, "sonuclar": results}, f, indent=2, ensure_ascii=False)
+    print(f"   sonuç: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
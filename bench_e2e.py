@@ -0,0 +1,229 @@
+# bench_e2e.py
+# Donanımsız uçtan uca ölçüm: gerçek drone client döngüsü (send_to_pc) + gerçek yolo_server,
+# loopback üzerinden. Kamera yerine video/sentetik kaynak, araç yerine StubVehicle.
+#
+# Kullanım:
+#   python bench_e2e.py --source synthetic --duration 30 --out bench_e2e.json
+#   python bench_e2e.py --source video:ucus.mp4 --baseline eski.json
+#   python bench_e2e.py --server-host 10.0.0.5   (sunucu zaten çalışıyorsa)
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from frame_trace import STAGES
+
+# Raporlanan aşama süreleri: (isim, başlangıç sütunu, bitiş sütunu)
+STAGE_SPANS = (
+    ("bekleme", "capture", "encode_start"),
+    ("kodlama", "encode_start", "encode_end"),
+    ("gonderme", "encode_end", "sent"),
+    ("sunucu_ag", "sent", "reply"),
+    ("isleme", "reply", "handled"),
+    ("uctan_uca", "capture", "handled"),
+)
+SERVER_PORT = 8000
+
+
+def serve_forever(track=False):
+    """Alt süreç: gerçek yolo_server, pencere açmadan."""
+    import server_yolo_response as server
+    server.SHOW_WINDOW = False
+    server.TRACKING = track
+    server.start_server()
+    threading.Event().wait()
+
+
+def wait_for_port(host, port, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.5)
+    return False
+
+
+def percentiles(values):
+    if len(values) == 0:
+        return {"p50": None, "p95": None, "p99": None, "ort": None}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": p50 * 1000, "p95": p95 * 1000, "p99": p99 * 1000, "ort": float(np.mean(values)) * 1000}
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "describe", "--always", "--dirty"],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    import control
+    import drone_control
+    import fake_pi_test_client_cam_object as client
+    from frame_source import open_source
+    from stub_vehicle import StubVehicle
+
+    # Client ayarları
+    client.SERVER_IP = args.server_host
+    client.rate_ctl.fps = args.fps
+    client.rate_ctl.mode = args.rate_mode
+    client.PIPELINE_DEPTH = args.depth
+    client.TRANSPORT = args.transport
+    client.RESPONSE_FORMAT = args.format
+    client.hedef_etiketi = args.target
+    client.ENCODE_THREADS = args.encode_threads
+    client.JPEG_CODEC = args.codec
+    client.ENCODE_GRAY = args.gray
+    if args.quiet:
+        client.log = lambda msg, level="info", *args, **kwargs: None if level in ("info", "debug") else print(msg)
+
+    vehicle = StubVehicle()
+    drone_control.vehicle = vehicle
+    drone_control.start_setpoint_streamer()
+    control.configure_PID()
+    if args.record:
+        client.start_recorder(args.record)
+    client.camera = open_source(args.source, client.FRAME_WIDTH, client.FRAME_HEIGHT, args.source_fps,
+                                slots=3 + args.encode_threads).start()
+
+    rows = []
+    recording = threading.Event()
+
+    def on_frame(frame_id, times):
+        if recording.is_set():
+            rows.append(times.copy())
+
+    client.trace.add_listener(on_frame)
+    client.supervisor.start()
+    threading.Thread(target=client.send_to_pc, daemon=True).start()
+
+    print(f"⏳ Isınma {args.warmup:.0f} sn...")
+    time.sleep(args.warmup)
+    mavlink_before = sum(vehicle.sent.values())
+    recording.set()
+    start = time.monotonic()
+    time.sleep(args.duration)
+    recording.clear()
+    elapsed = time.monotonic() - start
+    mavlink_sent = sum(vehicle.sent.values()) - mavlink_before
+    setpoint_stats = drone_control.setpoint_streamer.stats()
+    encoder_stats = client.encoder.stats() if client.encoder is not None else {}
+    client.camera.stop()
+    drone_control.stop_setpoint_streamer()
+
+    table = np.array(rows) if rows else np.empty((0, len(STAGES)))
+    col = {name: i for i, name in enumerate(STAGES)}
+    stages = {}
+    for name, a, b in STAGE_SPANS:
+        d = table[:, col[b]] - table[:, col[a]] if len(table) else np.empty(0)
+        stages[name] = percentiles(d[~np.isnan(d)])
+
+    return {
+        "zaman": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "surum": git_revision(),
+        "ayarlar": {
+            "kaynak": args.source, "fps": args.fps, "oran_modu": args.rate_mode, "takip": args.track,
+            "derinlik": args.depth, "tasima": args.transport,
+            "bicim": args.format, "hedef": args.target, "sure": args.duration,
+            "kodlayici": client.encoder.codec_name if client.encoder is not None else args.codec,
+            "kodlama_is_parcacigi": args.encode_threads, "gri": args.gray,
+        },
+        "kare": len(rows),
+        "fps": len(rows) / elapsed if elapsed > 0 else 0.0,
+        "uctan_uca_ms": stages["uctan_uca"],
+        "asamalar_ms": stages,
+        "mavlink_mesaj_hizi": mavlink_sent / elapsed if elapsed > 0 else 0.0,
+        "setpoint": setpoint_stats,
+        "oran_denetleyici": client.rate_ctl.state(),
+        "kodlama": encoder_stats,
+    }
+
+
+def compare(result, baseline):
+    print("📊 Önceki sonuca göre:")
+    for key, old, new in (
+        ("fps", baseline.get("fps"), result["fps"]),
+        ("p50 ms", baseline["uctan_uca_ms"].get("p50"), result["uctan_uca_ms"]["p50"]),
+        ("p95 ms", baseline["uctan_uca_ms"].get("p95"), result["uctan_uca_ms"]["p95"]),
+        ("p99 ms", baseline["uctan_uca_ms"].get("p99"), result["uctan_uca_ms"]["p99"]),
+    ):
+        if old and new:
+            print(f"  {key:<7} {old:9.2f} → {new:9.2f} ({(new - old) / old * 100:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Donanımsız uçtan uca benchmark")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--source", default="synthetic", help='"synthetic" veya "video:<dosya>"')
+    parser.add_argument("--source-fps", type=float, default=30)
+    parser.add_argument("--fps", type=float, default=7, help="client gönderim hızı (FPS sabiti)")
+    parser.add_argument("--rate-mode", default="fixed", choices=["fixed", "adaptive"])
+    parser.add_argument("--track", action="store_true", help="sunucuda tespit + takip modu (TRACKING)")
+    parser.add_argument("--depth", type=int, default=1, help="PIPELINE_DEPTH")
+    parser.add_argument("--format", default="json", choices=["json", "binary"])
+    parser.add_argument("--transport", default="tcp", choices=["tcp", "udp"], help="client TRANSPORT")
+    parser.add_argument("--target", default=None, help="hedef_etiketi")
+    parser.add_argument("--encode-threads", type=int, default=2, help="ENCODE_THREADS")
+    parser.add_argument("--codec", default="auto", choices=["auto", "turbojpeg", "simplejpeg", "opencv"],
+                        help="JPEG_CODEC")
+    parser.add_argument("--gray", action="store_true", help="ENCODE_GRAY")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--server-host", default=None, help="verilmezse sunucu alt süreçte başlatılır")
+    parser.add_argument("--out", default="bench_e2e.json")
+    parser.add_argument("--record", default=None, help="uçuş kaydı dosyası (replay.py ile oynatılır)")
+    parser.add_argument("--baseline", default=None, help="karşılaştırılacak önceki sonuç dosyası")
+    parser.add_argument("--verbose", dest="quiet", action="store_false")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve_forever(args.track)
+        return
+
+    server = None
+    if args.server_host is None:
+        args.server_host = "127.0.0.1"
+        cmd = [sys.executable, os.path.abspath(__file__), "--serve"] + (["--track"] if args.track else [])
+        server = subprocess.Popen(cmd)
+    try:
+        if not wait_for_port(args.server_host, SERVER_PORT, timeout=300):
+            print("❌ Sunucuya bağlanılamadı")
+            sys.exit(1)
+        result = run(args)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    with open(args.out, "w") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    e2e = result["uctan_uca_ms"]
+    print(f"✅ {result['kare']} kare, {result['fps']:.2f} FPS")
+    if e2e["p50"] is not None:
+        print(f"   uçtan uca p50 {e2e['p50']:.1f} ms, p95 {e2e['p95']:.1f} ms, p99 {e2e['p99']:.1f} ms")
+    for name, st in result["asamalar_ms"].items():
+        if st["p50"] is not None:
+            print(f"   {name:<10} p50 {st['p50']:8.2f} ms  p95 {st['p95']:8.2f} ms")
+    enc = result["kodlama"]
+    if enc:
+        print(f"   kodlama   {result['ayarlar']['kodlayici']}, {enc['threads']} iş parçacığı, "
+              f"ort {enc['encode_ms_avg']:.2f} ms, {enc['encoded']} kodlandı / {enc['superseded']} atıldı")
+    print(f"   sonuç: {args.out}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(result, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# bench_framing.py
+# Eski "buffer += recv(4096)" döngüsü ile framing.FrameReader karşılaştırması.
+# Kullanım: python bench_framing.py --frames 2000 --size 45000
+import argparse
+import socket
+import struct
+import threading
+import time
+import tracemalloc
+
+from framing import FrameReader, send_frame
+
+
+def legacy_receiver(conn, n_frames, counter):
+    """server_yolo_response.yolo_server'daki eski okuma döngüsü (ayırmalar sayılır)."""
+    buffer = b""
+    for _ in range(n_frames):
+        while len(buffer) < 4:
+            recv_data = conn.recv(4096)
+            if not recv_data:
+                raise ConnectionError("Bağlantı koptu!")
+            buffer += recv_data
+            counter[0] += 2  # recv sonucu + birleştirme
+        img_size = struct.unpack(">L", buffer[:4])[0]
+        buffer = buffer[4:]
+        counter[0] += 2
+        while len(buffer) < img_size:
+            recv_data = conn.recv(4096)
+            if not recv_data:
+                raise ConnectionError("Bağlantı koptu!")
+            buffer += recv_data
+            counter[0] += 2
+        img_data = buffer[:img_size]
+        buffer = buffer[img_size:]
+        counter[0] += 2
+        yield img_data
+
+
+def reader_receiver(conn, n_frames, counter):
+    reader = FrameReader(conn)
+    for _ in range(n_frames):
+        payload = reader.read_frame()
+        counter[0] = reader.grow_count
+        yield payload
+
+
+def sender(sock, payload, n_frames):
+    for _ in range(n_frames):
+        send_frame(sock, payload)
+
+
+def run(name, receiver, payload, n_frames):
+    a, b = socket.socketpair()
+    t = threading.Thread(target=sender, args=(a, payload, n_frames), daemon=True)
+    counter = [0]
+    tracemalloc.start()
+    peak_per_frame = 0
+    t.start()
+    start = time.perf_counter()
+    received = 0
+    for frame in receiver(b, n_frames, counter):
+        received += len(frame)
+        _, peak = tracemalloc.get_traced_memory()
+        peak_per_frame = max(peak_per_frame, peak)
+        tracemalloc.reset_peak()
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+    t.join()
+    a.close()
+    b.close()
+    return {
+        "isim": name,
+        "MB/s": received / elapsed / 1e6,
+        "ayirma/kare": counter[0] / n_frames,
+        "tepe_bellek_KB": peak_per_frame / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Çerçeveleme mikro-benchmark")
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--size", type=int, default=45000, help="JPEG boyutu (bayt)")
+    args = parser.parse_args()
+
+    payload = bytes(args.size)
+    print(f"{args.frames} kare x {args.size} bayt")
+    for name, receiver in (("eski döngü", legacy_receiver), ("FrameReader", reader_receiver)):
+        r = run(name, receiver, payload, args.frames)
+        print(f"  {r['isim']:<12} {r['MB/s']:8.1f} MB/s  "
+              f"{r['ayirma/kare']:8.1f} tampon ayırma/kare  tepe {r['tepe_bellek_KB']:8.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# bench_inference_pool.py
+# Çıkarım havuzunun (inference_pool.py) işçi sayısıyla ölçeklenmesi: her işçi sayısı için
+# havuz sürekli dolu tutulur, saniyedeki kare ve toplu çağrı gecikmesi ölçülür.
+# "0" işçi = modelin bu süreçte tek kopyası (havuzsuz, sunucunun varsayılanı).
+#
+# Kullanım:
+#   python bench_inference_pool.py --workers 0 1 2 4 8 --duration 20
+#   python bench_inference_pool.py --backend onnx --workers 1 2 4 --batch 1 --pin-cpus
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from backends import BACKENDS, create_backend
+from bench_backends import collect_frames
+from inference_pool import InferencePool
+
+
+def run_inline(args, frames):
+    backend = create_backend(args.backend, args.model, args.imgsz, args.int8).load()
+    backend.warmup(args.warmup, frames[0].shape)
+    latencies, done, i = [], 0, 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < args.duration:
+        batch = [frames[(i + k) % len(frames)] for k in range(args.batch)]
+        t0 = time.perf_counter()
+        backend.predict(batch, args.conf)
+        latencies.append(time.perf_counter() - t0)
+        done += len(batch)
+        i += len(batch)
+    return done, time.perf_counter() - started, latencies
+
+
+def run_pool(args, frames, workers):
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    threads = args.threads or max(1, cpus // workers)
+    pool = InferencePool(args.backend, args.model, args.imgsz, args.int8, args.conf, workers=workers,
+                         threads=threads, pin_cpus=args.pin_cpus, depth=args.depth, max_batch=args.batch,
+                         warmup_runs=args.warmup, warmup_shape=frames[0].shape).start()
+    try:
+        if not pool.wait_ready():
+            raise RuntimeError(pool.error)
+        latencies, counter = [], [0]
+        lock = threading.Lock()
+
+        def on_done(task):
+            with lock:
+                if task.error is None:
+                    counter[0] += len(task.records)
+                    latencies.append(task.finished - task.submitted)
+
+        i = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < args.duration:
+            pool.submit([frames[(i + k) % len(frames)] for k in range(args.batch)], callback=on_done)
+            i += args.batch
+        # Kalan işler bitene kadar bekle; süre son sonuca kadar ölçülür
+        while pool.stats()["in_flight"]:
+            time.sleep(0.001)
+        return counter[0], time.perf_counter() - started, latencies, threads
+    finally:
+        pool.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Çıkarım havuzu ölçeklenme benchmark'ı")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    parser.add_argument("--backend", default="pytorch", choices=sorted(BACKENDS))
+    parser.add_argument("--model", default="yolov8s.pt")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--int8", action="store_true")
+    parser.add_argument("--threads", type=int, default=None, help="işçi başına (varsayılan çekirdek / işçi)")
+    parser.add_argument("--pin-cpus", action="store_true")
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--batch", type=int, default=1, help="toplu çağrı başına kare (bağlı drone sayısı)")
+    parser.add_argument("--source", default="synthetic", help='"synthetic" veya "video:<dosya>"')
+    parser.add_argument("--frames", type=int, default=64)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=320)
+    parser.add_argument("--conf", type=float, default=0.4)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--out", default="bench_inference_pool.json")
+    args = parser.parse_args()
+
+    frames = collect_frames(args.source, args.frames, args.width, args.height)
+    print(f"🎞️ {len(frames)} kare ({args.source}, {args.width}x{args.height}), batch {args.batch}, "
+          f"{os.cpu_count()} çekirdek")
+
+    results, base_fps = [], None
+    for workers in args.workers:
+        if workers == 0:
+            done, elapsed, latencies = run_inline(args, frames)
+            threads = None
+        else:
+            done, elapsed, latencies, threads = run_pool(args, frames, workers)
+        fps = done / elapsed
+        base_fps = base_fps or fps
+        p50, p95 = np.percentile(latencies, [50, 95]) * 1000 if latencies else (None, None)
+        row = {"isci": workers, "is_parcacigi": threads, "kare": done, "fps": fps,
+               "hizlanma": fps / base_fps, "verim": fps / base_fps / max(1, workers),
+               "cagri_p50_ms": p50, "cagri_p95_ms": p95}
+        results.append(row)
+        print(f"  {workers} işçi ({threads or '-'} iş parçacığı): {fps:7.1f} FPS  x{row['hizlanma']:.2f}  "
+              f"çağrı p50 {p50:7.1f} ms  p95 {p95:7.1f} ms")
+
+    with open(args.out, "w") as f:
+        json.dump({"zaman": time.strftime("%Y-%m-%dT%H:%M:%S"), "model": args.model, "arka_uc": args.backend,
+                   "imgsz": args.imgsz, "batch": args.batch, "cekirdek": os.cpu_count(), "sonuclar": results},
+                  f, indent=2, ensure_ascii=False)
+    print(f"   sonuç: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
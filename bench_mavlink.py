@@ -0,0 +1,328 @@
+# bench_mavlink.py
+# Komut yolu ölçümü: gerçek dronekit bağlantısı (drone_control/control) + sim_vehicle.SimVehicle,
+# UDP veya TCP loopback üzerinden. Araç simülatörü aynı süreçte çalıştığından mesajların araca
+# varış anları aynı saatle ölçülür.
+#
+# Ölçülenler:
+#   - bağlantı, kalkış ve iniş süreleri (connect_drone, arm_and_takeoff, land)
+#   - komut → COMMAND_ACK gecikmesi ve komutun araca varışı (yaw_relative, CONDITION_YAW)
+#   - ulaşılabilir setpoint hızı: SET_POSITION_TARGET_LOCAL_NED artan hızlarda, kayıp başlayana kadar
+#   - sahte tespit akışı altında control.send_yaw_control + send_position_control: çağrı süresi,
+#     döngü titremesi (planlanan andan sapma), setpoint'in araca varış gecikmesi ve aracın
+#     gördüğü setpoint aralıkları
+#
+# Kullanım:
+#   python bench_mavlink.py --transport udp --detect-hz 7 15 30
+#   python bench_mavlink.py --baud 57600   (Pi ↔ uçuş kontrolcüsü seri hattının kapasitesiyle)
+#   python bench_mavlink.py --connect tcp:127.0.0.1:5762   (SITL vb.; araç tarafı ölçümler atlanır)
+import argparse
+import contextlib
+import json
+import math
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+from pymavlink import mavutil
+
+from bench_e2e import git_revision, percentiles
+
+SETPOINT = "SET_POSITION_TARGET_LOCAL_NED"
+ACK_TIMEOUT = 1.0
+DRAIN_IDLE = 0.5    # sn; bu kadar yeni mesaj gelmezse kuyruk boşaldı sayılır
+TARGET_DX = 150     # px; sahte hedefin yatay salınım genliği
+TARGET_PERIOD = 4.0 # sn
+NOISE_PX = 8
+
+report = print  # stdout susturulsa da ilerleme yazılır (bkz. main)
+
+
+class Probe:
+    """Simülatöre gelen komut/setpoint mesajlarının varış anları (araç tarafı saat)."""
+
+    def __init__(self, sim):
+        self._log = {}
+        self._lock = threading.Lock()
+        if sim is not None:
+            sim.add_listener(self._on_message)
+
+    def _on_message(self, msg, t):
+        name = msg.get_type()
+        if name in ("COMMAND_LONG", SETPOINT):
+            with self._lock:
+                self._log.setdefault(name, []).append((t, msg))
+
+    def take(self, name):
+        with self._lock:
+            return self._log.pop(name, [])
+
+    def count(self, name):
+        with self._lock:
+            return len(self._log.get(name, ()))
+
+
+def drain(probe, name, limit=10.0):
+    """dronekit gönderim kuyruğu boşalıp araca varana kadar bekler."""
+    deadline = time.monotonic() + limit
+    last = -1
+    while time.monotonic() < deadline:
+        n = probe.count(name)
+        if n == last:
+            return
+        last = n
+        time.sleep(DRAIN_IDLE)
+
+
+def measure_acks(vehicle, probe, count):
+    import drone_control
+    acked = threading.Event()
+    acked_at = [0.0]
+
+    def on_ack(_, name, msg):
+        if msg.command == mavutil.mavlink.MAV_CMD_CONDITION_YAW:
+            acked_at[0] = time.monotonic()
+            acked.set()
+
+    vehicle.add_message_listener("COMMAND_ACK", on_ack)
+    rtt, arrival, lost = [], [], 0
+    try:
+        for i in range(count):
+            probe.take("COMMAND_LONG")
+            acked.clear()
+            t0 = time.monotonic()
+            drone_control.yaw_relative(5 if i % 2 == 0 else -5)
+            if not acked.wait(ACK_TIMEOUT):
+                lost += 1
+                continue
+            rtt.append(acked_at[0] - t0)
+            seen = [t for t, msg in probe.take("COMMAND_LONG")
+                    if msg.command == mavutil.mavlink.MAV_CMD_CONDITION_YAW]
+            if seen:
+                arrival.append(seen[0] - t0)
+    finally:
+        vehicle.remove_message_listener("COMMAND_ACK", on_ack)
+    return {"komut": count, "cevapsiz": lost, "ack_ms": percentiles(rtt), "varis_ms": percentiles(arrival)}
+
+
+def measure_rate(vehicle, probe, rate, seconds):
+    """
+    `rate` mesaj/sn hızında gerçek setpoint mesajı; x alanı sıra numarası (maske konumu yok
+    saydığı için araca etkisiz). Araca ulaşan oran, kayıp ve gönderim → varış gecikmesi.
+    """
+    import drone_control
+    factory = vehicle.message_factory
+    probe.take(SETPOINT)
+    sent_at = [0.0]  # sıra 0: yayıncının kendi mesajları
+    start = time.monotonic()
+    scheduled = start
+    while scheduled - start < seconds:
+        delay = scheduled - time.monotonic()
+        if delay > 0.001:
+            time.sleep(delay)
+        elif delay > 0:
+            continue  # kısa bekleme: uyku çözünürlüğünden daha ince
+        msg = factory.set_position_target_local_ned_encode(
+            0, 0, 0, mavutil.mavlink.MAV_FRAME_BODY_NED, drone_control.VELOCITY_YAW_RATE_MASK,
+            len(sent_at), 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+        sent_at.append(time.monotonic())
+        vehicle.send_mavlink(msg)
+        scheduled += 1.0 / rate
+    sent = len(sent_at) - 1
+    drain(probe, SETPOINT)
+    arrivals = [(t, int(msg.x)) for t, msg in probe.take(SETPOINT) if 0 < int(msg.x) <= sent]
+    delivered = len(arrivals) / (arrivals[-1][0] - start) if arrivals else 0.0
+    return {"hedef_hiz": rate, "gonderilen": sent, "ulasan": len(arrivals), "kayip": sent - len(arrivals),
+            "ulasan_hizi": delivered,
+            "gecikme_ms": percentiles([t - sent_at[seq] for t, seq in arrivals])}
+
+
+def measure_capacity(vehicle, probe, rates, seconds):
+    """Artan hızlarda ölçer; kayıpsız ve hedefin %95'ine ulaşan en yüksek hız "ulaşılabilir"."""
+    rows, achievable = [], None
+    for rate in rates:
+        row = measure_rate(vehicle, probe, rate, seconds)
+        rows.append(row)
+        report(f"📈 {rate:g} mesaj/sn → {row['ulasan_hizi']:.0f} ulaştı, {row['kayip']} kayıp")
+        if row["kayip"] or row["ulasan_hizi"] < 0.95 * rate:
+            break
+        achievable = rate
+    return {"ulasilabilir_hiz": achievable, "adimlar": rows}
+
+
+def detection(t, rng):
+    """Sahte tespit: yatayda salınan hedef, gürültülü merkez farkı ve alan."""
+    import control
+    phase = 2 * math.pi * t / TARGET_PERIOD
+    dx = int(TARGET_DX * math.sin(phase) + rng.normal(0, NOISE_PX))
+    dy = int(rng.normal(0, NOISE_PX))
+    area = int(control.AREA_REF * (1 + 0.5 * math.cos(phase)) + rng.normal(0, 100))
+    return dx, dy, area
+
+
+def match_setpoints(expected, arrivals):
+    """Her çağrının setpoint'i (değer eşleşmesiyle) araca ilk vardığı an - çağrı başlangıcı."""
+    times = [t for t, _ in arrivals]
+    delays = []
+    for t0, sp in expected:
+        if sp is None:
+            continue
+        want = (sp[0], sp[1], sp[2], math.radians(sp[3]))
+        for k in range(np.searchsorted(times, t0), len(arrivals)):
+            t, msg = arrivals[k]
+            if np.allclose((msg.vx, msg.vy, msg.vz, msg.yaw_rate), want, atol=1e-3):
+                delays.append(t - t0)
+                break
+    return delays
+
+
+def measure_control(probe, hz, seconds, seed=0):
+    """Tespit akışı hızında (hz) istemcinin yaptığı kontrol çağrıları; zamanlama uyku ile."""
+    import control
+    import drone_control
+    rng = np.random.default_rng(seed)
+    control.reset_filters()
+    control.configure_PID()
+    period = 1.0 / hz
+    probe.take(SETPOINT)
+    lateness, calls, expected = [], [], []
+    start = time.monotonic()
+    scheduled = start
+    while scheduled - start < seconds:
+        delay = scheduled - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        t0 = time.monotonic()
+        lateness.append(t0 - scheduled)
+        dx, dy, area = detection(t0 - start, rng)
+        control.send_yaw_control(dx, smooth=False)
+        control.send_position_control(dx, dy, area, smooth=False)
+        calls.append(time.monotonic() - t0)
+        expected.append((t0, drone_control.setpoint_streamer.current()))
+        scheduled += period
+    control.stop_drone()
+    drain(probe, SETPOINT, limit=2.0)
+    arrivals = probe.take(SETPOINT)
+    window = [t for t, _ in arrivals if start <= t <= scheduled]
+    gaps = np.diff(window) if len(window) > 1 else np.empty(0)
+    return {
+        "tespit_hz": hz, "cagri": len(calls),
+        "cagri_ms": percentiles(calls),
+        "dongu_sapmasi_ms": percentiles(lateness),
+        "setpoint_varis_ms": percentiles(match_setpoints(expected, arrivals)) if arrivals else None,
+        "aracta_setpoint_hizi": len(window) / (scheduled - start) if window else None,
+        "aracta_aralik_ms": dict(percentiles(gaps), std=float(np.std(gaps)) * 1000) if len(gaps) else None,
+    }
+
+
+def run(args):
+    import control
+    import drone_control
+    from sim_vehicle import SimVehicle
+
+    sim = None
+    connection = args.connect
+    if connection is None:
+        address = f"{args.transport}:127.0.0.1:{args.port}"
+        sim = SimVehicle(address, prearm_delay=args.prearm_delay, baud=args.baud).start()
+        connection = f"{'udpout' if args.transport == 'udp' else 'tcp'}:127.0.0.1:{args.port}"
+    probe = Probe(sim)
+    result = {"zaman": time.strftime("%Y-%m-%dT%H:%M:%S"), "surum": git_revision(),
+              "ayarlar": {"baglanti": connection, "simulator": sim is not None, "irtifa": args.alt,
+                          "baud": args.baud, "setpoint_hz": drone_control.SETPOINT_RATE_HZ}}
+    try:
+        t0 = time.monotonic()
+        drone_control.connect_drone(connection)
+        result["baglanti_sn"] = time.monotonic() - t0
+        report(f"🔌 Bağlandı: {connection} ({result['baglanti_sn']:.2f} sn)")
+
+        t0 = time.monotonic()
+        if not control.arm_and_takeoff(args.alt):
+            raise RuntimeError("Kalkış başarısız")
+        result["kalkis_sn"] = time.monotonic() - t0
+        report(f"🚀 Kalkış {result['kalkis_sn']:.2f} sn")
+
+        vehicle = drone_control.vehicle
+        result["komut_ack"] = measure_acks(vehicle, probe, args.acks)
+        report(f"📨 COMMAND_ACK p50 {result['komut_ack']['ack_ms']['p50'] or 0:.2f} ms")
+        if sim is not None:
+            result["setpoint_kapasitesi"] = measure_capacity(vehicle, probe, args.rates, args.step)
+            result["kontrol"] = []
+            for hz in args.detect_hz:
+                row = measure_control(probe, hz, args.duration)
+                result["kontrol"].append(row)
+                report(f"🎯 {hz:g} Hz tespit akışı: {row['cagri']} çağrı")
+
+        t0 = time.monotonic()
+        control.land(wait=True)
+        result["inis_sn"] = time.monotonic() - t0
+        result["setpoint_yayinci"] = drone_control.setpoint_streamer.stats()
+    finally:
+        drone_control.disconnect_drone()
+        drone_control.vehicle = None
+        if sim is not None:
+            result["simulator"] = sim.stats()
+            sim.stop()
+    return result
+
+
+def summarize(result):
+    def ms(st):
+        return f"p50 {st['p50']:7.2f} ms  p95 {st['p95']:7.2f} ms" if st and st["p50"] is not None else "-"
+
+    print(f"✅ bağlantı {result['baglanti_sn']:.2f} sn, kalkış {result['kalkis_sn']:.2f} sn, "
+          f"iniş {result['inis_sn']:.2f} sn")
+    acks = result["komut_ack"]
+    print(f"   komut → ACK     {ms(acks['ack_ms'])}  ({acks['cevapsiz']}/{acks['komut']} cevapsız)")
+    print(f"   komut → araç    {ms(acks['varis_ms'])}")
+    capacity = result.get("setpoint_kapasitesi")
+    if capacity:
+        for row in capacity["adimlar"]:
+            print(f"   setpoint {row['hedef_hiz']:>6g}/sn → {row['ulasan_hizi']:7.0f}/sn araca, "
+                  f"{row['kayip']:>5} kayıp, gecikme {ms(row['gecikme_ms'])}")
+        print(f"   ulaşılabilir setpoint hızı: {capacity['ulasilabilir_hiz'] or '-'} mesaj/sn")
+    for row in result.get("kontrol", []):
+        print(f"   {row['tespit_hz']:>4g} Hz tespit: çağrı {ms(row['cagri_ms'])} | döngü sapması "
+              f"{ms(row['dongu_sapmasi_ms'])} | araca varış {ms(row['setpoint_varis_ms'])}")
+        gaps = row["aracta_aralik_ms"]
+        if gaps:
+            print(f"        araçta {row['aracta_setpoint_hizi']:.1f} setpoint/sn, aralık {ms(gaps)} "
+                  f"std {gaps['std']:.2f} ms")
+
+
+def main():
+    global report
+    parser = argparse.ArgumentParser(description="MAVLink komut hızı / gecikme / titreme ölçümü")
+    parser.add_argument("--transport", default="udp", choices=["udp", "tcp"])
+    parser.add_argument("--port", type=int, default=14560)
+    parser.add_argument("--connect", default=None, help="dış araç/SITL bağlantısı (simülatör başlatılmaz)")
+    parser.add_argument("--prearm-delay", type=float, default=1.0)
+    parser.add_argument("--alt", type=float, default=3.0)
+    parser.add_argument("--acks", type=int, default=100, help="ölçülecek CONDITION_YAW komutu sayısı")
+    parser.add_argument("--baud", type=int, default=None,
+                        help="simülatörde seri hat benzetimi (Pi'deki /dev/serial0: 57600)")
+    parser.add_argument("--rates", type=float, nargs="+", default=[50, 100, 200, 500, 1000, 2000, 5000],
+                        help="kapasite ölçümünde denenecek setpoint hızları (mesaj/sn)")
+    parser.add_argument("--step", type=float, default=1.0, help="her hız adımının süresi (sn)")
+    parser.add_argument("--detect-hz", type=float, nargs="+", default=[7, 15, 30])
+    parser.add_argument("--duration", type=float, default=5.0, help="her tespit hızı için süre (sn)")
+    parser.add_argument("--out", default="bench_mavlink.json")
+    parser.add_argument("--verbose", dest="quiet", action="store_false")
+    args = parser.parse_args()
+
+    # control/drone_control her komutta yazdırır; yazdırma maliyeti ölçülür ama ekrana basılmaz
+    stdout = sys.stdout
+    report = lambda msg: print(msg, file=stdout, flush=True)
+    with open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull if args.quiet else stdout):
+        result = run(args)
+
+    with open(args.out, "w") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    summarize(result)
+    print(f"   sonuç: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# bench_protocol.py
+# JSON ve ikili yanıt biçimlerinin kodlama/çözme süresi ve kare başına bayt karşılaştırması.
+# Kullanım: python bench_protocol.py --repeat 20000
+import argparse
+import time
+
+import numpy as np
+
+from protocol import (ClassTable, decode_binary, decode_json, empty_records, encode_binary,
+                      encode_json)
+
+NAMES = [f"sinif_{i}" for i in range(80)]
+NAMES[0] = "person"
+
+
+def make_records(n, rng):
+    records = empty_records(n)
+    records["cls"] = rng.integers(0, len(NAMES), n)
+    records["conf"] = rng.uniform(0.4, 1.0, n)
+    records["x1"] = rng.integers(0, 600, n)
+    records["y1"] = rng.integers(0, 280, n)
+    records["x2"] = records["x1"] + rng.integers(10, 40, n)
+    records["y2"] = records["y1"] + rng.integers(10, 40, n)
+    records["dx"] = (records["x1"] + records["x2"]) // 2 - 320
+    records["dy"] = (records["y1"] + records["y2"]) // 2 - 160
+    records["area"] = (records["x2"] - records["x1"]) * (records["y2"] - records["y1"])
+    return records
+
+
+def per_call_us(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yanıt biçimi benchmark")
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'tespit':>6} | {'biçim':<6} | {'bayt':>6} | {'kodlama µs':>10} | {'çözme µs':>9}")
+    for n in (1, 10, 100):
+        records = make_records(n, rng)
+        repeat = max(100, args.repeat // n)
+
+        payload = encode_json(42, records, NAMES)
+        table = ClassTable(NAMES)
+        enc = per_call_us(lambda: encode_json(42, records, NAMES), repeat)
+        dec = per_call_us(lambda: decode_json(payload, table), repeat)
+        print(f"{n:>6} | {'json':<6} | {len(payload):>6} | {enc:>10.2f} | {dec:>9.2f}")
+
+        payload = encode_binary(42, 1, 2, records)
+        enc = per_call_us(lambda: encode_binary(42, 1, 2, records), repeat)
+        dec = per_call_us(lambda: decode_binary(payload), repeat)
+        print(f"{n:>6} | {'binary':<6} | {len(payload):>6} | {enc:>10.2f} | {dec:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# bench_tiling.py
+# Döşemeli çıkarımın (tiling.py) gecikmesini düz çıkarımla karşılaştırır. Eşleşik çözünürlük:
+# TILE px döşeme imgsz'e büyütülürken tam kare aynı ölçekte ancak imgsz * genişlik / TILE ile
+# görülür; bu yüzden düz çıkarım hem model imgsz'inde hem bu eşleşik imgsz'de ölçülür.
+#
+# Kullanım:
+#   python bench_tiling.py --tile 320 --imgsz 640
+#   python bench_tiling.py --source video:ucus.mp4 --backend onnx --tile 256 --batch 1 2
+import argparse
+import json
+import time
+
+import numpy as np
+
+from backends import BACKENDS, create_backend
+from bench_backends import collect_frames
+from tiling import Tiler, roi_from_records
+
+
+def matched_imgsz(width, height, tile, imgsz, stride=32):
+    """Tam karenin döşemeyle aynı büyütmede görüldüğü giriş boyutu (uzun kenar, stride katı)."""
+    scale = imgsz / max(min(tile, width), min(tile, height))  # döşeme uzun kenarı imgsz'e ölçeklenir
+    return int(np.ceil(max(width, height) * scale / stride) * stride)
+
+
+def measure(run, frames, batch):
+    latencies, detections = [], 0
+    started = time.perf_counter()
+    for i in range(0, len(frames) - batch + 1, batch):
+        t0 = time.perf_counter()
+        detections += sum(len(d) for d in run(frames[i:i + batch]))
+        latencies.append(time.perf_counter() - t0)
+    total = time.perf_counter() - started
+    done = len(latencies) * batch
+    p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+    return {"batch": batch, "kare": done, "p50_ms": p50, "p95_ms": p95,
+            "kare_basi_ms": total / done * 1000, "fps": done / total, "ort_tespit": detections / done}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Döşemeli ve düz çıkarım gecikme karşılaştırması")
+    parser.add_argument("--backend", default="pytorch", choices=sorted(BACKENDS))
+    parser.add_argument("--model", default="yolov8s.pt")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--tile", type=int, default=320)
+    parser.add_argument("--overlap", type=float, default=0.2)
+    parser.add_argument("--roi", type=int, default=48, help="ROI modu için sahte hedef kutusu boyutu (px)")
+    parser.add_argument("--roi-margin", type=float, default=2.0)
+    parser.add_argument("--source", default="synthetic", help='"synthetic" veya "video:<dosya>"')
+    parser.add_argument("--frames", type=int, default=64)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=320)
+    parser.add_argument("--batch", type=int, nargs="+", default=[1], help="toplu çağrı başına kare (drone sayısı)")
+    parser.add_argument("--conf", type=float, default=0.4)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--out", default="bench_tiling.json")
+    args = parser.parse_args()
+
+    frames = collect_frames(args.source, args.frames, args.width, args.height)
+    print(f"🎞️ {len(frames)} kare ({args.source}, {args.width}x{args.height}), döşeme {args.tile} px, "
+          f"imgsz {args.imgsz}")
+    matched = matched_imgsz(args.width, args.height, args.tile, args.imgsz)
+
+    # Karenin ortasında sabit hedef: ROI modu tek döşemeye iner
+    cx, cy, half = args.width // 2, args.height // 2, args.roi // 2
+    box = np.array([(cx - half, cy - half, cx + half, cy + half)],
+                   dtype=[("x1", "<i2"), ("y1", "<i2"), ("x2", "<i2"), ("y2", "<i2")])
+    roi = roi_from_records(box, args.roi_margin)
+
+    backend = create_backend(args.backend, args.model, args.imgsz).load()
+    backend.warmup(args.warmup, frames[0].shape)
+    matched_backend = create_backend(args.backend, args.model, matched).load()
+    matched_backend.warmup(args.warmup, frames[0].shape)
+
+    def plain(b):
+        return lambda batch: [r.boxes.data.cpu().numpy() for r in b.predict(batch, args.conf)]
+
+    def tiled(tiler, with_roi=False):
+        return lambda batch: tiler.detect(backend, batch, args.conf, rois=[roi] * len(batch) if with_roi else None)
+
+    variants = [
+        (f"düz imgsz {args.imgsz}", 1, plain(backend)),
+        (f"düz imgsz {matched} (eşleşik)", 1, plain(matched_backend)),
+    ]
+    for full in (True, False):
+        tiler = Tiler(args.tile, args.overlap, full_frame=full)
+        label = "+tam kare" if full else ""
+        variants.append((f"döşemeli{label}", len(tiler.windows(args.width, args.height)), tiled(tiler)))
+        variants.append((f"döşemeli ROI{label}", len(tiler.windows(args.width, args.height, roi)),
+                         tiled(tiler, with_roi=True)))
+
+    results = []
+    for name, windows, run in variants:
+        for batch in args.batch:
+            row = dict(yontem=name, pencere=windows, **measure(run, frames, batch))
+            results.append(row)
+            print(f"  {name:<28} {windows} pencere  batch {batch:<2} p50 {row['p50_ms']:7.1f} ms  "
+                  f"p95 {row['p95_ms']:7.1f} ms  {row['fps']:6.1f} FPS  tespit/kare {row['ort_tespit']:.2f}")
+
+    with open(args.out, "w") as f:
+        json.dump({"zaman": time.strftime("%Y-%m-%dT%H:%M:%S"), "model": args.model, "arka_uc": backend.label,
+                   "imgsz": args.imgsz, "eslesik_imgsz": matched, "doseme": args.tile, "ortusme": args.overlap,
+                   "kaynak": args.source, "sonuclar": results}, f, indent=2, ensure_ascii=False)
+    print(f"   sonuç: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+# bench_transport.py
+# TCP ve UDP (udp_transport) taşımalarını aynı kayıp/sıra bozulması altında karşılaştırır.
+# Her şey loopback üzerinde: sahte sunucu (yalnız en yeni kareyi işler, --server-ms bekleyip
+# yanıtlar) ile istemci arasına bozucu bir vekil (proxy) girer.
+#
+#   UDP vekili: her datagram --loss olasılıkla atılır, --reorder olasılıkla --reorder-ms geciktirilir.
+#   TCP vekili: bayt akışı --mss'lik segmentlere bölünür; kaybolan segment --tcp-recovery-ms
+#   (yeniden iletim) sonra teslim edilir ve arkasındaki tüm segmentler onu bekler (satır başı
+#   tıkanması). Çekirdeğin gerçek TCP davranışı için vekil yerine netem kullanılabilir:
+#     sudo tc qdisc add dev lo root netem loss 2% delay 5ms reorder 5%
+#     python bench_transport.py --loss 0 --reorder 0
+#
+# Kullanım:
+#   python bench_transport.py --loss 0.02 --reorder 0.05 --duration 20 --out bench_transport.json
+import argparse
+import heapq
+import json
+import random
+import socket
+import threading
+import time
+
+import numpy as np
+
+from framing import FrameReader, TcpLink, send_frame
+from pipeline import InFlightWindow, LatestQueue
+from protocol import DETECTION_DTYPE, decode_binary, encode_binary
+from udp_transport import MAX_DATAGRAM, UdpChannel, open_client_channel
+
+EMPTY = np.zeros(0, dtype=DETECTION_DTYPE)
+
+
+# ---------- BOZUCU ----------
+class Impairment:
+    """Paket/segment başına teslim anını hesaplar; None = kayıp."""
+
+    def __init__(self, loss, reorder, delay, jitter, reorder_delay, recovery, seed):
+        self.loss = loss
+        self.reorder = reorder
+        self.delay = delay
+        self.jitter = jitter
+        self.reorder_delay = reorder_delay
+        self.recovery = recovery
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _base(self, now):
+        return now + self.delay + self.rng.uniform(0, self.jitter)
+
+    def datagram(self, now):
+        with self._lock:
+            if self.rng.random() < self.loss:
+                return None
+            at = self._base(now)
+            if self.rng.random() < self.reorder:
+                at += self.reorder_delay
+            return at
+
+    def segment(self, now):
+        """TCP segmenti kaybolmaz, yeniden iletimle (her denemede süre iki katına çıkar) gecikir."""
+        with self._lock:
+            at = self._base(now)
+            if self.rng.random() < self.reorder:
+                at += self.reorder_delay
+            backoff = self.recovery
+            while self.rng.random() < self.loss:
+                at += backoff
+                backoff *= 2
+            return at
+
+
+class DelayLine:
+    """Teslim anı gelen paketleri sırayla gönderen iş parçacığı."""
+
+    def __init__(self):
+        self._heap = []
+        self._seq = 0
+        self._cond = threading.Condition()
+        self.closed = False
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def put(self, at, send, data):
+        with self._cond:
+            heapq.heappush(self._heap, (at, self._seq, send, data))
+            self._seq += 1
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self.closed and (not self._heap or self._heap[0][0] > time.monotonic()):
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._cond.wait(timeout)
+                if self.closed:
+                    return
+                _, _, send, data = heapq.heappop(self._heap)
+            try:
+                send(data)
+            except OSError:
+                pass
+
+
+def udp_proxy(server_addr, impairment):
+    """Bozucu UDP vekili; istemcinin bağlanacağı adresi döndürür."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    line = DelayLine()
+    client = [None]
+
+    def run():
+        while True:
+            data, addr = sock.recvfrom(MAX_DATAGRAM)
+            if addr != server_addr:
+                client[0] = addr
+            target = client[0] if addr == server_addr else server_addr
+            at = impairment.datagram(time.monotonic())
+            if at is not None and target is not None:
+                line.put(at, lambda d, t=target: sock.sendto(d, t), data)
+
+    threading.Thread(target=run, daemon=True).start()
+    return sock.getsockname()
+
+
+def tcp_proxy(server_addr, impairment, mss):
+    """Bozucu TCP vekili; segment sırası korunur, geciken segment arkasındakileri de geciktirir."""
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+
+    def pump(src, dst):
+        line = DelayLine()
+        last = 0.0
+        while True:
+            data = src.recv(mss)
+            if not data:
+                line.close()
+                return
+            last = max(last, impairment.segment(time.monotonic()))
+            line.put(last, dst.sendall, data)
+
+    def run():
+        while True:
+            conn, _ = listener.accept()
+            upstream = socket.create_connection(server_addr)
+            for s in (conn, upstream):
+                s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=pump, args=(conn, upstream), daemon=True).start()
+            threading.Thread(target=pump, args=(upstream, conn), daemon=True).start()
+
+    threading.Thread(target=run, daemon=True).start()
+    return listener.getsockname()
+
+
+# ---------- SAHTE SUNUCU ----------
+def worker(queue, reply, server_s):
+    """Sunucudaki gibi: yalnız en yeni kare işlenir, eskiler atılır."""
+    while True:
+        item = queue.get()
+        if item is None:
+            return
+        frame_id, t_recv = item
+        time.sleep(server_s)
+        reply(frame_id, encode_binary(frame_id, int(t_recv * 1e9), time.monotonic_ns(), EMPTY))
+
+
+def tcp_server(server_s):
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+
+    def session(conn):
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        reader = FrameReader(conn)
+        queue = LatestQueue(1)
+        threading.Thread(target=worker, args=(queue, lambda fid, p: send_frame(conn, p), server_s),
+                         daemon=True).start()
+        frame_id = 0
+        try:
+            while True:
+                reader.read_frame()
+                queue.put((frame_id, time.monotonic()))
+                frame_id += 1
+        except (ConnectionError, OSError):
+            queue.close()
+
+    def run():
+        while True:
+            conn, _ = listener.accept()
+            threading.Thread(target=session, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=run, daemon=True).start()
+    return listener.getsockname()
+
+
+def udp_server(server_s):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+    sock.bind(("127.0.0.1", 0))
+    channels = {}
+
+    def run():
+        buf = bytearray(MAX_DATAGRAM)
+        view = memoryview(buf)
+        while True:
+            n, addr = sock.recvfrom_into(buf)
+            entry = channels.get(addr)
+            if entry is None:
+                channel, queue = UdpChannel(sock, addr), LatestQueue(1)
+                entry = channels[addr] = (channel, queue)
+                threading.Thread(target=worker, args=(queue, lambda fid, p, c=channel: c.send(p, fid), server_s),
+                                 daemon=True).start()
+            message = entry[0].feed(view[:n])
+            if message is not None:
+                queue = entry[1]
+                queue.put((message[1], time.monotonic()))
+
+    threading.Thread(target=run, daemon=True).start()
+    return sock.getsockname()
+
+
+# ---------- İSTEMCİ ----------
+def run_client(link, args):
+    """Drone istemcisinin gönderim döngüsü: pencere, UDP'de yanıtsız karelerin kayıp sayılması."""
+    window = InFlightWindow(args.depth)
+    payload = np.random.default_rng(0).integers(0, 256, args.size, dtype=np.uint8)
+    latencies, replied_at = [], []
+    stop = threading.Event()
+
+    def receive():
+        try:
+            while not stop.is_set():
+                try:
+                    frame_id, _, _, _ = decode_binary(link.read_frame())
+                except socket.timeout:
+                    continue
+                rtt = window.ack(frame_id)
+                if rtt is not None:
+                    latencies.append(rtt)
+                    replied_at.append(time.monotonic())
+        except (OSError, ConnectionError, ValueError):
+            pass
+        finally:
+            window.close()
+
+    if link.lossy:
+        link.sock.settimeout(0.5)
+    receiver = threading.Thread(target=receive, daemon=True)
+    receiver.start()
+    period = 1.0 / args.fps
+    start = time.monotonic()
+    sent = 0
+    while time.monotonic() - start < args.duration:
+        t0 = time.monotonic()
+        frame_id = window.acquire(timeout=args.reply_timeout if link.lossy else None)
+        while frame_id is None and link.lossy and not window.closed:
+            window.expire(args.reply_timeout)
+            frame_id = window.acquire(timeout=args.reply_timeout)
+        if frame_id is None:
+            break
+        link.send(payload, frame_id)
+        sent += 1
+        time.sleep(max(0.0, period - (time.monotonic() - t0)))
+    elapsed = time.monotonic() - start
+    time.sleep(args.reply_timeout)
+    stop.set()
+    link.close()
+
+    ms = np.array(latencies) * 1000
+    gaps = np.diff(replied_at) * 1000 if len(replied_at) > 1 else np.zeros(0)
+    pct = lambda a, q: float(np.percentile(a, q)) if len(a) else None
+    return {
+        "gonderilen": sent,
+        "yanitlanan": len(latencies),
+        "teslim_orani": len(latencies) / sent if sent else 0.0,
+        "yanit_fps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "gecikme_ms": {"p50": pct(ms, 50), "p95": pct(ms, 95), "p99": pct(ms, 99),
+                       "maks": float(ms.max()) if len(ms) else None},
+        "en_uzun_yanit_boslugu_ms": float(gaps.max()) if len(gaps) else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kayıplı bağlantıda TCP ve UDP taşıma karşılaştırması")
+    parser.add_argument("--loss", type=float, default=0.02, help="paket/segment kayıp olasılığı")
+    parser.add_argument("--reorder", type=float, default=0.05, help="geciktirilerek sırası bozulan paket oranı")
+    parser.add_argument("--reorder-ms", type=float, default=15)
+    parser.add_argument("--delay-ms", type=float, default=3, help="tek yön gecikme")
+    parser.add_argument("--jitter-ms", type=float, default=2)
+    parser.add_argument("--tcp-recovery-ms", type=float, default=200, help="kayıp segmentin yeniden iletim süresi")
+    parser.add_argument("--mss", type=int, default=1200)
+    parser.add_argument("--size", type=int, default=40000, help="kare boyutu (bayt, ~640x320 JPEG)")
+    parser.add_argument("--fps", type=float, default=15)
+    parser.add_argument("--depth", type=int, default=2, help="PIPELINE_DEPTH")
+    parser.add_argument("--server-ms", type=float, default=20, help="sahte çıkarım süresi")
+    parser.add_argument("--reply-timeout", type=float, default=0.3, help="UDP_REPLY_TIMEOUT")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--transports", default="tcp,udp")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    def impairment():
+        return Impairment(args.loss, args.reorder, args.delay_ms / 1000, args.jitter_ms / 1000,
+                          args.reorder_ms / 1000, args.tcp_recovery_ms / 1000, args.seed)
+
+    print(f"🧪 kayıp %{args.loss * 100:.1f}, sıra bozulması %{args.reorder * 100:.1f}, "
+          f"{args.size} B x {args.fps:.0f} FPS, {args.duration:.0f} sn")
+    results = {}
+    for name in args.transports.split(","):
+        if name == "tcp":
+            proxy = tcp_proxy(tcp_server(args.server_ms / 1000), impairment(), args.mss)
+            sock = socket.create_connection(proxy)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            link = TcpLink(sock)
+        else:
+            proxy = udp_proxy(udp_server(args.server_ms / 1000), impairment())
+            link = open_client_channel(*proxy)
+        results[name] = r = run_client(link, args)
+        lat = r["gecikme_ms"]
+        print(f"  {name}: {r['yanitlanan']}/{r['gonderilen']} yanıt ({r['teslim_orani'] * 100:.1f}%), "
+              f"{r['yanit_fps']:.1f} FPS")
+        if lat["p50"] is not None:
+            print(f"       gecikme p50 {lat['p50']:.1f} ms, p95 {lat['p95']:.1f} ms, p99 {lat['p99']:.1f} ms, "
+                  f"maks {lat['maks']:.1f} ms, en uzun boşluk {r['en_uzun_yanit_boslugu_ms'] or 0:.0f} ms")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"ayarlar": vars(args), "sonuclar": results}, f, indent=2, ensure_ascii=False)
+        print(f"   sonuç: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 # control.py
+from collections import deque
 from simple_pid import PID
 import drone_control as drone
 import time
@@ -13,6 +14,10 @@ P_YAW, I_YAW, D_YAW = 0.18, 0.018, 0.0
 # ROLL (pozisyon) PID parametreleri
 P_ROLL, I_ROLL, D_ROLL = 0.135, 0.182, 0.0036
 
+# Pozisyon kazançları (piksel → m/s) ve ideal hedef alanı
+K_X, K_Y, K_Z = 0.004, 0.006, 0.0005
+AREA_REF = 3000
+
 # PID objeleri
 pidYaw = None
 pidRoll = None
@@ -21,22 +26,29 @@ pidRoll = None
 flight_altitude = 1.0
 
 # dx ve area geçmişi (filtre için)
-__dx_history = []
-__area_history = []
+__dx_history = deque()
+__area_history = deque()
+
+# Uçuş kaydedici (flight_recorder.FlightRecorder); verilirse her komut kaydedilir
+recorder = None
 
 # ---------- Ortalama Filtreler ----------
 def smooth_dx(dx, window=5):
     __dx_history.append(dx)
-    if len(__dx_history) > window:
-        __dx_history.pop(0)
+    while len(__dx_history) > window:
+        __dx_history.popleft()
     return sum(__dx_history) / len(__dx_history)
 
 def smooth_area(area, window=5):
     __area_history.append(area)
-    if len(__area_history) > window:
-        __area_history.pop(0)
+    while len(__area_history) > window:
+        __area_history.popleft()
     return sum(__area_history) / len(__area_history)
 
+def reset_filters():
+    __dx_history.clear()
+    __area_history.clear()
+
 # ---------- PID Ayarları ----------
 def configure_PID(mode="PID"):
     global pidYaw, pidRoll
@@ -56,39 +68,45 @@ def configure_PID(mode="PID"):
 def connect_drone(connection_str):
     drone.connect_drone(connection_str)
 
-def arm_and_takeoff(height):
-    drone.arm_and_takeoff(height)
+def arm_and_takeoff(height, cancel=None):
+    return drone.arm_and_takeoff(height, cancel)
 
-def land():
-    drone.land()
+def land(wait=False, cancel=None):
+    return drone.land(wait, cancel)
 
-def rtl():
-    drone.rtl()
+def rtl(wait=False, cancel=None):
+    return drone.rtl(wait, cancel)
 
 def stop_drone():
-    drone.send_ned_velocity(0, 0, 0, duration=1)
+    drone.set_velocity(0, 0, 0)
+    drone.set_yaw_rate(0)
 
 # ---------- PID ile YAW (Yön) Kontrolü ----------
-def send_yaw_control(dx):
+def send_yaw_control(dx, smooth=True):
     """
     dx: merkez ile hedef arasındaki yatay fark (piksel)
+    smooth: False ise hareketli ortalama atlanır (dx zaten filtrelenmiş/kestirilmişse)
     """
-    dx_smooth = smooth_dx(dx)
+    dx_smooth = smooth_dx(dx) if smooth else dx
     if pidYaw is not None:
         yaw_speed = pidYaw(dx_smooth)
         yaw_speed = max(min(yaw_speed, MAX_YAW), -MAX_YAW)
-        drone.yaw_relative(yaw_speed)
+        drone.set_yaw_rate(yaw_speed)
+        if recorder is not None:
+            recorder.record_yaw(dx, yaw_speed)
         print(f"🧭 PID YAW: dx={dx:.1f} (smoothed={dx_smooth:.1f}) → {yaw_speed:.2f}°/s")
 
 # ---------- Pozisyon (VX, VY, VZ) Kontrolü ----------
-def send_position_control(dx, dy, area, area_ref=3000):
+def send_position_control(dx, dy, area, area_ref=None, smooth=True):
     """
     dx, dy: hedefin merkezden sapması (piksel)
     area: hedef bounding box alanı
     area_ref: ideal alan (hedefin ideal uzaklığına göre)
+    smooth: False ise alan için hareketli ortalama atlanır
     """
     vx, vy, vz = 0, 0, 0
-    Kx, Ky, Kz = 0.004, 0.006, 0.0005
+    Kx, Ky, Kz = K_X, K_Y, K_Z
+    area_ref = AREA_REF if area_ref is None else area_ref
 
     if abs(dx) > 20:
         vy = dx * Kx  # +sağ, -sol
@@ -96,7 +114,7 @@ def send_position_control(dx, dy, area, area_ref=3000):
     if abs(dy) > 15:
         vz = -dy * Ky  # -yukarı, +aşağı (NED sistemine göre)
 
-    area_smooth = smooth_area(area)
+    area_smooth = smooth_area(area) if smooth else area
     delta_area = area_ref - area_smooth
     if abs(delta_area) > 400:
         vx = delta_area * Kz  # +ileri, -geri
@@ -107,4 +125,6 @@ def send_position_control(dx, dy, area, area_ref=3000):
     vz = max(min(vz, MAX_SPEED), -MAX_SPEED)
 
     print(f"🎯 PID Pozisyon: dx={dx}, dy={dy}, alan={area} → smooth={area_smooth:.1f} → vx={vx:.2f}, vy={vy:.2f}, vz={vz:.2f}")
-    drone.send_ned_velocity(vx, vy, vz, duration=1)
+    drone.set_velocity(vx, vy, vz)
+    if recorder is not None:
+        recorder.record_position(dx, dy, area, vx, vy, vz)
@@ -1,8 +1,34 @@
+import collections
+import collections.abc
+# dronekit 2.9.2, Python 3.10+ ile kaldırılan collections.MutableMapping'i kullanıyor
+if not hasattr(collections, "MutableMapping"):
+    collections.MutableMapping = collections.abc.MutableMapping
 from dronekit import connect, VehicleMode
+import math
+import threading
 import time
 from pymavlink import mavutil
+from vehicle_state import VehicleState
 
 vehicle = None
+state = None  # VehicleState: dinleyicilerle güncellenen durum önbelleği (vehicle_state() ile)
+setpoint_streamer = None
+_state_lock = threading.Lock()
+
+SETPOINT_RATE_HZ = 10     # hız setpoint'inin yeniden gönderilme sıklığı
+SETPOINT_TIMEOUT = 1.0    # sn; bu süre yeni komut gelmezse hız sıfırlanır
+SETPOINT_STOP_REPEATS = 5 # zaman aşımından sonra kaç kez sıfır hız gönderilip susulacağı
+
+# Uzun işlemlerin zaman aşımları (sn); beklemeler telemetri geri çağrısıyla uyanır
+PREARM_TIMEOUT = 60
+ARM_TIMEOUT = 10
+TAKEOFF_TIMEOUT = 60
+LAND_TIMEOUT = 120
+RTL_TIMEOUT = 600
+TAKEOFF_REACHED = 0.95  # hedef irtifanın bu oranına çıkınca kalkış tamam
+
+# Konum/ivme/yaw yok sayılır; hız vektörü + yaw hızı kullanılır
+VELOCITY_YAW_RATE_MASK = 0b0000010111000111
 
 def connect_drone(connection_string, waitready=True, baudrate=57600):
     global vehicle
@@ -11,49 +37,84 @@ def connect_drone(connection_string, waitready=True, baudrate=57600):
         try:
             vehicle = connect(connection_string, wait_ready=waitready, baud=baudrate)
             print("Drone bağlı")
+            vehicle_state()
+            start_setpoint_streamer()
         except Exception as e:
             print(f"Bağlantı hatası: {e}")
             raise
 
 def disconnect_drone():
-    global vehicle
+    global vehicle, state
+    stop_setpoint_streamer()
+    if state is not None:
+        state.close()
+        state = None
     if vehicle is not None:
         vehicle.close()
         print("Bağlantı kapatıldı")
 
-def arm_and_takeoff(target_altitude):
-    global vehicle
+def vehicle_state():
+    """Geçerli aracın durum önbelleği; araç değiştiyse (ör. test aracı) yeniden kurulur."""
+    global state
+    with _state_lock:
+        if vehicle is None:
+            return None
+        if state is None or state.vehicle is not vehicle:
+            if state is not None:
+                state.close()
+            state = VehicleState(vehicle)
+        return state
+
+def interrupt_waits():
+    """Süren beklemeleri uyandırır; iptal edilen iş hemen çıkar."""
+    if state is not None:
+        state.interrupt()
+
+def _wait(st, predicate, timeout, cancel, what):
+    """Koşul sağlanınca True, iptalde False; zaman aşımında TimeoutError."""
+    if st.wait_for(predicate, timeout, cancel):
+        return True
+    if cancel is not None and cancel.is_set():
+        print(f"İptal edildi: {what}")
+        return False
+    raise TimeoutError(f"{what} {timeout} sn içinde gerçekleşmedi")
+
+def arm_and_takeoff(target_altitude, cancel=None):
+    """
+    GUIDED + arm + kalkış; hedef irtifaya ulaşınca True, iptalde (cancel Event) False.
+    Her adım araç telemetrisi geldiği anda ilerler (uyku döngüsü yok).
+    """
     if vehicle is None:
         print("Hata: Drone bağlı değil!")
-        return
+        return False
+    st = vehicle_state()
 
     print("🚦 Pre-arm kontrolü yapılıyor...")
-    while not vehicle.is_armable:
-        print("Araç başlatılıyor...")
-        time.sleep(1)
+    if not _wait(st, lambda s: s.is_armable, PREARM_TIMEOUT, cancel, "Pre-arm"):
+        return False
 
     print("Arming motors")
     vehicle.mode = VehicleMode("GUIDED")
     vehicle.armed = True
-    while not vehicle.armed:
-        print("Arming bekleniyor...")
-        time.sleep(1)
+    if not _wait(st, lambda s: s.armed, ARM_TIMEOUT, cancel, "Arming"):
+        return False
 
     print(f"Kalkış! Hedef irtifa: {target_altitude:.1f} m")
     vehicle.simple_takeoff(target_altitude)
-    while True:
-        alt = vehicle.location.global_relative_frame.alt
-        print(f"✈Yükseliyor: {alt:.2f} m")
-        if alt >= target_altitude * 0.95:
-            print("Hedef irtifaya ulaşıldı!")
-            break
-        time.sleep(1)
-
-def land():
-    global vehicle
-    if vehicle is not None:
-        print("LAND moduna geçiliyor...")
-        vehicle.mode = VehicleMode("LAND")
+    if not _wait(st, lambda s: s.alt >= target_altitude * TAKEOFF_REACHED, TAKEOFF_TIMEOUT, cancel, "Kalkış"):
+        return False
+    print(f"Hedef irtifaya ulaşıldı! ({st.alt:.2f} m)")
+    return True
+
+def land(wait=False, cancel=None):
+    """LAND moduna geçer; wait=True ise motorlar disarm olana (yere inene) kadar bekler."""
+    if vehicle is None:
+        return False
+    print("LAND moduna geçiliyor...")
+    vehicle.mode = VehicleMode("LAND")
+    if not wait:
+        return True
+    return _wait(vehicle_state(), lambda s: not s.armed, LAND_TIMEOUT, cancel, "İniş")
 
 def send_ned_velocity(vx, vy, vz, duration=1):
     global vehicle
@@ -93,8 +154,143 @@ def yaw_relative(angle, speed=15):
     vehicle.send_mavlink(msg)
     print(f"YAW komutu gönderildi: {angle} derece, hız: {speed}")
 
-def rtl():
-    global vehicle
-    if vehicle is not None:
-        print("RTL moduna geçiliyor...")
-        vehicle.mode = VehicleMode("RTL")
+def rtl(wait=False, cancel=None):
+    """RTL moduna geçer; wait=True ise eve dönüp disarm olana kadar bekler."""
+    if vehicle is None:
+        return False
+    print("RTL moduna geçiliyor...")
+    vehicle.mode = VehicleMode("RTL")
+    if not wait:
+        return True
+    return _wait(vehicle_state(), lambda s: not s.armed, RTL_TIMEOUT, cancel, "RTL")
+
+# ---------- SETPOINT YAYINCISI ----------
+class SetpointStreamer:
+    """
+    Son hız/yaw hızı komutunu tutar ve ayrı bir thread'de sabit hızda yeniden gönderir.
+    set() asla beklemez; yeni komut geldiğinde ilk gönderim hemen yapılır.
+    `timeout` içinde taze komut gelmezse birkaç kez sıfır hız gönderip susar
+    (takeoff/land sırasında GUIDED hedeflerini ezmemek için).
+    """
+
+    def __init__(self, rate_hz=SETPOINT_RATE_HZ, timeout=SETPOINT_TIMEOUT):
+        self.period = 1.0 / rate_hz
+        self.timeout = timeout
+        self.sent = 0
+        self.overwritten = 0  # hiç gönderilmeden yenisiyle ezilen setpoint sayısı
+        self.timeouts = 0
+        self._setpoint = None  # (vx, vy, vz, yaw_rate)
+        self._updated_at = 0.0
+        self._pending = set()  # henüz gönderilmemiş alanlar (0..3)
+        self._stop_left = 0
+        self._running = False
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+    def set(self, vx=None, vy=None, vz=None, yaw_rate=None):
+        """Verilmeyen alanlar son değerini korur (ör. sadece yaw hızı güncellenebilir)."""
+        with self._cond:
+            old = self._setpoint or (0.0, 0.0, 0.0, 0.0)
+            new = (
+                old[0] if vx is None else vx,
+                old[1] if vy is None else vy,
+                old[2] if vz is None else vz,
+                old[3] if yaw_rate is None else yaw_rate,
+            )
+            provided = {i for i, v in enumerate((vx, vy, vz, yaw_rate)) if v is not None}
+            if provided & self._pending:
+                self.overwritten += 1
+            self._pending |= provided
+            self._setpoint = new
+            self._updated_at = time.monotonic()
+            self._stop_left = SETPOINT_STOP_REPEATS
+            self._cond.notify()
+
+    def current(self):
+        """Son setpoint (vx, vy, vz, yaw_rate derece/sn) veya None."""
+        with self._cond:
+            return self._setpoint
+
+    def stats(self):
+        return {"sent": self.sent, "overwritten": self.overwritten, "timeouts": self.timeouts}
+
+    def _run(self):
+        next_send = time.monotonic()
+        while True:
+            with self._cond:
+                while self._running and not self._pending and time.monotonic() < next_send:
+                    self._cond.wait(next_send - time.monotonic())
+                if not self._running:
+                    return
+                now = time.monotonic()
+                setpoint = self._setpoint
+                if setpoint is not None and now - self._updated_at > self.timeout:
+                    if self._stop_left == SETPOINT_STOP_REPEATS:
+                        self.timeouts += 1
+                    if self._stop_left > 0:
+                        self._stop_left -= 1
+                        setpoint = (0.0, 0.0, 0.0, 0.0)
+                    else:
+                        self._setpoint = setpoint = None
+                self._pending.clear()
+            if setpoint is not None:
+                try:
+                    _send_velocity_yaw_rate(*setpoint)
+                    self.sent += 1
+                except Exception as e:
+                    print(f"Setpoint gönderilemedi: {e}")
+            next_send = time.monotonic() + self.period
+
+def _send_velocity_yaw_rate(vx, vy, vz, yaw_rate_deg):
+    if vehicle is None:
+        return
+    msg = vehicle.message_factory.set_position_target_local_ned_encode(
+        0, 0, 0,
+        mavutil.mavlink.MAV_FRAME_BODY_NED,
+        VELOCITY_YAW_RATE_MASK,
+        0, 0, 0,    # x, y, z pozisyonu
+        vx, vy, vz, # hızlar
+        0, 0, 0,    # ivmeler
+        0, math.radians(yaw_rate_deg)  # yaw, yaw hızı (rad/s)
+    )
+    vehicle.send_mavlink(msg)
+
+def start_setpoint_streamer(rate_hz=SETPOINT_RATE_HZ, timeout=SETPOINT_TIMEOUT):
+    global setpoint_streamer
+    if setpoint_streamer is None:
+        setpoint_streamer = SetpointStreamer(rate_hz, timeout)
+        setpoint_streamer.start()
+    return setpoint_streamer
+
+def stop_setpoint_streamer():
+    global setpoint_streamer
+    if setpoint_streamer is not None:
+        setpoint_streamer.stop()
+        print(f"Setpoint istatistikleri: {setpoint_streamer.stats()}")
+        setpoint_streamer = None
+
+def set_velocity(vx, vy, vz):
+    """Bloklamayan hız komutu (m/s, gövde NED). Yayıncı yoksa tek sefer gönderir."""
+    if setpoint_streamer is not None:
+        setpoint_streamer.set(vx=vx, vy=vy, vz=vz)
+    else:
+        _send_velocity_yaw_rate(vx, vy, vz, 0)
+
+def set_yaw_rate(yaw_rate):
+    """Bloklamayan yaw hızı komutu (derece/saniye, + saat yönü)."""
+    if setpoint_streamer is not None:
+        setpoint_streamer.set(yaw_rate=yaw_rate)
+    else:
+        _send_velocity_yaw_rate(0, 0, 0, yaw_rate)
@@ -0,0 +1,244 @@
+# encode_stage.py
+# Kamera → JPEG kodlama aşaması. Gönderici ağ yanıtını beklerken küçük bir iş parçacığı
+# havuzu kameradan gelen en yeni kareyi kodlar; pencerede yer açılınca gönderici hazır
+# kareyi alır, kodlama süresi karenin gecikmesine eklenmez. cv2.imencode, simplejpeg ve
+# turbojpeg kodlama sırasında GIL'i bırakır; işçiler gerçekten paralel çalışır.
+#
+# Kodlayıcı: "auto" varsa turbojpeg (PyTurboJPEG + libturbojpeg), sonra simplejpeg, yoksa OpenCV.
+# Ön işleme (isteğe bağlı): ROI kırpma → küçültme → gri ton; ara tamponlar işçi başına yeniden kullanılır.
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+# ---------- KODLAYICILAR ----------
+def _opencv_codec():
+    def encode(image, quality):
+        ok, data = cv2.imencode(".jpg", image, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+        if not ok:
+            raise ValueError("JPEG kodlanamadı")
+        return data
+    return encode
+
+
+def _simplejpeg_codec():
+    import simplejpeg
+
+    def encode(image, quality):
+        if image.ndim == 2:
+            return simplejpeg.encode_jpeg(image[:, :, None], quality, colorspace="GRAY",
+                                          colorsubsampling="Gray", fastdct=True)
+        return simplejpeg.encode_jpeg(image, quality, colorspace="BGR", colorsubsampling="420", fastdct=True)
+    return encode
+
+
+def _turbojpeg_codec():
+    from turbojpeg import TJFLAG_FASTDCT, TJPF_BGR, TJPF_GRAY, TJSAMP_420, TJSAMP_GRAY, TurboJPEG
+    jpeg = TurboJPEG()  # libturbojpeg yoksa hata verir
+
+    def encode(image, quality):
+        if image.ndim == 2:
+            return jpeg.encode(image[:, :, None], quality, TJPF_GRAY, TJSAMP_GRAY, TJFLAG_FASTDCT)
+        return jpeg.encode(image, quality, TJPF_BGR, TJSAMP_420, TJFLAG_FASTDCT)
+    return encode
+
+
+CODECS = {"turbojpeg": _turbojpeg_codec, "simplejpeg": _simplejpeg_codec, "opencv": _opencv_codec}
+
+
+def create_codec(name="auto"):
+    """(ad, encode(image, quality) → JPEG tamponu). "auto": kurulu ilk hızlı kodlayıcı, yoksa OpenCV."""
+    if name != "auto":
+        if name not in CODECS:
+            raise ValueError(f"Bilinmeyen JPEG kodlayıcı: {name} (seçenekler: auto, {', '.join(CODECS)})")
+        return name, CODECS[name]()
+    for candidate, factory in CODECS.items():
+        try:
+            return candidate, factory()
+        except (ImportError, OSError, RuntimeError):
+            continue
+    raise RuntimeError("JPEG kodlayıcı bulunamadı")
+
+
+# ---------- AŞAMA ----------
+class EncodedFrame:
+    """Kodlanmış kare; scale/crop alıcının kutuları tam kareye çevirmesi için saklanır."""
+    __slots__ = ("seq", "timestamp", "data", "scale", "crop", "quality", "started", "finished")
+
+    def __init__(self, seq, timestamp, data, scale, crop, quality, started, finished):
+        self.seq = seq
+        self.timestamp = timestamp  # yakalama anı (time.monotonic)
+        self.data = data
+        self.scale = scale
+        self.crop = crop            # (x0, y0, x1, y1) veya None
+        self.quality = quality
+        self.started = started
+        self.finished = finished
+
+
+def _buffer(buffers, key, shape):
+    """İşçinin `key` tamponu; şekil değişmedikçe aynı dizi döner (kare başına ayırma yok)."""
+    buf = buffers.get(key)
+    if buf is None or buf.shape != shape:
+        buf = buffers[key] = np.empty(shape, dtype=np.uint8)
+    return buf
+
+
+class EncodeStage:
+    """
+    start() → resume() → get() ... → stop().
+
+    - İşçiler kameradaki en yeni kareyi sahiplenir (aynı kare iki kez kodlanmaz), kodlar ve
+      "hazır" yuvasına koyar; yuvadaki daha eski kare atılır (`superseded`).
+    - get() hazır kareyi alır ve yuvayı boşaltır; aynı kare iki kez gönderilmez.
+    - params() her karede (scale, quality) döndürür (ör. oran denetleyicisi).
+    - max_fps verilirse tüm işçiler toplamda bu hızı aşmaz (kamera hızı gönderimden çok yüksekse);
+      çağrılabilir de olabilir, her karede okunur (ör. oran denetleyicisinin güncel FPS'i).
+    - pause() iken (ör. bağlantı yok) kodlama yapılmaz, hazır kare atılır.
+    """
+
+    def __init__(self, camera, threads=2, codec="auto", params=None, roi=None, gray=False, max_fps=None):
+        self.camera = camera
+        self.threads = threads
+        self.codec = codec
+        self.params = params or (lambda: (1.0, 60))
+        self.roi = tuple(roi) if roi is not None else None
+        self.gray = gray
+        self.max_fps = max_fps
+        self.codec_name = create_codec(codec)[0]  # kurulu değilse burada hata verir
+        self.encoded = 0
+        self.superseded = 0
+        self.errors = 0
+        self.error = None
+        self.encode_seconds = 0.0
+        self.on_encoded = None  # callback(EncodedFrame), işçi iş parçacığında
+        self._claimed = 0
+        self._taken = 0
+        self._ready = None
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._active = threading.Event()
+        self._running = False
+        self._workers = []
+
+    # ---------- YAŞAM DÖNGÜSÜ ----------
+    def start(self):
+        self._running = True
+        self._workers = [threading.Thread(target=self._work, daemon=True) for _ in range(self.threads)]
+        for t in self._workers:
+            t.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        self._active.set()
+        with self._cond:
+            self._cond.notify_all()
+        for t in self._workers:
+            t.join(timeout=2)
+
+    def resume(self):
+        self._active.set()
+
+    def pause(self):
+        self._active.clear()
+        with self._cond:
+            self._ready = None
+
+    # ---------- İŞÇİ ----------
+    def _throttle(self):
+        max_fps = self.max_fps() if callable(self.max_fps) else self.max_fps
+        if not max_fps:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + 1.0 / max_fps
+        if start > now:
+            time.sleep(start - now)
+
+    def _prepare(self, image, scale, buffers):
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            image = image[y0:y1, x0:x1]  # bakış; kopya yok
+        if scale < 1.0:
+            h, w = image.shape[:2]
+            size = (max(1, round(w * scale)), max(1, round(h * scale)))
+            out = _buffer(buffers, "resized", (size[1], size[0]) + image.shape[2:])
+            image = cv2.resize(image, size, dst=out, interpolation=cv2.INTER_AREA)
+        if self.gray:
+            out = _buffer(buffers, "gray", image.shape[:2])
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=out)
+        if not image.flags.c_contiguous and self.codec_name != "opencv":
+            out = _buffer(buffers, "contiguous", image.shape)
+            np.copyto(out, image)
+            image = out
+        return image
+
+    def _work(self):
+        _, encode = create_codec(self.codec_name)  # işçi başına: turbojpeg tutamacı paylaşılamaz
+        buffers = {}
+        while self._running:
+            if not self._active.wait(0.5) or not self._running:
+                continue
+            self._throttle()
+            frame = self.camera.wait_newer(self._claimed, timeout=0.5)
+            if frame is None:
+                continue
+            with self._lock:
+                if frame.seq <= self._claimed:  # başka işçi aldı
+                    self.camera.release(frame)
+                    continue
+                self._claimed = frame.seq
+            scale, quality = self.params()
+            started = time.monotonic()
+            try:
+                data = encode(self._prepare(frame.image, scale, buffers), int(quality))
+            except Exception as e:
+                self.errors += 1
+                self.error = str(e)
+                continue
+            finally:
+                self.camera.release(frame)
+            item = EncodedFrame(frame.seq, frame.timestamp, data, scale, self.roi, int(quality),
+                                started, time.monotonic())
+            self._publish(item)
+
+    def _publish(self, item):
+        with self._cond:
+            self.encoded += 1
+            self.encode_seconds += item.finished - item.started
+            if (not self._active.is_set() or item.seq <= self._taken
+                    or (self._ready is not None and self._ready.seq > item.seq)):
+                self.superseded += 1  # duraklatıldı, ya da daha yeni kare hazır/gönderildi
+            else:
+                if self._ready is not None:
+                    self.superseded += 1
+                self._ready = item
+                self._cond.notify_all()
+        if self.on_encoded is not None:
+            self.on_encoded(item)
+
+    # ---------- TÜKETİCİ ----------
+    def get(self, timeout=None):
+        """En yeni kodlanmış kareyi alır (yuva boşalır); zaman aşımında ya da durunca None."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._ready is None:
+                if not self._running:
+                    return None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            item, self._ready = self._ready, None
+            self._taken = item.seq
+            return item
+
+    def stats(self):
+        return {"threads": self.threads, "encoded": self.encoded, "superseded": self.superseded,
+                "errors": self.errors,
+                "encode_ms_avg": round(self.encode_seconds / self.encoded * 1000, 3) if self.encoded else 0.0}
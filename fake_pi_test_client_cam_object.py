@@ -1,22 +1,38 @@
 # drone_server_v2.py (FPS hatası giderilmiş stabil sürüm)
+import os
 import socket
-import struct
 import time
 import json
 import threading
-from flask import Flask, request, jsonify, redirect
+from flask import Flask, Response, request, jsonify, redirect
 import random
 import atexit
+import glob
+import shutil
 import drone_control
 import control
 import signal
 import sys
-from datetime import datetime
 sys.path.append("/usr/lib/python3/dist-packages")
-from picamera2 import Picamera2
-from libcamera import Transform
 import cv2
 import numpy as np
+from frame_source import open_source
+from encode_stage import EncodeStage
+from pipeline import InFlightWindow
+from frame_trace import (CLIENT_SPANS, ENCODE_END, ENCODE_START, HANDLED, REPLY, SENT, FrameTrace,
+                         SpanRecorder)
+from metrics import PROMETHEUS_CONTENT_TYPE, RateMeter, Registry
+from rate_controller import RateController, send_backlog
+from framing import TcpLink
+from link_supervisor import Backoff, LinkSupervisor, enable_keepalive
+from udp_transport import open_client_channel
+from local_detector import LocalDetector
+from async_logger import AsyncLogger
+from flight_recorder import FlightRecorder
+from target_tracker import MultiTracker
+from jobs import SUCCEEDED, JobManager
+from protocol import (FORMAT_BINARY, FORMAT_JSON, ClassTable, decode_binary, decode_json, make_filter,
+                      make_heartbeat, make_hello, offset_records, parse_heartbeat, scale_records)
 
 # ---------- AYARLAR ----------
 SERVER_IP = '10.245.198.73'
@@ -25,39 +41,170 @@ PC_STREAM_IP = '10.245.198.73'
 PC_STREAM_PORT = 8080
 FPS = 7
 FRAME_DELAY = 1 / FPS
+JPEG_QUALITY = 60
+# "fixed": sabit FPS/kalite (eski davranış), "adaptive": gecikme bütçesine göre ayarla
+RATE_MODE = "fixed"
+TARGET_LATENCY = 0.15   # sn, adaptive mod gidiş-dönüş hedefi
+MIN_SCALE = 1.0         # <1.0 ise adaptive mod kareyi bu orana kadar küçültebilir
 FRAME_WIDTH = 640
 FRAME_HEIGHT = 320
+CAMERA_SOURCE = "picamera"  # "picamera", "synthetic" veya "video:<dosya>"
+VEHICLE_CONNECTION = '/dev/serial0'  # sim_vehicle.py ile: 'udpout:127.0.0.1:14550' veya 'tcp:127.0.0.1:5760'
+# Kodlama aşaması (bkz. encode_stage.py): gönderici yanıt beklerken en yeni kare önceden kodlanır
+ENCODE_THREADS = 2
+JPEG_CODEC = "auto"     # "auto", "turbojpeg", "simplejpeg" veya "opencv"
+ENCODE_GRAY = False     # gri ton JPEG: daha küçük ve hızlı; renkli eğitilmiş modelde doğruluk düşebilir
+ENCODE_ROI = None       # (x0, y0, x1, y1) kırpma; kutular tam kareye çevrilir (kırpılan alanda insan görülmez!)
+ENCODE_MAX_FPS = None   # kodlama hızı tavanı; None = gönderim hızının (rate_ctl.fps) ENCODE_RATE_FACTOR katı
+# Kamera ~30 FPS, gönderim FPS (7): her kareyi kodlamak CPU'yu boşa harcar. Tavan gönderim hızının
+# biraz üstünde tutulur ki gönderici hazır kareyi beklerken en fazla yarım periyotluk eski kare alsın.
+ENCODE_RATE_FACTOR = 2.0
+RESPONSE_FORMAT = "json"  # "binary": el sıkışma ile ikili yanıt iste (eski sunucuda JSON'a düşer)
+HANDSHAKE_TIMEOUT = 2.0
+PIPELINE_DEPTH = 1  # Yanıtı beklenmeden gönderilebilecek kare sayısı (1 = eski kilitli adım davranışı)
+# Taşıma: "tcp" (varsayılan) veya "udp" (kayba dayanıklı, kayıp paket yeni kareleri bekletmez)
+TRANSPORT = "tcp"
+UDP_PORT = 8001
+UDP_REPLY_TIMEOUT = 0.3   # sn; yanıtı gelmeyen kare kayıp sayılır, pencere açılır
+UDP_LINK_TIMEOUT = 3.0    # sn; hiç yanıt gelmezse bağlantı kopmuş sayılır
+UDP_FILTER_REFRESH = 1.0  # sn; sınıf süzgeci kaybolabileceği için düzenli yeniden gönderilir
+UDP_HELLO_RETRIES = 3
+# TCP'de yanıtı bu kadar gecikmiş kare sunucu hattının durduğunu gösterir (kalp atışı yankıları
+# bağlantıyı canlı gösterse de): bağlantı bayat sayılır ve yeniden kurulur
+TCP_REPLY_TIMEOUT = 1.0   # sn
+# Bağlantı denetimi (bkz. link_supervisor.py)
+CONNECT_TIMEOUT = 2.0      # sn
+IO_DEADLINE = 2.0          # sn; tek okuma/yazma bundan uzun sürerse bağlantı kopmuş sayılır (TCP)
+HEARTBEAT_INTERVAL = 0.2   # sn; sunucu yankılar (el sıkışmada "heartbeat": true ise)
+LINK_STALE_AFTER = 0.6     # sn; bu kadar yanıt/yankı gelmezse görüş bağlantısı bayat → sıfır hız
+KEEPALIVE_IDLE = 1         # sn; TCP keepalive yoklamaları
+KEEPALIVE_INTERVAL = 1
+KEEPALIVE_COUNT = 3
+RECONNECT_MIN = 0.05       # sn; titreşimli üstel geri çekilmenin başlangıcı
+RECONNECT_MAX = 5.0
+# Sunucudan yalnız hedef etiketi + "person" tespitlerini iste (el sıkışma gerektirir)
+SERVER_CLASS_FILTER = True
+SAFETY_CLASSES = ("person",)
+# PC bağlantısı yokken drone üzerinde küçük modelle yedek tespit (ayrı süreç)
+LOCAL_FALLBACK = True
+LOCAL_BACKEND = "onnx"
+LOCAL_MODEL = "yolov8n.pt"
+LOCAL_IMGSZ = 320
+LOCAL_INT8 = False
+LOCAL_WIDTH = 320  # yerel modele verilen kare genişliği (oran korunur)
+# Yerel süreç takılır/çökerse geri çekilmeyle yeniden başlatılır; art arda bu kadar başarısızlıkta vazgeçilir
+LOCAL_MAX_FAILURES = 5
+LOCAL_RESTART_MIN = 0.5  # sn
+LOCAL_RESTART_MAX = 10.0
+# Log: arka planda toplu yazılır; kare başına mesajlar anahtar başına LOG_DEBUG_INTERVAL sn'de bir
+LOG_FILE = "drone_server.log"
+LOG_FORMAT = "text"  # "text" veya "json" (JSON satırları)
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_ROTATE_INTERVAL = None  # sn; None = yalnız boyuta göre döndür
+LOG_BACKUPS = 3
+LOG_FLUSH_INTERVAL = 0.5
+LOG_DEBUG_INTERVAL = 1.0
+# Hedef takibi: Kalman izleri + kilit; komutlar hedefin eylem anındaki kestirimiyle verilir
+TRACK_COAST_TIME = 0.5  # sn; son güncellemeden bu kadar sonrasına kadar kestirimle kontrol
+CONTROL_RATE_HZ = 20    # tespitler arası kestirimli kontrol döngüsü
+# Uçuş kaydedici: kareler + tespitler + control çıktıları, mmap halka dosyada (replay.py ile oynatılır)
+# Her açılış yeni bir RECORDER_SIZE_MB dosyası oluşturur: SD kartı doldurmamak için varsayılan kapalı,
+# açıkken en yeni RECORDINGS_KEEP kayıt tutulur ve yeterli boş alan yoksa kayıt başlatılmaz.
+RECORD_FLIGHT = False
+RECORDER_DIR = "recordings"
+RECORDER_SIZE_MB = 256
+RECORDINGS_KEEP = 3
+RECORDER_MIN_FREE_MB = 512  # kayıt dosyası ayrıldıktan sonra diskte kalması gereken boş alan
+# Kalkış/iniş/RTL arka plan işleri: /jobs/<id>?wait=sn en fazla bu kadar bekletir
+JOB_WAIT_MAX = 30.0
 
 # ---------- GLOBAL DEĞİŞKENLER ----------
-latest_frame = None
 hedef_etiketi = None
 drone_state = "land"
 emergency_flag = False
 current_altitude = 1.0
-picam2 = None
-lock = threading.Lock()
+camera = None
 system_ready = False
+last_target_time = time.time()
+handshake_unsupported = False
+current_window = None
+sent_scale = [1.0] * 256  # frame_id % 256 → gönderilen ölçek
+sent_capture = [0.0] * 256  # frame_id % 256 → karenin yakalama anı (time.monotonic)
+sent_crop = [None] * 256  # frame_id % 256 → ENCODE_ROI kırpması (veya None)
+encoder = None
+tracker = MultiTracker()
+detection_mode = "server"   # "server" veya "local" (yedek tespit)
+local_mode = threading.Event()
+recorder = None
+jobs = JobManager(on_cancel=drone_control.interrupt_waits)
+
+# ---------- METRİKLER ----------
+# Kare başına aşama zamanları (frame_id ile), histogramlar ve /metrics
+trace = FrameTrace()
+metrics_registry = Registry("drone_")
+trace.add_listener(SpanRecorder(metrics_registry, "stage_seconds",
+                                "Kare aşama süreleri (yakalama → control.*)", CLIENT_SPANS))
+m_server_seconds = metrics_registry.histogram("server_seconds", "Sunucu içi süre (ikili yanıt başlığından)")
+m_network_seconds = metrics_registry.histogram("network_seconds", "Gidiş-dönüş eksi sunucu içi süre")
+m_frames_sent = metrics_registry.counter("frames_sent_total", "Sunucuya gönderilen kare")
+m_replies = metrics_registry.counter("replies_total", "Alınan sunucu yanıtı")
+m_dropped = metrics_registry.counter("frames_dropped_total", "Sunucunun eski diye yanıtlamadığı kare")
+m_lost = metrics_registry.counter("frames_lost_total", "Yanıtı UDP_REPLY_TIMEOUT içinde gelmeyen kare (UDP)")
+m_reply_timeouts = metrics_registry.counter("reply_timeouts_total",
+                                            "Yanıtı TCP_REPLY_TIMEOUT içinde gelmediği için kopan bağlantı (TCP)")
+m_camera_skipped = metrics_registry.counter("camera_frames_skipped_total", "Gönderilmeden atlanan kamera karesi")
+m_encode_seconds = metrics_registry.histogram("encode_seconds", "Kare başına ön işleme + JPEG kodlama süresi")
+send_rate = RateMeter()
+metrics_registry.gauge("send_fps", "Sunucuya gönderim hızı (kare/sn)", fn=lambda: send_rate.value())
+metrics_registry.gauge("encoder", "Kodlama aşaması sayaçları", label="kind",
+                       fn=lambda: encoder.stats() if encoder is not None else None)
+m_reconnect_seconds = metrics_registry.histogram("reconnect_seconds", "Bağlantı kopması → yeniden bağlanma süresi",
+                                                 bounds=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+m_heartbeat_rtt = metrics_registry.histogram("heartbeat_rtt_seconds", "Kalp atışı gidiş-dönüş süresi")
+m_connect_failures = metrics_registry.counter("connect_failures_total", "Başarısız bağlantı denemesi")
+reply_rate = RateMeter()
+rate_ctl = RateController(RATE_MODE, FPS, JPEG_QUALITY, target_latency=TARGET_LATENCY,
+                          min_scale=MIN_SCALE, log=lambda msg, level: log(msg, level))
+metrics_registry.gauge("rate_controller", "Oran denetleyicisinin güncel kararları", label="param",
+                       fn=lambda: rate_ctl.state())
+m_mode_switches = metrics_registry.counter("detection_mode_switches_total", "Sunucu/yerel tespit geçişleri")
+m_local_seconds = metrics_registry.histogram("local_inference_seconds", "Yerel yedek tespit süresi")
+m_local_failures = {reason: metrics_registry.counter("local_detector_failures_total",
+                                                     "Yerel yedek tespit süreci hatası (yükleme / yanıt yok)",
+                                                     labels={"reason": reason})
+                    for reason in ("load", "stall")}
+local_rate = RateMeter()
+metrics_registry.gauge("detection_mode", "Etkin tespit modu (1 = etkin)", label="mode",
+                       fn=lambda: {m: int(detection_mode == m) for m in ("server", "local")})
+metrics_registry.gauge("local_fps", "Yerel yedek tespit hızı (kare/sn)", fn=lambda: local_rate.value())
+metrics_registry.gauge("fps", "Yanıt hızı (kare/sn)", fn=lambda: reply_rate.value())
+metrics_registry.gauge("frames_in_flight", "Yanıtı beklenen kare sayısı",
+                       fn=lambda: current_window.in_flight() if current_window else 0)
+metrics_registry.gauge("setpoints", "Setpoint yayıncısı sayaçları", label="kind",
+                       fn=lambda: drone_control.setpoint_streamer.stats() if drone_control.setpoint_streamer else None)
 
 # ---------- LOG ----------
-def log_to_file(msg):
-    with open("drone_server.log", "a") as f:
-        f.write(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {msg}\n")
-
-def log(msg, level="info"):
-    renk = {
-        "info": "\033[94m[INFO] ", "warning": "\033[93m[WARN] ",
-        "danger": "\033[91m[ERROR] ", "success": "\033[92m[SUCCESS] ",
-        "end": "\033[0m"
-    }
-    formatted = f"{renk.get(level, '')}{msg}{renk['end']}"
-    print(formatted)
-    log_to_file(f"[{level.upper()}] {msg}")
+logger = AsyncLogger(LOG_FILE, LOG_FORMAT, max_bytes=LOG_MAX_BYTES, rotate_interval=LOG_ROTATE_INTERVAL,
+                     backups=LOG_BACKUPS, flush_interval=LOG_FLUSH_INTERVAL, rate_interval=LOG_DEBUG_INTERVAL)
+metrics_registry.gauge("log_records", "Log kayıtları", label="kind",
+                       fn=lambda: {"written": logger.written, "dropped": logger.dropped,
+                                   "suppressed": logger.suppressed})
+
+def log(msg, level="info", key=None, flush=False, **fields):
+    """
+    Kuyruğa yazar, diske/ekrana arka plan iş parçacığı yazar (çağıran beklemez).
+    key: kare başına mesajlar için hız sınırı anahtarı; "danger" hemen diske yazılır.
+    """
+    logger.log(msg, level, key, flush, **fields)
 
 # ---------- ACİL DURUM ----------
 def land_drone():
     global current_altitude
     try:
         log("🛬 Drone iniş yapıyor...", "danger")
+        running = jobs.current()
+        if running is not None:
+            jobs.cancel(running.id)  # süren kalkış LAND modunu ezmesin
         control.land()
         current_altitude = 0.0
     except Exception as e:
@@ -66,111 +213,440 @@ def land_drone():
 def handle_exit(signum=None, frame=None):
     log("🛑 Program sonlandırılıyor, iniş yapılıyor...", "warning")
     land_drone()
-    if picam2: picam2.stop()
+    if camera: camera.stop()
     sys.exit(0)
 
 signal.signal(signal.SIGINT, handle_exit)
 signal.signal(signal.SIGTERM, handle_exit)
 atexit.register(land_drone)
 
-# ---------- KAMERA THREAD ----------
-def update_camera():
-    global latest_frame
-    prev_frame = None
+# ---------- KOMUT İŞLEME ----------
+def handle_detections(records, table, captured_at=None):
+    """
+    records: protocol.DETECTION_DTYPE dizisi; etiketler sınıf id'si ile karşılaştırılır.
+    captured_at: karenin yakalama anı (time.monotonic); izler bu ana göre güncellenir.
+    """
+    global drone_state, emergency_flag, last_target_time
+    person_id = table.id_of("person")
+    target_id = table.id_of(hedef_etiketi) if hedef_etiketi else None
+    hedef_bulundu = False
+    captured_at = time.monotonic() if captured_at is None else captured_at
+
+    if len(records) and np.any(records["cls"] == person_id):
+        log("‼️ İnsan tespit edildi - drone durdu", "danger")
+        emergency_flag = True
+        drone_state = "emergency"
+
+    tracker.update(records, captured_at)
+    track_id = tracker.lock(target_id, exclude=person_id)
+    if (track_id is not None and tracker.updated_at(track_id) == captured_at and not emergency_flag
+            and drone_state != "takeoff"):  # kalkış sürerken GUIDED hedefi ezilmez
+        hedef_bulundu = True
+        last_target_time = time.time()
+        act_on_target(track_id)
+        drone_state = "track"
+
+    if not hedef_bulundu and (time.time() - last_target_time) > 30:
+        log("⏳ 30 sn hedef yok - iniş", "warning", flush=True)
+        land_drone()
+        drone_state = "land"
+        last_target_time = time.time()
+
+def act_on_target(track_id):
+    """Kilitli hedefin şu anki kestirimiyle control.* çağrılır (hareketli ortalama yok)."""
+    predicted = tracker.predict(track_id, time.monotonic())
+    if predicted is None:
+        return
+    dx, dy, alan = (int(round(v)) for v in predicted)
+    control.send_yaw_control(dx, smooth=False)
+    control.send_position_control(dx, dy, alan, smooth=False)
+
+def predictive_control_loop():
+    """Tespitler arasında kilitli hedefin kestirimiyle CONTROL_RATE_HZ hızında kontrol."""
+    period = 1.0 / CONTROL_RATE_HZ
     while True:
-        try:
-            frame = picam2.capture_array()
-            if frame is None or (prev_frame is not None and np.array_equal(frame, prev_frame)):
-                continue
-            prev_frame = frame.copy()
-            with lock:
-                latest_frame = frame.copy()
-            time.sleep(0.01)
-        except Exception as e:
-            log(f"Kamera yakalama hatası: {e}", "danger")
-            time.sleep(1)
+        time.sleep(period)
+        track_id = tracker.locked
+        if track_id is None or emergency_flag or drone_state != "track":
+            continue
+        if supervisor.stale and detection_mode == "server":
+            continue  # bayat bağlantıda eski tespitle komut verilmez
+        updated_at = tracker.updated_at(track_id)
+        if updated_at is None or time.monotonic() - updated_at > TRACK_COAST_TIME:
+            continue
+        act_on_target(track_id)
+
+def check_emergency():
+    if emergency_flag or drone_state == "emergency":
+        control.stop_drone()
+
+# ---------- BAĞLANTI DENETİMİ ----------
+def link_stale(silence):
+    """Görüş bağlantısı bayat: drone son hız komutuyla uçmaya devam etmesin."""
+    log(f"📵 Görüş bağlantısı bayat ({silence * 1000:.0f} ms yanıt yok)", "danger")
+    # Karar aracın gerçek durumundan ve çalışan işten: drone_state /reset ya da başarısız iş
+    # sonrası yanlış olabilir. Otopilot iniş/eve dönüş yürütüyorsa veya kalkış işi sürüyorsa
+    # (GUIDED kalkış hedefini sıfır hız ezer) hız komutuyla araya girilmez.
+    st = drone_control.vehicle_state()
+    if st is not None and st.armed and st.mode in ("LAND", "RTL"):
+        log(f"🛬 Araç {st.mode} modunda, hız komutu gönderilmedi", "info")
+        return
+    running = jobs.current()
+    if running is not None and running.kind == "takeoff":
+        log("🛫 Kalkış sürüyor, hız komutu gönderilmedi", "info")
+        return
+    control.stop_drone()
+    log("🛑 Sıfır hız komutu verildi", "warning")
+
+def link_fresh(outage):
+    log(f"📶 Görüş bağlantısı geri geldi ({outage:.2f} sn kesinti)", "success")
+
+supervisor = LinkSupervisor(LINK_STALE_AFTER, on_stale=link_stale, on_fresh=link_fresh)
+metrics_registry.gauge("link", "Görüş bağlantısı durumu ve sayaçları (kesinti, yeniden bağlanma...)",
+                       label="kind", fn=lambda: supervisor.stats())
 
 # ---------- PC'ye GÖNDER ----------
-def send_to_pc():
-    global latest_frame, hedef_etiketi, drone_state, emergency_flag
-    last_target_time = time.time()
+def wanted_classes():
+    """Sunucudan istenecek sınıflar: hedef yoksa tümü (None), varsa hedef + güvenlik sınıfları."""
+    if not hedef_etiketi:
+        return None
+    return [hedef_etiketi] + [c for c in SAFETY_CLASSES if c != hedef_etiketi]
+
+def send_frames(link, window, class_filter=False):
+    """
+    Kareleri kodlayıp gönderir; pencerede PIPELINE_DEPTH kadar yanıtsız kare olabilir.
+    class_filter: sunucu süzgeci destekliyorsa hedef değiştikçe sınıf listesi gönderilir.
+    UDP'de yanıtı gelmeyen kareler UDP_REPLY_TIMEOUT sonra kayıp sayılır; TCP'de yanıtı
+    TCP_REPLY_TIMEOUT içinde gelmeyen kare ConnectionError ile bağlantıyı yeniletir.
+    """
+    last_seq = 0
+    sent_classes = False  # henüz gönderilmedi (None "tümü" demek)
+    filter_sent_at = 0.0
     while True:
-        try:
-            log("🔁 PC'ye bağlanılıyor...", "warning")
-            client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            client_socket.connect((SERVER_IP, SERVER_PORT))
-            log("🟢 Kamera client PC'ye bağlı", "success")
-
-            while True:
-                start_time = time.time()
-                with lock:
-                    frame = latest_frame.copy() if latest_frame is not None else None
-                if frame is None:
+        start_time = time.time()
+        if class_filter:
+            classes = wanted_classes()
+            if classes != sent_classes or (link.lossy and start_time - filter_sent_at >= UDP_FILTER_REFRESH):
+                link.send(make_filter(classes))
+                sent_classes = classes
+                filter_sent_at = start_time
+        rate_ctl.observe_backlog(send_backlog(link.sock))
+        frame_id = window.acquire(timeout=UDP_REPLY_TIMEOUT if link.lossy else TCP_REPLY_TIMEOUT)
+        while frame_id is None and link.lossy and not window.closed:
+            m_lost.inc(window.expire(UDP_REPLY_TIMEOUT))
+            frame_id = window.acquire(timeout=UDP_REPLY_TIMEOUT)
+        if not link.lossy and not window.closed and window.oldest_age() > TCP_REPLY_TIMEOUT:
+            m_reply_timeouts.inc()
+            raise ConnectionError(f"{TCP_REPLY_TIMEOUT:.1f} sn boyunca tespit yanıtı gelmedi")
+        if frame_id is None:
+            if window.closed:
+                return
+            continue
+
+        # Kodlama aşamasından hazır en yeni kare (son gönderilenden yeni; kodlama çoktan bitti)
+        item = None
+        while item is None:
+            if window.closed:
+                return
+            item = encoder.get(timeout=1.0)
+        if last_seq:
+            m_camera_skipped.inc(item.seq - last_seq - 1)
+        last_seq = item.seq
+        trace.begin(frame_id, item.timestamp)
+        trace.mark(frame_id, ENCODE_START, item.started)
+        trace.mark(frame_id, ENCODE_END, item.finished)
+        slot = frame_id % len(sent_scale)
+        sent_scale[slot], sent_crop[slot], sent_capture[slot] = item.scale, item.crop, item.timestamp
+        if recorder is not None:
+            recorder.record_frame(frame_id, item.data, item.timestamp)
+        link.send(item.data, frame_id)
+        trace.mark(frame_id, SENT, time.monotonic())
+        m_frames_sent.inc()
+        send_rate.tick()
+
+        time.sleep(max(0, rate_ctl.frame_delay - (time.time() - start_time)))
+
+def to_frame_coords(frame_id, records):
+    """Küçültülerek ve/veya kırpılarak gönderilen karenin tespitlerini tam kare piksellerine çevirir."""
+    slot = frame_id % len(sent_scale)
+    scale, crop = sent_scale[slot], sent_crop[slot]
+    if scale != 1.0:
+        records = scale_records(records, 1.0 / scale)
+    if crop is not None:
+        x0, y0, x1, y1 = crop
+        records = offset_records(records, x0, y0, (x0 + x1) // 2 - FRAME_WIDTH // 2,
+                                 (y0 + y1) // 2 - FRAME_HEIGHT // 2)
+    return records
+
+def negotiate(link):
+    """
+    İkili yanıt, sınıf süzgeci veya kalp atışı istenirse el sıkışır; (biçim, sınıf tablosu,
+    süzgeç destekleniyor mu, kalp atışı destekleniyor mu) döndürür.
+    UDP'de el sıkışma ya da yanıtı kaybolabileceği için UDP_HELLO_RETRIES kez denenir.
+    """
+    global handshake_unsupported
+    if (RESPONSE_FORMAT == FORMAT_JSON and not SERVER_CLASS_FILTER and not HEARTBEAT_INTERVAL) or handshake_unsupported:
+        return FORMAT_JSON, ClassTable(), False, False
+
+    hello = make_hello(dict.fromkeys((RESPONSE_FORMAT, FORMAT_JSON)))
+    attempts = UDP_HELLO_RETRIES if link.lossy else 1
+    link.sock.settimeout(HANDSHAKE_TIMEOUT / attempts)
+    try:
+        for attempt in range(attempts):
+            link.send(hello)
+            try:
+                reply = json.loads(str(link.read_frame(), 'utf-8'))
+                break
+            except socket.timeout:
+                if attempt + 1 < attempts:
                     continue
+                if link.lossy:
+                    # UDP'de sessizlik eski sunucu değil, sunucunun kapalı olduğu anlamına gelir
+                    raise ConnectionError("UDP el sıkışma zaman aşımı")
+                # Eski sunucu el sıkışmayı tanımıyor: bundan sonra JSON ile devam
+                log("⚠️ Sunucu el sıkışmayı desteklemiyor, JSON kullanılacak", "warning")
+                handshake_unsupported = True
+                raise ConnectionError("El sıkışma zaman aşımı")
+    finally:
+        link.sock.settimeout(None if link.lossy else IO_DEADLINE)
+    if reply.get("status") != "hello":
+        handshake_unsupported = True
+        raise ConnectionError(f"Beklenmeyen el sıkışma yanıtı: {reply}")
+    fmt = reply.get("format", FORMAT_JSON)
+    table = ClassTable(reply.get("classes", []))
+    class_filter = SERVER_CLASS_FILTER and reply.get("filter", False)
+    heartbeat = bool(HEARTBEAT_INTERVAL) and reply.get("heartbeat", False)
+    log(f"🤝 Yanıt biçimi: {fmt} ({len(table.names)} sınıf, süzgeç {'açık' if class_filter else 'kapalı'}, "
+        f"kalp atışı {'açık' if heartbeat else 'kapalı'})", "success")
+    return fmt, table, class_filter, heartbeat
+
+def send_heartbeats(link, window):
+    """Kare akışından bağımsız kalp atışı; sunucu yankılar, iki uç da sessiz bağlantıyı fark eder."""
+    while not window.closed:
+        try:
+            link.send(make_heartbeat(time.monotonic_ns()))
+        except OSError:
+            return  # hata okuma/gönderme döngüsünde ele alınır
+        time.sleep(HEARTBEAT_INTERVAL)
+
+def receive_commands(link, window, fmt, table, heartbeat=False):
+    """
+    Sunucu yanıtlarını okur; her yanıt ait olduğu frame_id ile pencereyi onaylar.
+    Her okuma süre sınırlıdır (TCP: IO_DEADLINE, UDP: UDP_LINK_TIMEOUT); kalp atışı yoksa ve
+    yanıt beklenen kare de yoksa TCP'de sessizlik bağlantı kopması sayılmaz.
+    """
+    try:
+        if link.lossy:
+            link.sock.settimeout(UDP_LINK_TIMEOUT)
+        while True:
+            try:
+                payload = link.read_frame()
+            except socket.timeout:
+                if heartbeat or link.lossy or window.in_flight():
+                    raise ConnectionError(f"{link.sock.gettimeout():.1f} sn boyunca sunucudan veri gelmedi")
+                continue
+            replied_at = time.monotonic()
+            supervisor.alive()
+            sent_ns = parse_heartbeat(payload)
+            if sent_ns is not None:
+                m_heartbeat_rtt.observe((time.monotonic_ns() - sent_ns) / 1e9)
+                continue
 
-                _, img_encoded = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), 60])
-                data = img_encoded.tobytes()
-                client_socket.sendall(struct.pack(">L", len(data)) + data)
-
-                cmd_len_bytes = client_socket.recv(4)
-                if not cmd_len_bytes:
-                    break
-                cmd_len = struct.unpack(">L", cmd_len_bytes)[0]
-                command_json = client_socket.recv(cmd_len).decode('utf-8')
-
+            skipped = window.skipped
+            if fmt == FORMAT_BINARY:
+                frame_id, recv_ns, send_ns, records = decode_binary(payload)
+                rtt = window.ack(frame_id)
+                trace.mark(frame_id, REPLY, replied_at)
+                # Sunucu içi süre başlıkta: gidiş-dönüşün geri kalanı ağ
+                server_s = (send_ns - recv_ns) / 1e9
+                m_server_seconds.observe(server_s)
+                if rtt is not None:
+                    m_network_seconds.observe(max(0.0, rtt - server_s))
+                rate_ctl.observe_reply(rtt, server_s)
+                set_detection_mode("server", "sunucu yanıt veriyor")
+                records = to_frame_coords(frame_id, records)
+                log(f"📥 Kare {frame_id}: {len(records)} tespit", "debug", key="reply",
+                    frame_id=frame_id, detections=len(records))
+                if recorder is not None:
+                    recorder.record_detections(frame_id, records)
+                handle_detections(records, table, sent_capture[frame_id % len(sent_capture)])
+            else:
                 try:
-                    command = json.loads(command_json)
-                    log(f"📥 Gelen komut JSON: {command}", "info")
-                    if command.get("status") == "hedefler":
-                        hedefler = command.get("hedefler", [])
-                        hedef_bulundu = False
-
-                        for hedef in hedefler:
-                            etiket = hedef.get("etiket")
-                            dx = hedef.get("dx")
-                            dy = hedef.get("dy")
-                            alan = hedef.get("alan")
-
-                            if etiket == "person":
-                                log("‼️ İnsan tespit edildi - drone durdu", "danger")
-                                emergency_flag = True
-                                drone_state = "emergency"
-                                break
-
-                            if emergency_flag:
-                                continue
-
-                            if hedef_etiketi and etiket != hedef_etiketi:
-                                continue
-
-                            hedef_bulundu = True
-                            last_target_time = time.time()
-
-                            control.send_yaw_control(dx)
-                            control.send_position_control(dx, dy, alan)
-                            drone_state = "track"
-                            break
-
-                        if not hedef_bulundu and (time.time() - last_target_time) > 30:
-                            log("⏳ 30 sn hedef yok - iniş", "warning")
-                            land_drone()
-                            drone_state = "land"
-                            last_target_time = time.time()
-
-                except json.JSONDecodeError:
+                    command, records = decode_json(payload, table)
+                except (json.JSONDecodeError, UnicodeDecodeError):
                     log("⚠️ Komut JSON hatası!", "danger")
+                    window.ack()
+                    continue
+                rate_ctl.observe_reply(window.ack(command.get("frame_id")))
+                set_detection_mode("server", "sunucu yanıt veriyor")
+                frame_id = window.acked  # frame_id göndermeyen eski sunucuda sıradaki kare
+                records = to_frame_coords(frame_id, records)
+                trace.mark(frame_id, REPLY, replied_at)
+                log(f"📥 Gelen komut JSON: {command}", "debug", key="reply", frame_id=frame_id)
+                if recorder is not None:
+                    recorder.record_detections(frame_id, records)
+                if command.get("status") == "hedefler":
+                    handle_detections(records, table, sent_capture[frame_id % len(sent_capture)])
+
+            check_emergency()
+            trace.mark(frame_id, HANDLED, time.monotonic())
+            trace.complete(frame_id)
+            m_replies.inc()
+            m_dropped.inc(window.skipped - skipped)
+            reply_rate.tick()
+    except Exception as e:
+        log(f"❌ Yanıt okuma hatası: {e}", "danger")
+    finally:
+        window.close()
+
+def connect_link():
+    """Bağlantı kurma süresi sınırlı; TCP'de keepalive açık ve her okuma/yazma IO_DEADLINE ile sınırlı."""
+    if TRANSPORT == "udp":
+        return open_client_channel(SERVER_IP, UDP_PORT)
+    sock = socket.create_connection((SERVER_IP, SERVER_PORT), timeout=CONNECT_TIMEOUT)
+    enable_keepalive(sock, KEEPALIVE_IDLE, KEEPALIVE_INTERVAL, KEEPALIVE_COUNT, user_timeout=IO_DEADLINE)
+    sock.settimeout(IO_DEADLINE)
+    return TcpLink(sock, initial_size=4096)
+
+def start_encoder():
+    global encoder
+    encoder = EncodeStage(camera, ENCODE_THREADS, JPEG_CODEC, params=lambda: (rate_ctl.scale, rate_ctl.quality),
+                          roi=ENCODE_ROI, gray=ENCODE_GRAY,
+                          max_fps=ENCODE_MAX_FPS or (lambda: ENCODE_RATE_FACTOR * rate_ctl.fps))
+    encoder.on_encoded = lambda item: m_encode_seconds.observe(item.finished - item.started)
+    encoder.start()
+    log(f"🗜️ Kodlama aşaması: {encoder.codec_name}, {ENCODE_THREADS} iş parçacığı", "success")
+    return encoder
 
-                if emergency_flag or drone_state == "emergency":
-                    control.stop_drone()
-
-                time.sleep(max(0, FRAME_DELAY - (time.time() - start_time)))
+def send_to_pc():
+    global current_window
+    if encoder is None:
+        start_encoder()
+    backoff = Backoff(RECONNECT_MIN, RECONNECT_MAX)
+    while True:
+        window = current_window = InFlightWindow(PIPELINE_DEPTH)
+        link = None
+        connected = False
+        try:
+            log(f"🔁 PC'ye bağlanılıyor ({TRANSPORT})...", "warning", key="connect")
+            link = connect_link()
+            fmt, table, class_filter, heartbeat = negotiate(link)
+            connected = True
+            encoder.resume()
+            backoff.reset()
+            reconnect = supervisor.connected()
+            if reconnect is None:
+                log("🟢 Kamera client PC'ye bağlı", "success")
+            else:
+                m_reconnect_seconds.observe(reconnect)
+                log(f"🟢 Kamera client PC'ye yeniden bağlandı ({reconnect * 1000:.0f} ms)", "success")
+            receiver = threading.Thread(target=receive_commands, args=(link, window, fmt, table, heartbeat),
+                                        daemon=True)
+            receiver.start()
+            if heartbeat:
+                threading.Thread(target=send_heartbeats, args=(link, window), daemon=True).start()
+            send_frames(link, window, class_filter)
+            receiver.join()
 
         except Exception as e:
-            log(f"❌ Bağlantı hatası: {e}", "danger")
-            try: client_socket.close()
-            except: pass
-            log("5 saniye sonra yeniden deneniyor...", "warning")
-            time.sleep(5)
+            if not connected:
+                m_connect_failures.inc()
+            log(f"❌ Bağlantı hatası: {e}", "danger", key="connect_error")
+        finally:
+            encoder.pause()  # bağlantı yokken kodlama CPU'su yerel tespite kalsın
+            window.close()
+            if link is not None:
+                link.close()
+            supervisor.disconnected()
+        if LOCAL_FALLBACK:
+            set_detection_mode("local", "PC bağlantısı yok")
+        delay = backoff.next()
+        log(f"{delay * 1000:.0f} ms sonra yeniden deneniyor (deneme {backoff.attempts})...", "warning",
+            key="reconnect")
+        time.sleep(delay)
+
+# ---------- YEREL YEDEK TESPİT ----------
+def set_detection_mode(mode, reason):
+    global detection_mode
+    if mode == detection_mode:
+        return
+    detection_mode = mode
+    if mode == "local":
+        local_mode.set()
+    else:
+        local_mode.clear()
+    m_mode_switches.inc()
+    log(f"🔀 Tespit modu: {mode} ({reason})", "warning")
+
+def local_detection_loop():
+    """
+    Yerel modda kameradan en yeni kareyi küçültüp yerel modele verir; sonuçlar aynı hedef/acil durum mantığına gider.
+    Süreç yüklenemez veya yanıt vermezse geri çekilmeyle yeniden başlatılır; LOCAL_MAX_FAILURES kez
+    üst üste başarısız olursa yedek tespit kapatılır.
+    """
+    scale = LOCAL_WIDTH / FRAME_WIDTH
+    backoff = Backoff(LOCAL_RESTART_MIN, LOCAL_RESTART_MAX)
+    detector = None
+    table = None
+
+    def failed(reason, message):
+        """Hatayı sayar; vazgeçilecekse True, yoksa geri çekilme kadar bekleyip False."""
+        m_local_failures[reason].inc()
+        if backoff.attempts + 1 >= LOCAL_MAX_FAILURES:
+            log(f"⛔ {message}; {LOCAL_MAX_FAILURES} kez üst üste başarısız, yedek tespit kapatıldı", "danger")
+            return True
+        delay = backoff.next()
+        log(f"⚠️ {message}; {delay:.1f} sn sonra yeniden başlatılıyor "
+            f"({backoff.attempts}/{LOCAL_MAX_FAILURES})", "warning")
+        time.sleep(delay)
+        return False
+
+    last_seq = 0
+    last_report = time.monotonic()
+    while True:
+        if detector is None:
+            detector = LocalDetector(LOCAL_BACKEND, LOCAL_MODEL, LOCAL_IMGSZ, LOCAL_INT8,
+                                     frame_shape=(int(FRAME_HEIGHT * scale), LOCAL_WIDTH, 3)).start()
+            if not detector.wait_ready():
+                detector.stop()
+                error, detector = detector.error, None
+                if failed("load", f"Yerel yedek tespit başlatılamadı: {error}"):
+                    return
+                continue
+            table = ClassTable(detector.names)
+            log(f"🧠 Yerel yedek model hazır: {LOCAL_MODEL} ({LOCAL_BACKEND}{'-int8' if LOCAL_INT8 else ''}, {LOCAL_IMGSZ}px)", "success")
+        local_mode.wait()
+        if time.monotonic() - last_report >= 10:
+            log(f"🧠 Yerel tespit: {local_rate.value():.1f} FPS", "info")
+            last_report = time.monotonic()
+        frame = camera.wait_newer(last_seq, timeout=1.0)
+        if frame is None:
+            continue
+        last_seq = frame.seq
+        captured_at = frame.timestamp
+        try:
+            small = cv2.resize(frame.image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        finally:
+            camera.release(frame)
+        started = time.monotonic()
+        records = detector.detect(small, wanted_classes())
+        if records is None:
+            # Geç gelen yanıt boru hattını kaydırır: süreç her durumda yenilenir
+            detector.stop()
+            detector = None
+            if failed("stall", "Yerel tespit süreci yanıt vermiyor"):
+                return
+            continue
+        backoff.reset()
+        m_local_seconds.observe(time.monotonic() - started)
+        local_rate.tick()
+        if not local_mode.is_set():
+            continue  # bu arada sunucu geri geldi
+        records = scale_records(records, 1.0 / scale)
+        if recorder is not None:
+            recorder.record_detections(-1, records)  # yerel tespitin frame_id'si yok
+        handle_detections(records, table, captured_at)
+        check_emergency()
 
 # ---------- FLASK ----------
 app = Flask(__name__)
@@ -183,9 +659,40 @@ def stream():
 def ping():
     return "pong", 200
 
+@app.route("/metrics")
+def metrics():
+    return Response(metrics_registry.render(), mimetype=PROMETHEUS_CONTENT_TYPE)
+
+def start_takeoff(alt, next_state):
+    """Kalkışı arka plan işi olarak başlatır; bitene kadar drone_state "takeoff" kalır."""
+    global drone_state
+    running = jobs.current()
+    if running is not None and running.kind == "takeoff" and running.params.get("altitude") == alt:
+        return running
+    drone_state = "takeoff"
+
+    def finished(job):
+        global drone_state, current_altitude
+        if job.status == SUCCEEDED and job.result:
+            current_altitude = alt
+            if drone_state == "takeoff":
+                drone_state = next_state
+            log(f"✈️ Kalkış tamam: {alt:.1f} m (iş #{job.id})", "success")
+        else:
+            if drone_state == "takeoff":
+                drone_state = "land"
+            log(f"⚠️ Kalkış {job.status}: {job.error or ''} (iş #{job.id})", "warning")
+
+    return jobs.submit("takeoff", lambda job: control.arm_and_takeoff(alt, job.cancelled),
+                       {"altitude": alt}, on_done=finished)
+
+def job_response(job, status, code=202):
+    body = {"status": status, "job": job.to_dict() if job is not None else None}
+    return jsonify(body), code if job is not None else 200
+
 @app.route("/command", methods=["POST"])
 def command():
-    global hedef_etiketi, drone_state, current_altitude
+    global hedef_etiketi, drone_state
 
     if not system_ready:
         return jsonify({"status": "Sistem hazır değil"}), 503
@@ -194,6 +701,8 @@ def command():
     mode = data.get("mode")
     altitude = data.get("altitude")
     target = data.get("target")
+    if mode != "obje":
+        return jsonify({"status": "geçersiz mod"}), 400
     hedef_etiketi = target
 
     try:
@@ -202,17 +711,18 @@ def command():
         alt = 1.0
     alt = max(1.0, min(5.0, alt))
 
-    if drone_state == "land" or current_altitude != alt:
-        control.arm_and_takeoff(alt)
-        current_altitude = alt
-
-    drone_state = "track" if target else "land"
-    if mode != "obje":
-        return jsonify({"status": "geçersiz mod"}), 400
-    return jsonify({
+    next_state = "track" if target else "land"
+    job = None
+    if drone_state in ("land", "takeoff") or current_altitude != alt:
+        job = start_takeoff(alt, next_state)
+    else:
+        drone_state = next_state
+    body = {
         "status": f"{mode} başlatıldı (hedef: {target}, irtifa: {alt:.1f} m)",
-        "id": random.randint(10000, 99999)
-    })
+        "id": random.randint(10000, 99999),
+        "job": job.to_dict() if job is not None else None,
+    }
+    return jsonify(body), 202 if job is not None else 200
 
 @app.route("/reset", methods=["POST"])
 def reset():
@@ -231,47 +741,118 @@ def emergency():
 
 @app.route("/resume", methods=["POST"])
 def resume():
-    global emergency_flag, drone_state, current_altitude, hedef_etiketi
+    global emergency_flag, drone_state
     emergency_flag = False
 
     if hedef_etiketi:
-        try:
-            control.arm_and_takeoff(current_altitude)
-            drone_state = "track"
-            return jsonify({"status": f"Takibe devam ediliyor: {hedef_etiketi}"}), 200
-        except:
-            return jsonify({"status": "Kalkış yapılamadı"}), 500
+        job = start_takeoff(current_altitude, "track")
+        return job_response(job, f"Takibe devam ediliyor: {hedef_etiketi}")
     else:
         land_drone()
         drone_state = "land"
         return jsonify({"status": "Hedef yok, sadece emergency bitti"}), 200
 
+@app.route("/land", methods=["POST"])
+def land():
+    global drone_state, current_altitude
+    drone_state = "land"
+    current_altitude = 0.0
+    job = jobs.submit("land", lambda job: control.land(wait=True, cancel=job.cancelled))
+    return job_response(job, "İniş başlatıldı")
+
+@app.route("/rtl", methods=["POST"])
+def rtl():
+    global drone_state, current_altitude
+    drone_state = "land"
+    current_altitude = 0.0
+    job = jobs.submit("rtl", lambda job: control.rtl(wait=True, cancel=job.cancelled))
+    return job_response(job, "Eve dönüş başlatıldı")
+
+@app.route("/jobs")
+def list_jobs():
+    return jsonify([job.to_dict() for job in jobs.list()])
+
+@app.route("/jobs/<int:job_id>")
+def job_status(job_id):
+    """?wait=sn verilirse iş bitene kadar (en fazla JOB_WAIT_MAX) bekler; bitiş anında döner."""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"status": "iş bulunamadı"}), 404
+    wait = request.args.get("wait", type=float)
+    if wait:
+        job.wait(min(wait, JOB_WAIT_MAX))
+    st = drone_control.vehicle_state()
+    return jsonify(dict(job.to_dict(), vehicle=st.snapshot() if st is not None else None))
+
+@app.route("/jobs/<int:job_id>/cancel", methods=["POST"])
+def cancel_job(job_id):
+    if not jobs.cancel(job_id):
+        return jsonify({"status": "iş yok ya da bitmiş"}), 409
+    return jsonify({"status": "iptal istendi", "job": jobs.get(job_id).to_dict()})
+
+@app.route("/vehicle")
+def vehicle_status():
+    st = drone_control.vehicle_state()
+    if st is None:
+        return jsonify({"status": "Drone bağlı değil"}), 503
+    return jsonify(st.snapshot())
+
 # ---------- SETUP ----------
+def prune_recordings(keep):
+    """RECORDER_DIR'de en yeni `keep` uçuş kaydı dışındakileri siler."""
+    paths = sorted(glob.glob(os.path.join(RECORDER_DIR, "flight_*.rec")), key=os.path.getmtime)
+    for old in paths[:max(0, len(paths) - keep)]:
+        try:
+            os.remove(old)
+            log(f"🗑️ Eski uçuş kaydı silindi: {old}", "info")
+        except OSError as e:
+            log(f"Eski uçuş kaydı silinemedi ({old}): {e}", "warning")
+
+def start_recorder(path=None):
+    """
+    Uçuş kaydediciyi açar ve control.* çıktılarını da ona bağlar. Yol verilmezse RECORDER_DIR'de
+    yeni dosya açılır (en eskiler silinir). Boş alan yetmezse kayıt açılmaz, None döner.
+    """
+    global recorder
+    size = RECORDER_SIZE_MB * 1024 * 1024
+    if path is None:
+        os.makedirs(RECORDER_DIR, exist_ok=True)
+        prune_recordings(RECORDINGS_KEEP - 1)  # yenisiyle birlikte RECORDINGS_KEEP
+        path = os.path.join(RECORDER_DIR, time.strftime("flight_%Y%m%d_%H%M%S.rec"))
+    free = shutil.disk_usage(os.path.dirname(os.path.abspath(path))).free
+    if free < size + RECORDER_MIN_FREE_MB * 1024 * 1024:
+        log(f"⚠️ Uçuş kaydı başlatılmadı: diskte {free // (1024 * 1024)} MB boş, "
+            f"{RECORDER_SIZE_MB + RECORDER_MIN_FREE_MB} MB gerekli", "warning")
+        return None
+    recorder = FlightRecorder(path, size)
+    control.recorder = recorder
+    atexit.register(recorder.flush)
+    log(f"📼 Uçuş kaydı: {path} ({RECORDER_SIZE_MB} MB halka)", "success")
+    return recorder
+
 def setup():
-    global picam2, system_ready
+    global camera, system_ready
     try:
-        picam2 = Picamera2()
-        config = picam2.create_video_configuration(
-            main={"size": (FRAME_WIDTH, FRAME_HEIGHT), "format": "RGB888"},
-            transform=Transform(hflip=1)
-        )
-        picam2.configure(config)
-        picam2.start()
-        time.sleep(2)
-        log("📷 Picamera2 aktif", "success")
+        camera = open_source(CAMERA_SOURCE, FRAME_WIDTH, FRAME_HEIGHT, FPS, slots=3 + ENCODE_THREADS).start()
+        log(f"📷 Kamera aktif ({CAMERA_SOURCE})", "success")
     except Exception as e:
         log(f"Kamera hatası: {e}", "danger")
         handle_exit()
 
     try:
-        drone_control.connect_drone('/dev/serial0')
+        drone_control.connect_drone(VEHICLE_CONNECTION)
         log("✅ Drone bağlandı", "success")
     except Exception as e:
         log(f"Drone bağlantı hatası: {e}", "danger")
         handle_exit()
 
     control.configure_PID()
-    threading.Thread(target=update_camera, daemon=True).start()
+    if RECORD_FLIGHT:
+        start_recorder()
+    supervisor.start()
+    threading.Thread(target=predictive_control_loop, daemon=True).start()
+    if LOCAL_FALLBACK:
+        threading.Thread(target=local_detection_loop, daemon=True).start()
     threading.Thread(target=send_to_pc, daemon=True).start()
     system_ready = True
     log("🚀 Sistem hazır, komut alınabilir", "success")
@@ -0,0 +1,181 @@
+# flight_recorder.py
+# Uçuş kaydedici: JPEG kareler, tespitler ve control.* çıktıları önceden ayrılmış,
+# belleğe eşlenmiş (mmap) halka dosyaya yazılır. Kare başına maliyet bir memcpy.
+#
+# Dosya düzeni:
+#   başlık (HEADER) | indeks halkası (slots x INDEX_DTYPE) | veri halkası (data_size bayt)
+# Her kaydın verisi veri halkasında mutlak bayt konumu `pos` ile tutulur (pos % data_size);
+# halka döndükçe en eski kayıtlar ezilir. Okuyucu yalnız ezilmemiş kayıtları döndürür.
+import mmap
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+from protocol import DETECTION_DTYPE
+
+MAGIC = b"FREC"
+VERSION = 1
+# magic, sürüm, indeks yuvası, veri boyutu, sonraki sıra no, veri başı (mutlak), oluşturma zamanı
+HEADER = struct.Struct("<4sIQQQQd")
+HEADER_SIZE = 64
+
+KIND_FRAME = 1       # JPEG bayt
+KIND_DETECTIONS = 2  # DETECTION_DTYPE kayıtları
+KIND_CONTROL = 3     # CONTROL_DTYPE tek kayıt
+
+INDEX_DTYPE = np.dtype([
+    ("seq", "<u8"),
+    ("t", "<f8"),        # time.monotonic()
+    ("kind", "<u1"),
+    ("frame_id", "<i8"),
+    ("pos", "<u8"),      # veri halkasındaki mutlak konum
+    ("length", "<u4"),
+])
+
+CONTROL_YAW = 0
+CONTROL_POSITION = 1
+CONTROL_DTYPE = np.dtype([
+    ("axis", "<u1"),     # CONTROL_YAW / CONTROL_POSITION
+    ("dx", "<i4"),
+    ("dy", "<i4"),
+    ("area", "<i4"),
+    ("yaw", "<f4"),      # derece/sn
+    ("vx", "<f4"),
+    ("vy", "<f4"),
+    ("vz", "<f4"),
+])
+
+
+class FlightRecorder:
+    """
+    Drone sürecinde yazıcı. Dosya açılışta `data_size` + indeks boyutuna ayrılır;
+    uçuş sırasında dosya büyümez ve sistem çağrısı yapılmaz (yazma = mmap'e kopya).
+    Kayıtlar birden fazla iş parçacığından eklenebilir.
+    """
+
+    def __init__(self, path="flight.rec", data_size=256 * 1024 * 1024, slots=65536):
+        self.path = path
+        self.slots = slots
+        self.data_size = data_size
+        self.frame_id = -1   # control kayıtları son tespitin karesine bağlanır
+        self.dropped = 0
+        self._index_offset = HEADER_SIZE
+        self._data_offset = HEADER_SIZE + slots * INDEX_DTYPE.itemsize
+        total = self._data_offset + data_size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, total)
+            self._mm = mmap.mmap(fd, total)
+        finally:
+            os.close(fd)
+        self._index = np.frombuffer(self._mm, dtype=INDEX_DTYPE, count=slots, offset=self._index_offset)
+        self._data = np.frombuffer(self._mm, dtype=np.uint8, count=data_size, offset=self._data_offset)
+        self._seq = 0
+        self._head = 0
+        self._lock = threading.Lock()
+        self._created = time.time()
+        self._write_header()
+
+    def _write_header(self):
+        HEADER.pack_into(self._mm, 0, MAGIC, VERSION, self.slots, self.data_size,
+                         self._seq, self._head, self._created)
+
+    def append(self, kind, payload, frame_id=-1, t=None):
+        t = time.monotonic() if t is None else t
+        view = memoryview(payload).cast("B")
+        n = len(view)
+        if n > self.data_size:
+            self.dropped += 1
+            return
+        with self._lock:
+            pos = self._head
+            offset = pos % self.data_size
+            if offset + n > self.data_size:
+                pos += self.data_size - offset  # sona sığmıyor: halkanın başına atla
+                offset = 0
+            self._data[offset:offset + n] = view
+            entry = self._index[self._seq % self.slots]
+            entry["seq"], entry["t"], entry["kind"] = self._seq, t, kind
+            entry["frame_id"], entry["pos"], entry["length"] = frame_id, pos, n
+            self._seq += 1
+            self._head = pos + n
+            self._write_header()
+
+    def record_frame(self, frame_id, jpeg, t=None):
+        self.append(KIND_FRAME, jpeg, frame_id, t)
+
+    def record_detections(self, frame_id, records):
+        self.frame_id = frame_id
+        self.append(KIND_DETECTIONS, np.ascontiguousarray(records, dtype=DETECTION_DTYPE), frame_id)
+
+    def record_yaw(self, dx, yaw):
+        rec = np.zeros(1, dtype=CONTROL_DTYPE)
+        rec["axis"], rec["dx"], rec["yaw"] = CONTROL_YAW, dx, yaw
+        self.append(KIND_CONTROL, rec, self.frame_id)
+
+    def record_position(self, dx, dy, area, vx, vy, vz):
+        rec = np.zeros(1, dtype=CONTROL_DTYPE)
+        rec["axis"], rec["dx"], rec["dy"], rec["area"] = CONTROL_POSITION, dx, dy, area
+        rec["vx"], rec["vy"], rec["vz"] = vx, vy, vz
+        self.append(KIND_CONTROL, rec, self.frame_id)
+
+    def flush(self):
+        self._mm.flush()
+
+    def close(self):
+        with self._lock:
+            del self._index, self._data
+            self._mm.flush()
+            self._mm.close()
+
+
+class FlightRecording:
+    """Kayıt dosyasını okur (salt okunur mmap). Veriler kopyasız bakış olarak döner."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, slots, data_size, seq, head, created = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Geçersiz kayıt dosyası: {path}")
+        self.slots, self.data_size, self.created = slots, data_size, created
+        self._data_offset = HEADER_SIZE + slots * INDEX_DTYPE.itemsize
+        index = np.frombuffer(self._mm, dtype=INDEX_DTYPE, count=slots, offset=HEADER_SIZE)
+        # Geçerli: yazılmış, indekste ezilmemiş ve verisi halkada ezilmemiş kayıtlar
+        valid = (index["seq"] < seq) & (index["seq"] + slots >= seq) & (index["length"] > 0)
+        valid &= index["pos"] + data_size >= head
+        self.index = np.sort(index[valid], order="seq")
+
+    def __len__(self):
+        return len(self.index)
+
+    def payload(self, entry):
+        start = self._data_offset + int(entry["pos"]) % self.data_size
+        return memoryview(self._mm)[start:start + int(entry["length"])]
+
+    def of_kind(self, kind):
+        return self.index[self.index["kind"] == kind]
+
+    def frames(self):
+        """(frame_id, t, jpeg bakışı) üretir."""
+        for entry in self.of_kind(KIND_FRAME):
+            yield int(entry["frame_id"]), float(entry["t"]), self.payload(entry)
+
+    def detections(self):
+        for entry in self.of_kind(KIND_DETECTIONS):
+            yield int(entry["frame_id"]), float(entry["t"]), np.frombuffer(self.payload(entry), dtype=DETECTION_DTYPE)
+
+    def controls(self):
+        """Tüm control kayıtları: (t dizisi, frame_id dizisi, CONTROL_DTYPE dizisi)."""
+        entries = self.of_kind(KIND_CONTROL)
+        records = np.empty(len(entries), dtype=CONTROL_DTYPE)
+        for i, entry in enumerate(entries):
+            records[i] = np.frombuffer(self.payload(entry), dtype=CONTROL_DTYPE)[0]
+        return entries["t"].copy(), entries["frame_id"].copy(), records
+
+    def close(self):
+        self.index = None
+        self._mm.close()
@@ -0,0 +1,249 @@
+# frame_source.py
+# Önceden ayrılmış halka tampon + sıra numaralı kare kaynakları (Picamera2, video dosyası, sentetik)
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class Frame:
+    """Halka tampondaki bir yuvaya bakış. İşi bitince FrameSource.release ile bırakılmalı."""
+    __slots__ = ("seq", "timestamp", "image", "slot")
+
+    def __init__(self, seq, timestamp, image, slot):
+        self.seq = seq
+        self.timestamp = timestamp  # yakalama anı, time.monotonic()
+        self.image = image
+        self.slot = slot
+
+
+class FrameSource:
+    """
+    Yakalama thread'i kareleri doğrudan önceden ayrılmış yuvalara yazar; her kare
+    artan bir sıra numarası ve yakalama zamanı alır. Tüketiciler `wait_newer` ile
+    son gördüklerinden yeni bir kare gelene kadar bekler; piksel kopyalama/karşılaştırma yok.
+    Tüketicinin tuttuğu yuva (pin) üretici tarafından üzerine yazılmaz.
+    """
+
+    def __init__(self, width, height, slots=3):
+        self.width = width
+        self.height = height
+        self.seq = 0
+        self.errors = 0
+        self._buffers = [np.empty((height, width, 3), dtype=np.uint8) for _ in range(slots)]
+        self._pins = [0] * slots
+        self._latest = None  # (seq, timestamp, slot)
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    # ---------- alt sınıflar ----------
+    def _open(self):
+        pass
+
+    def _close(self):
+        pass
+
+    def _capture_into(self, out):
+        """`out` dizisine bir kare yazar; kare yoksa False döndürür."""
+        raise NotImplementedError
+
+    # ---------- yaşam döngüsü ----------
+    def start(self):
+        self._open()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        self._close()
+
+    def _free_slot(self):
+        latest = self._latest[2] if self._latest else None
+        for i in range(len(self._buffers)):
+            if i != latest and self._pins[i] == 0:
+                return i
+        return None
+
+    def _run(self):
+        while self._running:
+            with self._cond:
+                slot = self._free_slot()
+                while slot is None and self._running:
+                    # Tüm yuvalar tüketicilerde: biri bırakana kadar bekle
+                    self._cond.wait(0.1)
+                    slot = self._free_slot()
+                if slot is None:
+                    break
+                self._pins[slot] += 1  # yazarken kimse okumasın
+            try:
+                ok = self._capture_into(self._buffers[slot])
+                timestamp = time.monotonic()
+            except Exception as e:
+                ok = False
+                self.errors += 1
+                print(f"Kamera yakalama hatası: {e}")
+                time.sleep(1)
+            with self._cond:
+                self._pins[slot] -= 1
+                if ok:
+                    self.seq += 1
+                    self._latest = (self.seq, timestamp, slot)
+                    self._cond.notify_all()
+
+    # ---------- tüketici ----------
+    def wait_newer(self, last_seq, timeout=None):
+        """
+        `last_seq`'ten yeni kare gelene kadar bekler ve en yenisini pinleyerek döndürür.
+        Zaman aşımında None. Ara kareler atlanır.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._latest is None or self._latest[0] <= last_seq:
+                if not self._running:
+                    return None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            seq, timestamp, slot = self._latest
+            self._pins[slot] += 1
+            return Frame(seq, timestamp, self._buffers[slot], slot)
+
+    def release(self, frame):
+        with self._cond:
+            self._pins[frame.slot] -= 1
+            self._cond.notify_all()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# ---------- KAYNAKLAR ----------
+class PicameraSource(FrameSource):
+    """Picamera2: istek tamponu MappedArray ile eşlenir, yuvaya tek kopya yapılır."""
+
+    def __init__(self, width, height, hflip=True, slots=3):
+        super().__init__(width, height, slots)
+        self.hflip = hflip
+        self.picam2 = None
+        self._mapped_array = None
+
+    def _open(self):
+        from picamera2 import Picamera2, MappedArray
+        from libcamera import Transform
+        self._mapped_array = MappedArray
+        self.picam2 = Picamera2()
+        config = self.picam2.create_video_configuration(
+            main={"size": (self.width, self.height), "format": "RGB888"},
+            transform=Transform(hflip=int(self.hflip))
+        )
+        self.picam2.configure(config)
+        self.picam2.start()
+        time.sleep(2)
+
+    def _close(self):
+        if self.picam2 is not None:
+            self.picam2.stop()
+
+    def _capture_into(self, out):
+        # capture_request bir sonraki kareye kadar bekler: aynı kare iki kez gelmez
+        request = self.picam2.capture_request()
+        try:
+            with self._mapped_array(request, "main") as m:
+                np.copyto(out, m.array[:self.height, :self.width, :3])
+        finally:
+            request.release()
+        return True
+
+
+class VideoFileSource(FrameSource):
+    """Video dosyasından kare okur; `fps` verilirse gerçek zamanlı hızda oynatır."""
+
+    def __init__(self, path, width, height, fps=None, loop=True, slots=3):
+        super().__init__(width, height, slots)
+        self.path = path
+        self.fps = fps
+        self.loop = loop
+        self.cap = None
+        self._tmp = None
+        self._next_at = 0.0
+
+    def _open(self):
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            raise IOError(f"Video açılamadı: {self.path}")
+
+    def _close(self):
+        if self.cap is not None:
+            self.cap.release()
+
+    def _capture_into(self, out):
+        if self.fps:
+            delay = self._next_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_at = max(self._next_at, time.monotonic()) + 1.0 / self.fps
+        ok, self._tmp = self.cap.read(self._tmp)
+        if not ok:
+            if not self.loop:
+                self._running = False
+                return False
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, self._tmp = self.cap.read(self._tmp)
+            if not ok:
+                return False
+        if self._tmp.shape[:2] == out.shape[:2]:
+            np.copyto(out, self._tmp)
+        else:
+            cv2.resize(self._tmp, (self.width, self.height), dst=out)
+        return True
+
+
+class SyntheticSource(FrameSource):
+    """Donanımsız test için hareket eden renkli bir kutu üretir."""
+
+    def __init__(self, width, height, fps=30, box_size=60, slots=3):
+        super().__init__(width, height, slots)
+        self.fps = fps
+        self.box_size = box_size
+        self._n = 0
+        self._next_at = 0.0
+
+    def _capture_into(self, out):
+        delay = self._next_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next_at = max(self._next_at, time.monotonic()) + 1.0 / self.fps
+        self._n += 1
+        out[:] = 40
+        span = self.width - self.box_size
+        x = int((self._n * 4) % (2 * span))
+        x = x if x < span else 2 * span - x
+        y = (self.height - self.box_size) // 2
+        cv2.rectangle(out, (x, y), (x + self.box_size, y + self.box_size), (0, 0, 255), -1)
+        return True
+
+
+def open_source(spec, width, height, fps=None, slots=3):
+    """
+    spec: "picamera", "synthetic" veya "video:<dosya yolu>".
+    slots: halka yuva sayısı; aynı anda kare tutan tüketici sayısından (ör. kodlama işçileri) fazla olmalı.
+    """
+    if spec == "picamera":
+        return PicameraSource(width, height, slots=slots)
+    if spec == "synthetic":
+        return SyntheticSource(width, height, fps or 30, slots=slots)
+    if spec.startswith("video:"):
+        return VideoFileSource(spec[len("video:"):], width, height, fps, slots=slots)
+    raise ValueError(f"Bilinmeyen kamera kaynağı: {spec}")
@@ -0,0 +1,104 @@
+# frame_trace.py
+# Kare başına aşama zaman damgaları (time.monotonic), önceden ayrılmış tabloda
+import threading
+
+import numpy as np
+
+# Aşama sütunları (drone tarafı)
+CAPTURE = 0       # kamera yakalama anı
+ENCODE_START = 1  # JPEG kodlama başladı
+ENCODE_END = 2    # JPEG kodlama bitti
+SENT = 3          # kare sokete yazıldı
+REPLY = 4         # sunucu yanıtı okundu
+HANDLED = 5       # tespitler işlendi, control.* çağrıldı
+STAGES = ("capture", "encode_start", "encode_end", "sent", "reply", "handled")
+
+# Aşama sütunları (sunucu tarafı, yolo_server)
+SRV_RECV = 0          # çerçeve soketten tamamen okundu
+SRV_DECODE_START = 1
+SRV_DECODED = 2
+SRV_INFER_START = 3   # toplu çıkarım başladı
+SRV_INFER_END = 4
+SRV_SENT = 5          # yanıt yazıldı
+SERVER_STAGES = ("recv", "decode_start", "decoded", "infer_start", "infer_end", "sent")
+
+
+class FrameTrace:
+    """
+    frame_id % capacity satırına aşama zamanlarını yazar; kare başına bellek ayırmaz.
+    `complete` tamamlanan satırı dinleyicilere bakış (view) olarak verir:
+    dinleyici saklamak istiyorsa kopyalamalıdır.
+    """
+
+    def __init__(self, capacity=256, stages=STAGES):
+        self.capacity = capacity
+        self.stages = stages
+        self._times = np.full((capacity, len(stages)), np.nan)
+        self._ids = np.full(capacity, -1, dtype=np.int64)
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, fn):
+        """fn(frame_id, times) — times: `stages` sırasıyla zaman damgaları."""
+        with self._lock:
+            self._listeners = self._listeners + [fn]
+
+    def remove_listener(self, fn):
+        with self._lock:
+            self._listeners = [l for l in self._listeners if l is not fn]
+
+    def begin(self, frame_id, t):
+        """Satırı bu kareye ayırır ve ilk aşamanın (sütun 0) zamanını yazar."""
+        row = frame_id % self.capacity
+        self._ids[row] = frame_id
+        self._times[row, :] = np.nan
+        self._times[row, 0] = t
+
+    def mark(self, frame_id, stage, t):
+        row = frame_id % self.capacity
+        if self._ids[row] == frame_id:
+            self._times[row, stage] = t
+
+    def complete(self, frame_id):
+        row = frame_id % self.capacity
+        if self._ids[row] != frame_id:
+            return  # satır daha yeni bir kare tarafından ezilmiş
+        times = self._times[row]
+        for fn in self._listeners:
+            fn(frame_id, times)
+        self._ids[row] = -1
+
+
+# ---------- HİSTOGRAMLARA AKTARMA ----------
+CLIENT_SPANS = (
+    ("wait", CAPTURE, ENCODE_START),     # yakalama → kodlama başlangıcı
+    ("encode", ENCODE_START, ENCODE_END),
+    ("send", ENCODE_END, SENT),
+    ("round_trip", SENT, REPLY),         # ağ + sunucu
+    ("handle", REPLY, HANDLED),          # tespit işleme + control.*
+    ("end_to_end", CAPTURE, HANDLED),
+)
+SERVER_SPANS = (
+    ("queue", SRV_RECV, SRV_DECODE_START),
+    ("decode", SRV_DECODE_START, SRV_DECODED),
+    ("batch_wait", SRV_DECODED, SRV_INFER_START),
+    ("inference", SRV_INFER_START, SRV_INFER_END),
+    ("respond", SRV_INFER_END, SRV_SENT),
+    ("total", SRV_RECV, SRV_SENT),
+)
+
+
+class SpanRecorder:
+    """FrameTrace dinleyicisi: tamamlanan karenin aşama sürelerini histogramlara yazar."""
+
+    def __init__(self, registry, name, help_text, spans):
+        self.spans = [
+            (registry.histogram(name, help_text, {"stage": label}), a, b)
+            for label, a, b in spans
+        ]
+
+    def __call__(self, frame_id, times):
+        for hist, a, b in self.spans:
+            d = times[b] - times[a]
+            if d == d:  # NaN değilse (aşama atlanmadıysa)
+                hist.observe(float(d))
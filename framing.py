@@ -0,0 +1,189 @@
+# framing.py
+# Sunucu ve drone arasındaki ">L" uzunluk önekli protokol için kopyasız çerçeveleme
+import socket
+import struct
+import threading
+
+HEADER = struct.Struct(">L")
+MAX_FRAME_SIZE = 16 * 1024 * 1024  # Bozuk başlıkta sınırsız bellek ayırmayı engeller
+
+_HAS_SENDMSG = hasattr(socket.socket, "sendmsg")  # Windows'ta yok
+
+
+# ---------- GÖNDERME ----------
+def send_frame(sock, payload):
+    """
+    Başlık + veriyi birleştirmeden gönderir (sendmsg scatter/gather).
+    payload: bytes, bytearray, memoryview veya numpy dizisi (buffer protokolü).
+    """
+    payload = memoryview(payload).cast("B")
+    header = HEADER.pack(payload.nbytes)
+    if not _HAS_SENDMSG:
+        sock.sendall(header)
+        sock.sendall(payload)
+        return
+
+    total = len(header) + payload.nbytes
+    sent = sock.sendmsg([header, payload])
+    if sent == total:
+        return
+    # Kısmi gönderim: kalan parçaları tamamla
+    if sent < len(header):
+        sock.sendall(header[sent:])
+        sock.sendall(payload)
+    else:
+        sock.sendall(payload[sent - len(header):])
+
+
+# ---------- BLOKLAYAN OKUMA ----------
+def recv_exact_into(sock, view):
+    """`view` dolana kadar okur; bağlantı kapanırsa ConnectionError."""
+    got = 0
+    n = len(view)
+    while got < n:
+        r = sock.recv_into(view[got:], n - got)
+        if r == 0:
+            raise ConnectionError("Bağlantı koptu!")
+        got += r
+
+
+class FrameReader:
+    """
+    Bloklayan soketten tam çerçeve okur. Tek bir, gerektiğinde büyüyen
+    tampon kullanılır: dönen memoryview bir sonraki read_frame çağrısına kadar geçerlidir.
+    """
+
+    def __init__(self, sock, initial_size=64 * 1024):
+        self.sock = sock
+        self._header = bytearray(HEADER.size)
+        self._header_view = memoryview(self._header)
+        self._buf = bytearray(initial_size)
+        self._view = memoryview(self._buf)
+        self.grow_count = 0
+
+    def _ensure(self, size):
+        if size <= len(self._buf):
+            return
+        new_size = len(self._buf)
+        while new_size < size:
+            new_size *= 2
+        self._view.release()
+        self._buf = bytearray(new_size)
+        self._view = memoryview(self._buf)
+        self.grow_count += 1
+
+    def read_frame(self):
+        recv_exact_into(self.sock, self._header_view)
+        size = HEADER.unpack(self._header)[0]
+        if size > MAX_FRAME_SIZE:
+            raise ValueError(f"Çerçeve çok büyük: {size} bayt")
+        self._ensure(size)
+        payload = self._view[:size]
+        recv_exact_into(self.sock, payload)
+        return payload
+
+
+# ---------- BLOKLAMAYAN OKUMA (selector) ----------
+class BufferPool:
+    """Çerçeve tamponlarını yeniden kullanır; kararlı durumda kare başına ayırma olmaz."""
+
+    def __init__(self, initial_size=64 * 1024, max_free=8):
+        self.initial_size = initial_size
+        self.max_free = max_free
+        self.allocations = 0
+        self._free = []
+        self._lock = threading.Lock()
+
+    def get(self, size):
+        with self._lock:
+            for i, buf in enumerate(self._free):
+                if len(buf) >= size:
+                    return self._free.pop(i)
+        self.allocations += 1
+        return bytearray(max(size, self.initial_size))
+
+    def release(self, payload):
+        """payload: get() ile alınan tampon ya da ondan türetilen memoryview."""
+        buf = payload.obj if isinstance(payload, memoryview) else payload
+        with self._lock:
+            if len(self._free) < self.max_free:
+                self._free.append(buf)
+
+
+class FrameAssembler:
+    """
+    Selector ile okunan bağlantı için durum makinesi. Her `read_from` çağrısı
+    tek bir recv_into yapar; veri doğrudan çerçevenin kendi tamponuna yazılır.
+    Tamamlanan çerçeve memoryview olarak döner; işi biten tüketici pool.release ile iade eder.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self._header = bytearray(HEADER.size)
+        self._header_view = memoryview(self._header)
+        self._header_got = 0
+        self._payload = None
+        self._size = 0
+        self._got = 0
+
+    def read_from(self, sock):
+        """Tamamlanan çerçeveyi (memoryview) ya da None döndürür; bağlantı kapandıysa ConnectionError."""
+        if self._payload is None:
+            r = sock.recv_into(self._header_view[self._header_got:])
+            if r == 0:
+                raise ConnectionError("Bağlantı koptu!")
+            self._header_got += r
+            if self._header_got < HEADER.size:
+                return None
+            self._size = HEADER.unpack(self._header)[0]
+            if self._size > MAX_FRAME_SIZE:
+                raise ValueError(f"Çerçeve çok büyük: {self._size} bayt")
+            self._payload = memoryview(self.pool.get(self._size))[:self._size]
+            self._got = 0
+            if self._size > 0:
+                return None
+        else:
+            r = sock.recv_into(self._payload[self._got:])
+            if r == 0:
+                raise ConnectionError("Bağlantı koptu!")
+            self._got += r
+            if self._got < self._size:
+                return None
+
+        payload = self._payload
+        self._payload = None
+        self._header_got = 0
+        return payload
+
+
+# ---------- TAŞIMA ARAYÜZÜ ----------
+class TcpLink:
+    """
+    Bağlı TCP soketi için udp_transport.UdpChannel ile aynı arayüz: send(payload, msg_id)
+    ve read_frame(). TCP'de kare id'si örtüktür (bağlantıdaki sıra), msg_id kullanılmaz.
+    send birden çok iş parçacığından çağrılabilir (kareler + kalp atışı); çerçeveler karışmaz.
+    """
+    lossy = False
+
+    def __init__(self, sock, initial_size=64 * 1024):
+        self.sock = sock
+        self.reader = FrameReader(sock, initial_size)
+        self._send_lock = threading.Lock()
+
+    def send(self, payload, msg_id=None):
+        with self._send_lock:
+            send_frame(self.sock, payload)
+
+    def read_frame(self):
+        return self.reader.read_frame()
+
+    def close(self):
+        # shutdown, başka iş parçacığında recv'de bekleyen okuyucuyu hemen uyandırır
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        try:
+            self.sock.close()
+        except OSError:
+            pass
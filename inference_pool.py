@@ -0,0 +1,357 @@
+# inference_pool.py
+# Çok süreçli çıkarım havuzu: her işçi süreç (spawn) kendi model kopyasını yükler.
+# Çözülmüş kareler pickle edilmez; havuzun multiprocessing.shared_memory bloğundaki
+# yuvalara bir kez kopyalanır, işçiye yalnız yuva numarası + şekil gider. Geri dönen
+# yalnız küçük kayıt dizileridir (protocol.DETECTION_DTYPE).
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from backends import create_backend, results_to_records
+from link_supervisor import Backoff
+
+
+def _limit_threads(threads, cpus):
+    """İşçi başına çekirdek/iş parçacığı sınırı; N işçi aynı çekirdekler için yarışmasın."""
+    if cpus and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cpus)
+        except OSError:
+            pass
+    if threads:
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+
+
+def _worker(index, tasks, results, shm_name, slot_bytes, model_args, conf, threads, cpus, warmup, tiler):
+    _limit_threads(threads, cpus)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        backend = create_backend(*model_args).load()
+        if warmup[0]:
+            backend.warmup(*warmup)
+    except Exception as e:
+        results.put(("error", index, str(e)))
+        shm.close()
+        return
+    results.put(("ready", index, backend.names))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        task_id, specs, classes, filters, rois = task
+        # Yuvadaki kare kopyasız bakış olarak okunur; yuva sığmayan kare pickle ile gelmiştir
+        images = [frame if slot is None else np.ndarray(shape, np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+                  for slot, shape, frame in specs]
+        try:
+            if tiler is not None:
+                output = None
+                records = tiler.records(backend, images, conf, classes, filters, rois)
+            else:
+                output = backend.predict(images, conf, classes)
+                records = [results_to_records(r, conf, f) for r, f in zip(output, filters)]
+            results.put(("done", index, (task_id, records)))
+        except Exception as e:
+            results.put(("failed", index, (task_id, str(e))))
+        finally:
+            output = images = None  # sonuçlar kareye bakış tutar; shm kapanmadan bırakılmalı
+    shm.close()
+
+
+class PoolTask:
+    """Havuza verilen tek toplu çağrı. `records` kare başına kayıt dizisi, hata varsa `error`."""
+    __slots__ = ("id", "worker", "slots", "submitted", "finished", "records", "error", "callback", "_done")
+
+    def __init__(self, task_id, worker, slots, callback):
+        self.id = task_id
+        self.worker = worker
+        self.slots = slots
+        self.submitted = time.monotonic()
+        self.finished = None
+        self.records = None
+        self.error = None
+        self.callback = callback
+        self._done = threading.Event()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+
+class InferencePool:
+    """
+    start() → wait_ready() → submit(frames, classes, filters, callback) ... → stop().
+
+    - Her işçiye en fazla `depth` toplu çağrı verilir (biri çalışırken diğeri hazırda bekler);
+      tüm işçiler doluysa submit en fazla `timeout` kadar bloklar. İş en az meşgul işçiye gider.
+    - Yuva sayısı workers * depth * max_batch; yuvadan büyük kareler pickle ile gider (`pickled`).
+    - callback(task) sonuç toplama iş parçacığında çağrılır; kısa tutulmalı.
+    - Ölen işçinin işleri hata ile kapanır, işçi yeniden başlatılır. Başlarken ölen veya
+      `load_timeout` içinde hazır olmayan işçi geri çekilmeyle yeniden denenir; `max_start_failures`
+      kez üst üste başlatılamazsa bırakılır. Hazır olabilecek işçi kalmadıysa submit RuntimeError verir.
+    - `tiler` (tiling.Tiler) verilirse işçiler döşemeli çıkarım yapar; submit'e kare başına `rois`.
+    """
+
+    def __init__(self, backend="pytorch", weights="yolov8s.pt", imgsz=640, int8=False, conf=0.4,
+                 workers=2, threads=None, pin_cpus=False, depth=2, max_batch=8,
+                 slot_bytes=1280 * 720 * 3, warmup_runs=1, warmup_shape=(320, 640, 3), tiler=None,
+                 load_timeout=300.0, max_start_failures=5, respawn_min=1.0, respawn_max=30.0):
+        self.model_args = (backend, weights, imgsz, int8)
+        self.tiler = tiler
+        self.conf = conf
+        self.workers = workers
+        self.threads = threads
+        self.pin_cpus = pin_cpus
+        self.depth = depth
+        self.max_batch = max_batch
+        self.slot_bytes = slot_bytes
+        self.warmup = (warmup_runs, warmup_shape)
+        self.load_timeout = load_timeout
+        self.max_start_failures = max_start_failures
+        self.names = None
+        self.error = None
+        self.completed = [0] * workers
+        self.failed = 0
+        self.restarts = 0
+        self.pickled = 0
+        self.timeouts = 0
+        self._ctx = mp.get_context("spawn")  # çatallanan süreç sunucu iş parçacıklarını miras almasın
+        self._shm = None
+        self._procs = [None] * workers
+        self._tasks = [None] * workers
+        self._results = None
+        self._ready = [False] * workers
+        self._spawned_at = [0.0] * workers
+        self._respawn_at = [0.0] * workers
+        self._backoff = [Backoff(respawn_min, respawn_max) for _ in range(workers)]
+        self._given_up = [False] * workers
+        self._outstanding = [{} for _ in range(workers)]  # işçi → {task_id: PoolTask}
+        self._free = []
+        self._next_id = 0
+        self._cond = threading.Condition()
+        self._collector = None
+        self._closed = False
+
+    # ---------- YAŞAM DÖNGÜSÜ ----------
+    def _cpus(self, index):
+        if not self.pin_cpus or not hasattr(os, "sched_getaffinity"):
+            return None
+        cpus = sorted(os.sched_getaffinity(0))
+        per = max(1, len(cpus) // self.workers)
+        return cpus[index * per:(index + 1) * per] or None
+
+    def _spawn(self, index):
+        self._tasks[index] = self._ctx.Queue()
+        proc = self._ctx.Process(
+            target=_worker, daemon=True,
+            args=(index, self._tasks[index], self._results, self._shm.name, self.slot_bytes,
+                  self.model_args, self.conf, self.threads, self._cpus(index), self.warmup, self.tiler))
+        proc.start()
+        self._procs[index] = proc
+        self._spawned_at[index] = time.monotonic()
+
+    def start(self):
+        slots = self.workers * self.depth * self.max_batch
+        self._shm = shared_memory.SharedMemory(create=True, size=slots * self.slot_bytes)
+        self._free = list(range(slots))
+        self._results = self._ctx.Queue()
+        for i in range(self.workers):
+            self._spawn(i)
+        return self
+
+    def wait_ready(self, timeout=300.0):
+        """Tüm işçiler modeli yükleyip ısınınca True; hata veya zaman aşımında False (`error` dolar)."""
+        deadline = time.monotonic() + timeout
+        while not all(self._ready):
+            try:
+                status, index, value = self._results.get(timeout=1.0)
+            except queue.Empty:
+                dead = [i for i, proc in enumerate(self._procs) if not self._ready[i] and not proc.is_alive()]
+                if dead:
+                    self.error = f"işçi {dead[0]} başlarken sonlandı (çıkış kodu {self._procs[dead[0]].exitcode})"
+                    return False
+                if time.monotonic() >= deadline:
+                    self.error = "zaman aşımı"
+                    return False
+                continue
+            if status != "ready":
+                self.error = f"işçi {index}: {value}"
+                return False
+            self._ready[index] = True
+            self.names = value
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+        return True
+
+    def stop(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for q in self._tasks:
+            if q is not None:
+                q.put(None)
+        for proc in self._procs:
+            if proc is not None:
+                proc.join(timeout=2)
+                if proc.is_alive():
+                    proc.terminate()
+        if self._collector is not None:
+            self._collector.join(timeout=2)
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    # ---------- GÖNDERME ----------
+    def _pick_worker(self):
+        candidates = [i for i in range(self.workers)
+                      if self._ready[i] and len(self._outstanding[i]) < self.depth]
+        return min(candidates, key=lambda i: len(self._outstanding[i])) if candidates else None
+
+    def _can_become_ready(self):
+        return any(ready or not given_up for ready, given_up in zip(self._ready, self._given_up))
+
+    def submit(self, frames, classes=None, filters=None, callback=None, rois=None, timeout=None):
+        """
+        Toplu çağrıyı bir işçiye verir ve PoolTask döndürür; kapalıysa veya `timeout` sn içinde
+        boş işçi/yuva bulunamazsa None. Hiçbir işçi hazır olamayacaksa RuntimeError (`error`).
+        classes: modele verilen sınıf id'leri (NMS öncesi), filters: kare başına ek süzgeç (veya None),
+        rois: döşemeli çıkarımda kare başına hedef bölgesi (veya None).
+        """
+        filters = filters if filters is not None else [None] * len(frames)
+        fits = [f.dtype == np.uint8 and f.flags.c_contiguous and f.nbytes <= self.slot_bytes for f in frames]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    return None
+                worker = self._pick_worker()
+                if worker is not None and len(self._free) >= sum(fits):
+                    break
+                if not self._can_become_ready():
+                    raise RuntimeError(self.error or "hazır olabilecek çıkarım işçisi kalmadı")
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self.timeouts += 1
+                    return None
+                self._cond.wait(remaining)
+            slots = [self._free.pop() if fit else None for fit in fits]
+            task = PoolTask(self._next_id, worker, [s for s in slots if s is not None], callback)
+            self._next_id += 1
+            self._outstanding[worker][task.id] = task
+
+        specs = []
+        for frame, slot in zip(frames, slots):
+            if slot is None:
+                self.pickled += 1
+                specs.append((None, frame.shape, frame))
+                continue
+            np.ndarray(frame.shape, np.uint8, buffer=self._shm.buf, offset=slot * self.slot_bytes)[...] = frame
+            specs.append((slot, frame.shape, None))
+        self._tasks[worker].put((task.id, specs, classes, filters, rois))
+        return task
+
+    def predict(self, frames, classes=None, filters=None, timeout=None):
+        """Eşzamanlı kullanım: kare başına kayıt dizileri; hata olursa RuntimeError."""
+        task = self.submit(frames, classes, filters, timeout=timeout)
+        if task is None or not task.wait(timeout):
+            raise RuntimeError("Çıkarım havuzu yanıt vermedi")
+        if task.error is not None:
+            raise RuntimeError(task.error)
+        return task.records
+
+    # ---------- SONUÇ TOPLAMA ----------
+    def _finish(self, task, records=None, error=None):
+        with self._cond:
+            self._outstanding[task.worker].pop(task.id, None)
+            self._free.extend(task.slots)
+            self._cond.notify_all()
+        task.records, task.error, task.finished = records, error, time.monotonic()
+        task._done.set()
+        if task.callback is not None:
+            task.callback(task)
+
+    def _check_workers(self):
+        now = time.monotonic()
+        for i in range(self.workers):
+            if self._closed:
+                return
+            proc = self._procs[i]
+            if self._ready[i]:
+                if proc.is_alive():
+                    continue
+                # Süreç öldü: işleri hata ile kapanır, yuvalar geri alınır, işçi hemen yeniden doğar
+                with self._cond:
+                    self._ready[i] = False
+                    lost = list(self._outstanding[i].values())
+                for task in lost:
+                    self.failed += 1
+                    self._finish(task, error=f"işçi {i} sonlandı (çıkış kodu {proc.exitcode})")
+                self._procs[i] = None
+                self._respawn_at[i] = now
+            elif proc is not None:
+                if proc.is_alive() and now - self._spawned_at[i] < self.load_timeout:
+                    continue  # model yükleniyor
+                # Başlarken öldü veya yükleme zaman aşımı: geri çekilmeyle yeniden denenir
+                if proc.is_alive():
+                    reason = "yükleme zaman aşımı"
+                    proc.terminate()
+                else:
+                    reason = f"çıkış kodu {proc.exitcode}"
+                self._procs[i] = None
+                if self._backoff[i].attempts + 1 >= self.max_start_failures:
+                    self.error = f"işçi {i} {self.max_start_failures} kez üst üste başlatılamadı ({reason})"
+                    with self._cond:
+                        self._given_up[i] = True
+                        self._cond.notify_all()
+                    continue
+                self._respawn_at[i] = now + self._backoff[i].next()
+            if self._procs[i] is None and not self._given_up[i] and now >= self._respawn_at[i]:
+                self.restarts += 1
+                self._spawn(i)
+
+    def _collect(self):
+        last_check = time.monotonic()
+        while not self._closed:
+            if time.monotonic() - last_check >= 1.0:
+                self._check_workers()
+                last_check = time.monotonic()
+            try:
+                status, index, value = self._results.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            if status == "ready":
+                self._backoff[index].reset()
+                with self._cond:
+                    self._ready[index] = True
+                    self._cond.notify_all()
+                continue
+            if status == "error":
+                self.error = f"işçi {index}: {value}"
+                continue
+            task_id, payload = value
+            task = self._outstanding[index].get(task_id)
+            if task is None:
+                continue
+            if status == "done":
+                self.completed[index] += 1
+                self._finish(task, records=payload)
+            else:
+                self.failed += 1
+                self._finish(task, error=payload)
+
+    def stats(self):
+        with self._cond:
+            busy = [len(o) for o in self._outstanding]
+        return {"workers": self.workers, "ready": sum(self._ready), "given_up": sum(self._given_up),
+                "completed": sum(self.completed), "failed": self.failed, "restarts": self.restarts,
+                "timeouts": self.timeouts, "pickled": self.pickled,
+                "in_flight": sum(busy), "free_slots": len(self._free)}
@@ -0,0 +1,121 @@
+# jobs.py
+# Uzun süren araç işlemleri (kalkış, iniş, RTL) için arka plan işleri: HTTP isteği iş id'sini
+# hemen döndürür, durum /jobs/<id> ile sorgulanır ya da zaman aşımıyla beklenir.
+import collections
+import itertools
+import threading
+import time
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class Job:
+    """fn(job) iş parçacığında çalışır; uzun beklemelerde `job.cancelled` (Event) kontrol edilmelidir."""
+
+    def __init__(self, job_id, kind, fn, params=None):
+        self.id = job_id
+        self.kind = kind
+        self.fn = fn
+        self.params = params or {}
+        self.status = PENDING
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.cancelled = threading.Event()
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """İş bitince True; zaman aşımında False."""
+        return self._done.wait(timeout)
+
+    def to_dict(self):
+        return {"id": self.id, "kind": self.kind, "status": self.status, "params": self.params,
+                "result": self.result, "error": self.error, "created": self.created,
+                "started": self.started, "finished": self.finished}
+
+
+class JobManager:
+    """
+    Aynı anda tek uçuş işi çalışır: yeni iş gelince çalışan iş iptal edilir ve bitmesi
+    beklenir (ör. kalkış sürerken iniş). Son `history` iş saklanır.
+    on_cancel: iptalde çağrılır (ör. VehicleState.interrupt ile bekleyenleri uyandırmak için).
+    """
+
+    def __init__(self, history=64, on_cancel=None, preempt_timeout=2.0):
+        self.on_cancel = on_cancel
+        self.preempt_timeout = preempt_timeout
+        self._jobs = collections.OrderedDict()
+        self._history = history
+        self._ids = itertools.count(1)
+        self._current = None
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, params=None, on_done=None):
+        with self._lock:
+            job = Job(next(self._ids), kind, fn, params)
+            self._jobs[job.id] = job
+            while len(self._jobs) > self._history:
+                self._jobs.popitem(last=False)
+            previous, self._current = self._current, job
+        threading.Thread(target=self._run, args=(job, previous, on_done), daemon=True).start()
+        return job
+
+    def _run(self, job, previous, on_done):
+        if previous is not None and not previous.done:
+            self._cancel(previous)
+            previous.wait(self.preempt_timeout)
+        if job.cancelled.is_set():
+            self._finish(job, CANCELLED, on_done)
+            return
+        job.status, job.started = RUNNING, time.time()
+        try:
+            job.result = job.fn(job)
+            status = CANCELLED if job.cancelled.is_set() else SUCCEEDED
+        except Exception as e:
+            job.error = str(e)
+            status = FAILED
+        self._finish(job, status, on_done)
+
+    def _finish(self, job, status, on_done):
+        job.status, job.finished = status, time.time()
+        job._done.set()
+        if on_done is not None:
+            try:
+                on_done(job)
+            except Exception as e:
+                print(f"İş sonu geri çağrısı hatası ({job.kind} #{job.id}): {e}")
+
+    def _cancel(self, job):
+        job.cancelled.set()
+        if self.on_cancel is not None:
+            self.on_cancel()
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None or job.done:
+            return False
+        self._cancel(job)
+        return True
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def current(self):
+        job = self._current
+        return job if job is not None and not job.done else None
+
+    def list(self):
+        with self._lock:
+            return list(self._jobs.values())
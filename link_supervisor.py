@@ -0,0 +1,151 @@
+# link_supervisor.py
+# Görüş bağlantısının (drone ↔ yolo_server) sağlık denetimi: uygulama düzeyi kalp atışı
+# zamanlaması, bayatlık tespiti, TCP keepalive ve titreşimli (jitter) üstel geri çekilme.
+#
+# Bağlantı "bayat": LINK_STALE_AFTER boyunca hiçbir yanıt/yankı gelmedi. Soket henüz açık
+# olabilir (yarı ölü Wi-Fi), ama drone eski hızıyla uçmaya devam etmemeli; on_stale anında
+# çağrılır. Bağlantı kopunca (okuma/yazma süresi aşıldı, soket hatası) bayatlık hemen ilan edilir.
+import random
+import socket
+import threading
+import time
+
+
+def enable_keepalive(sock, idle=1, interval=1, count=3, user_timeout=None):
+    """
+    Çekirdek düzeyinde TCP keepalive: `idle` sn sessizlikten sonra `interval` aralıkla `count`
+    yoklama. user_timeout (sn, Linux): onaylanmayan veri bu kadar bekleyince bağlantı düşer.
+    Desteklenmeyen seçenekler (platforma göre) sessizce atlanır.
+    """
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    options = [("TCP_KEEPIDLE", idle), ("TCP_KEEPINTVL", interval), ("TCP_KEEPCNT", count)]
+    if user_timeout is not None:
+        options.append(("TCP_USER_TIMEOUT", int(user_timeout * 1000)))
+    for name, value in options:
+        if hasattr(socket, name):
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, name), value)
+            except OSError:
+                pass
+    if not hasattr(socket, "TCP_KEEPIDLE") and hasattr(socket, "TCP_KEEPALIVE"):  # macOS
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, idle)
+
+
+class Backoff:
+    """
+    Yeniden bağlanma bekleme süresi: "decorrelated jitter" (her deneme [initial, 3 x önceki]
+    aralığında rastgele, en fazla maximum). İlk denemeler onlarca ms; aynı anda kopan
+    drone'lar sunucuya aynı anda yüklenmez. Başarılı bağlantıdan sonra reset().
+    """
+
+    def __init__(self, initial=0.05, maximum=5.0):
+        self.initial = initial
+        self.maximum = maximum
+        self.attempts = 0
+        self._delay = initial
+
+    def next(self):
+        self.attempts += 1
+        self._delay = min(self.maximum, random.uniform(self.initial, self._delay * 3))
+        return self._delay
+
+    def reset(self):
+        self.attempts = 0
+        self._delay = self.initial
+
+
+class LinkSupervisor:
+    """
+    alive(): her yanıt veya kalp atışı yankısında çağrılır.
+    connected() / disconnected(): bağlantı döngüsü çağırır; disconnected() bayatlığı hemen ilan eder.
+    start(): izleme iş parçacığı; sessizlik `stale_after`ı aşınca on_stale(sessizlik_sn),
+    bağlantı geri gelince (ilk alive) on_fresh(kesinti_sn) bir kez çağrılır.
+    Sayaçlar stats() ile: kesinti, yeniden bağlanma, son yeniden bağlanma süresi, toplam kesinti.
+    """
+
+    def __init__(self, stale_after=0.6, on_stale=None, on_fresh=None, check_interval=0.05):
+        self.stale_after = stale_after
+        self.on_stale = on_stale
+        self.on_fresh = on_fresh
+        self.check_interval = check_interval
+        self.stale = True  # ilk yanıta kadar bağlantı yok sayılır
+        self.outages = 0
+        self.reconnects = 0
+        self.last_reconnect_seconds = None
+        self.downtime = 0.0
+        self._connected = False
+        self._last_rx = None
+        self._stale_since = time.monotonic()
+        self._lost_at = None
+        self._ever_connected = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        threading.Thread(target=self._monitor, daemon=True).start()
+        return self
+
+    def alive(self):
+        now = time.monotonic()
+        with self._lock:
+            self._last_rx = now
+            if not self.stale:
+                return
+            self.stale = False
+            outage = now - self._stale_since
+            if self._ever_connected:
+                self.downtime += outage
+            self._ever_connected = True
+        if self.on_fresh is not None:
+            self.on_fresh(outage)
+
+    def connected(self):
+        """Bağlantı kuruldu (el sıkışma dahil); kopmadan bu yana geçen süreyi döndürür (ilkinde None)."""
+        now = time.monotonic()
+        with self._lock:
+            self._connected = True
+            self._last_rx = now
+            if self._lost_at is None:
+                return None
+            self.reconnects += 1
+            self.last_reconnect_seconds = now - self._lost_at
+            self._lost_at = None
+            return self.last_reconnect_seconds
+
+    def disconnected(self):
+        with self._lock:
+            was_connected, self._connected = self._connected, False
+            if was_connected or self._ever_connected:
+                self._lost_at = self._lost_at or time.monotonic()
+        self._declare_stale()
+
+    def silence(self):
+        last = self._last_rx
+        return None if last is None else time.monotonic() - last
+
+    def _declare_stale(self):
+        now = time.monotonic()
+        with self._lock:
+            if self.stale:
+                return
+            self.stale = True
+            self._stale_since = now
+            self.outages += 1
+            silence = now - self._last_rx if self._last_rx is not None else 0.0
+        if self.on_stale is not None:
+            self.on_stale(silence)
+
+    def _monitor(self):
+        while True:
+            time.sleep(self.check_interval)
+            silence = self.silence()
+            if silence is not None and silence > self.stale_after:
+                self._declare_stale()
+
+    def stats(self):
+        """Sayısal sayaçlar (metrik göstergesi için); henüz ölçülmeyenler dahil edilmez."""
+        silence = self.silence()
+        values = {"stale": int(self.stale), "connected": int(self._connected), "outages": self.outages,
+                  "reconnects": self.reconnects, "last_reconnect_seconds": self.last_reconnect_seconds,
+                  "downtime_seconds": round(self.downtime, 3),
+                  "silence_seconds": round(silence, 3) if silence is not None else None}
+        return {key: value for key, value in values.items() if value is not None}
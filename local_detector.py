@@ -0,0 +1,95 @@
+# local_detector.py
+# Drone üzerinde yedek tespit: küçük model ayrı bir süreçte (spawn) çalışır,
+# kareler ve kayıtlar Pipe ile taşınır. PC bağlantısı yokken kullanılır.
+import multiprocessing as mp
+
+from backends import create_backend, results_to_records
+
+
+def _worker(conn, backend_name, weights, imgsz, int8, conf, frame_shape):
+    try:
+        backend = create_backend(backend_name, weights, imgsz, int8).load()
+        backend.warmup(2, frame_shape)
+    except Exception as e:
+        conn.send(("error", str(e)))
+        return
+    names = backend.names
+    ids = {name: i for i, name in names.items()}
+    conn.send(("ready", [names[i] for i in sorted(names)]))
+
+    while True:
+        try:
+            image, classes = conn.recv()
+        except (EOFError, OSError):
+            break
+        if image is None:
+            break
+        class_ids = None if classes is None else [ids[c] for c in classes if c in ids]
+        results = backend.predict([image], conf, class_ids)
+        conn.send(results_to_records(results[0], conf))
+
+
+class LocalDetector:
+    """
+    Tespit sürecinin istemci tarafı. Tek iş parçacığından kullanılır:
+    start() → wait_ready() → detect(image, classes) ... → stop().
+    """
+
+    def __init__(self, backend="onnx", weights="yolov8n.pt", imgsz=320, int8=False, conf=0.4,
+                 frame_shape=(160, 320, 3)):
+        self.args = (backend, weights, imgsz, int8, conf, frame_shape)
+        self.names = None
+        self.error = None
+        self._conn = None
+        self._proc = None
+
+    @property
+    def alive(self):
+        return self._proc is not None and self._proc.is_alive()
+
+    def start(self):
+        ctx = mp.get_context("spawn")  # çatallanan süreç kamera/Flask iş parçacıklarını miras almasın
+        self._conn, child = ctx.Pipe()
+        self._proc = ctx.Process(target=_worker, args=(child,) + self.args, daemon=True)
+        self._proc.start()
+        child.close()
+        return self
+
+    def wait_ready(self, timeout=120.0):
+        """Model yüklenip ısınınca True; hata veya zaman aşımında False (`error` dolar)."""
+        try:
+            if not self._conn.poll(timeout):
+                self.error = "zaman aşımı"
+                return False
+            status, value = self._conn.recv()
+        except (EOFError, OSError):
+            self._proc.join(timeout=1)
+            self.error = f"süreç başlarken sonlandı (çıkış kodu {self._proc.exitcode})"
+            return False
+        if status != "ready":
+            self.error = value
+            return False
+        self.names = value
+        return True
+
+    def detect(self, image, classes=None, timeout=2.0):
+        """Kayıt dizisi (protocol.DETECTION_DTYPE) veya süreç yanıt vermezse None."""
+        try:
+            self._conn.send((image, classes))
+            if not self._conn.poll(timeout):
+                return None
+            return self._conn.recv()
+        except (EOFError, OSError):
+            return None
+
+    def stop(self):
+        if self._conn is not None:
+            try:
+                self._conn.send((None, None))
+            except OSError:
+                pass
+            self._conn.close()
+        if self._proc is not None:
+            self._proc.join(timeout=2)
+            if self._proc.is_alive():
+                self._proc.terminate()
@@ -0,0 +1,181 @@
+# metrics.py
+# Düşük maliyetli sayaç / gösterge / histogram ve Prometheus metin çıktısı
+import bisect
+import threading
+import time
+
+# Saniye cinsinden varsayılan histogram sınırları (1 ms .. 5 s)
+DEFAULT_BOUNDS = (0.001, 0.0025, 0.005, 0.01, 0.02, 0.035, 0.05, 0.075, 0.1,
+                  0.15, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels.items()) + (list(extra.items()) if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+def _format_value(v):
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=None):
+        self.name = name
+        self.help = help_text
+        self.labels = labels or {}
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, n=1):
+        with self._lock:
+            self.value += n
+
+    def samples(self):
+        yield self.name, self.labels, self.value
+
+
+class Gauge:
+    """
+    Değer set() ile verilir ya da `fn` ile okuma anında hesaplanır. `fn` bir sayı
+    veya {etiket_değeri: sayı} sözlüğü döndürebilir (sözlükte etiket adı `label`).
+    """
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labels=None, fn=None, label=None):
+        self.name = name
+        self.help = help_text
+        self.labels = labels or {}
+        self.fn = fn
+        self.label = label
+        self.value = 0.0
+
+    def set(self, v):
+        self.value = v
+
+    def samples(self):
+        v = self.fn() if self.fn is not None else self.value
+        if isinstance(v, dict):
+            for key, item in v.items():
+                yield self.name, dict(self.labels, **{self.label: key}), item
+        elif v is not None:
+            yield self.name, self.labels, v
+
+
+class Histogram:
+    """
+    Kümülatif kovalar (Prometheus histogramı) + son `window` ölçümün halka tamponu
+    (kayan yüzdelikler). Tüm tamponlar baştan ayrılır; observe() bellek ayırmaz.
+    """
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=None, bounds=DEFAULT_BOUNDS, window=512):
+        self.name = name
+        self.help = help_text
+        self.labels = labels or {}
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._ring = [0.0] * window
+        self._ring_pos = 0
+        self._lock = threading.Lock()
+
+    def observe(self, v):
+        i = bisect.bisect_left(self.bounds, v)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += v
+            self.count += 1
+            self._ring[self._ring_pos % len(self._ring)] = v
+            self._ring_pos += 1
+
+    def recent_quantiles(self, quantiles=QUANTILES):
+        with self._lock:
+            n = min(self._ring_pos, len(self._ring))
+            values = sorted(self._ring[:n])
+        if not values:
+            return {}
+        return {q: values[min(n - 1, int(q * n))] for q in quantiles}
+
+    def samples(self):
+        cumulative = 0
+        for bound, c in zip(self.bounds + (float("inf"),), self.counts):
+            cumulative += c
+            yield self.name + "_bucket", dict(self.labels, le=_format_value(bound)), cumulative
+        yield self.name + "_sum", self.labels, self.sum
+        yield self.name + "_count", self.labels, self.count
+
+
+class RateMeter:
+    """Olay hızı (ör. FPS), üstel hareketli ortalama ile."""
+
+    def __init__(self, alpha=0.1):
+        self.alpha = alpha
+        self.rate = 0.0
+        self._last = None
+
+    def tick(self, now=None):
+        now = time.monotonic() if now is None else now
+        if self._last is not None and now > self._last:
+            r = 1.0 / (now - self._last)
+            self.rate = r if self.rate == 0 else (1 - self.alpha) * self.rate + self.alpha * r
+        self._last = now
+
+    def value(self, stale_after=2.0):
+        """`stale_after` saniyedir olay yoksa 0."""
+        if self._last is None or time.monotonic() - self._last > stale_after:
+            return 0.0
+        return self.rate
+
+
+class Registry:
+    def __init__(self, prefix=""):
+        self.prefix = prefix
+        self._metrics = []
+
+    def _add(self, metric):
+        metric.name = self.prefix + metric.name
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=None):
+        return self._add(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=None, fn=None, label=None):
+        return self._add(Gauge(name, help_text, labels, fn, label))
+
+    def histogram(self, name, help_text, labels=None, bounds=DEFAULT_BOUNDS, window=512):
+        return self._add(Histogram(name, help_text, labels, bounds, window))
+
+    def render(self):
+        """Prometheus metin biçimi (0.0.4); aynı isimli metrikler tek aile altında."""
+        families = {}
+        for m in self._metrics:
+            families.setdefault(m.name, []).append(m)
+        lines = []
+        for name, members in families.items():
+            lines.append(f"# HELP {name} {members[0].help}")
+            lines.append(f"# TYPE {name} {members[0].kind}")
+            for m in members:
+                for sample, labels, value in m.samples():
+                    lines.append(f"{sample}{_format_labels(labels)} {_format_value(value)}")
+        # Histogramların kayan yüzdelikleri ayrı bir gösterge ailesi olarak
+        for name, members in families.items():
+            if members[0].kind != "histogram":
+                continue
+            lines.append(f"# HELP {name}_recent Son ölçümlerden hesaplanan yüzdelikler")
+            lines.append(f"# TYPE {name}_recent gauge")
+            for m in members:
+                for q, v in m.recent_quantiles().items():
+                    lines.append(f"{name}_recent{_format_labels(m.labels, {'quantile': q})} {_format_value(v)}")
+        return "\n".join(lines) + "\n"
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
@@ -0,0 +1,90 @@
+# mjpeg.py
+# /stream için tek kodlama, çok izleyici MJPEG yayını
+import threading
+import time
+
+import cv2
+
+
+class MjpegBroadcaster:
+    """
+    Her yeni kare en fazla bir kez JPEG'e çevrilir ve aynı baytlar tüm izleyicilere gider.
+    İzleyiciler sıra numarası üzerinden koşul değişkeninde bekler (yoklama yok);
+    yavaş izleyici ara kareleri atlar, her zaman en yenisini alır.
+    Kodlama sadece izleyici varken ve ilk ihtiyaç duyan izleyicinin thread'inde yapılır.
+    """
+
+    def __init__(self, max_viewers=4, quality=80):
+        self.max_viewers = max_viewers
+        self.quality = quality
+        self.viewers = 0
+        self.encoded = 0
+        self._frame = None
+        self._seq = 0
+        self._chunk = None
+        self._chunk_seq = 0
+        self._cond = threading.Condition()
+        self._encode_lock = threading.Lock()
+
+    def publish(self, frame):
+        """Yeni kareyi yayınlar. Kare bundan sonra değiştirilmemelidir."""
+        with self._cond:
+            self._frame = frame
+            self._seq += 1
+            self._cond.notify_all()
+
+    def full(self):
+        with self._cond:
+            return self.viewers >= self.max_viewers
+
+    def try_subscribe(self):
+        with self._cond:
+            if self.viewers >= self.max_viewers:
+                return False
+            self.viewers += 1
+            return True
+
+    def unsubscribe(self):
+        with self._cond:
+            self.viewers -= 1
+
+    def _latest_chunk(self):
+        with self._encode_lock:
+            with self._cond:
+                seq, frame = self._seq, self._frame
+            if self._chunk_seq < seq:
+                ok, buffer = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), self.quality])
+                if ok:
+                    self._chunk = (
+                        b'--frame\r\n'
+                        b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n'
+                    )
+                    self.encoded += 1
+                self._chunk_seq = seq
+            return self._chunk_seq, self._chunk
+
+    def frames(self, idle_timeout=1.0, max_idle=30.0):
+        """
+        multipart parçalarını üretir. İzleyici yuvası ilk iterasyonda alınır (yer yoksa üreteç
+        hemen biter), üreteç kapanınca bırakılır. Yeni kare gelmezse her idle_timeout'ta son
+        parça yeniden gönderilir: kopan istemci yazma hatasıyla en geç o zaman fark edilir.
+        max_idle boyunca yeni kare gelmezse yayın biter.
+        """
+        if not self.try_subscribe():
+            return
+        last_seq, chunk = 0, None
+        idle_since = time.monotonic()
+        try:
+            while True:
+                with self._cond:
+                    if self._seq <= last_seq:
+                        self._cond.wait(idle_timeout)
+                    fresh = self._seq > last_seq
+                if fresh:
+                    last_seq, chunk = self._latest_chunk()
+                    idle_since = time.monotonic()
+                elif time.monotonic() - idle_since > max_idle:
+                    return
+                yield chunk if chunk is not None else b"\r\n"  # kare yoksa yalnız canlı tutma
+        finally:
+            self.unsubscribe()
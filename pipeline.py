@@ -0,0 +1,152 @@
+# pipeline.py
+# Aşamalar (okuma → decode → çıkarım → yanıt) arasında kullanılan kuyruklar
+import collections
+import threading
+import time
+
+
+# ---------- EN YENİ KAZANIR KUYRUK ----------
+class LatestQueue:
+    """
+    Sınırlı kuyruk: dolduğunda en eski öğe atılır, tüketici hiçbir zaman
+    eski karelerin arkasında beklemez. Atılan öğe sayısı `dropped` içinde tutulur;
+    `on_drop` verilirse atılan öğe ile çağrılır (ör. tamponu havuza iade etmek için).
+    """
+
+    def __init__(self, maxsize=1, on_drop=None):
+        self.maxsize = maxsize
+        self.on_drop = on_drop
+        self.dropped = 0
+        self.closed = False
+        self._items = collections.deque()
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        old = None
+        with self._cond:
+            if self.closed:
+                return
+            if len(self._items) >= self.maxsize:
+                old = self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+        if old is not None and self.on_drop is not None:
+            self.on_drop(old)
+
+    def get(self, timeout=None):
+        """En eski (kuyruktaki) öğeyi döndürür; kuyruk kapatıldıysa None."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self._items:
+                if self.closed:
+                    return None
+                if deadline is None:
+                    self._cond.wait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    self._cond.wait(remaining)
+            return self._items.popleft()
+
+    def get_nowait(self):
+        with self._cond:
+            return self._items.popleft() if self._items else None
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._items)
+
+
+# ---------- UÇUŞTAKİ KARE PENCERESİ (client) ----------
+class InFlightWindow:
+    """
+    Yanıtı beklenen kare sayısını `depth` ile sınırlar.
+    Sunucu yanıtları kümülatif onaydır: frame_id=N gelince N ve öncesi tamamlanmış sayılır
+    (sunucunun eski diye attığı kareler de böylece kapanır).
+    """
+
+    def __init__(self, depth=1):
+        self.depth = max(1, depth)
+        self.next_id = 0
+        self.acked = -1
+        self.skipped = 0  # yanıtı hiç gelmeden (sunucuda eski diye atılarak) kapanan kareler
+        self.lost = 0     # expire() ile kayıp sayılan kareler (UDP)
+        self.closed = False
+        self._sent_at = {}
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout=None):
+        """Pencerede yer açılana kadar bekler, yeni kare id'sini döndürür (kapalıysa None)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self.in_flight() >= self.depth:
+                if self.closed:
+                    return None
+                if deadline is None:
+                    self._cond.wait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    self._cond.wait(remaining)
+            if self.closed:
+                return None
+            frame_id = self.next_id
+            self.next_id += 1
+            self._sent_at[frame_id] = time.monotonic()
+            return frame_id
+
+    def ack(self, frame_id=None):
+        """Yanıt gelen kareyi onaylar, gidiş-dönüş süresini (sn) döndürür."""
+        with self._cond:
+            if frame_id is None:  # frame_id göndermeyen eski sunucu: sıradaki kare
+                frame_id = self.acked + 1
+            if frame_id <= self.acked:
+                return None
+            self.skipped += frame_id - self.acked - 1
+            for fid in range(self.acked + 1, frame_id):
+                self._sent_at.pop(fid, None)
+            sent_at = self._sent_at.pop(frame_id, None)
+            self.acked = frame_id
+            self._cond.notify_all()
+        return None if sent_at is None else time.monotonic() - sent_at
+
+    def expire(self, max_age):
+        """
+        `max_age` saniyedir yanıtı gelmeyen kareleri (ve öncesini) kayıp sayıp kapatır;
+        kayıplı taşımada pencerenin sonsuza dek dolu kalmasını engeller. Kapatılan sayısı döner.
+        """
+        with self._cond:
+            now = time.monotonic()
+            stale = [fid for fid, sent_at in self._sent_at.items() if now - sent_at > max_age]
+            if not stale:
+                return 0
+            last = max(stale)
+            n = last - self.acked
+            for fid in range(self.acked + 1, last + 1):
+                self._sent_at.pop(fid, None)
+            self.acked = last
+            self.lost += n
+            self._cond.notify_all()
+        return n
+
+    def in_flight(self):
+        return self.next_id - self.acked - 1
+
+    def oldest_age(self):
+        """Yanıtı beklenen en eski karenin yaşı (sn); bekleyen yoksa 0."""
+        with self._cond:
+            if not self._sent_at:
+                return 0.0
+            return time.monotonic() - min(self._sent_at.values())
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
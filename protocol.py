@@ -0,0 +1,194 @@
+# protocol.py
+# Sunucu yanıtları: eski JSON biçimi + isteğe bağlı sabit boyutlu ikili biçim ve el sıkışma
+#
+# El sıkışma: istemci bağlandıktan sonra ilk çerçeve olarak HELLO_MAGIC + JSON
+# {"version": 1, "formats": ["binary", "json"]} gönderir. JPEG FF D8 ile başladığı için
+# sunucu ikisini karıştırmaz. Sunucu JSON {"status": "hello", "format": ..., "classes": [...]}
+# ile yanıt verir. El sıkışma yapmayan eski istemciler JSON yanıt almaya devam eder.
+#
+# İkili yanıt: RESULT_HEADER (frame_id, sunucu alış ns, sunucu gönderiş ns, adet)
+# ardından adet x DETECTION_DTYPE kaydı (küçük endian).
+#
+# Sınıf süzgeci: el sıkışmada sunucu "filter": true bildirdiyse istemci istediği an
+# FILTER_MAGIC + JSON {"classes": ["car", "person"]} (null = tüm sınıflar) gönderebilir.
+# Bu çerçeve kare sayılmaz ve yanıtlanmaz; sunucu sonraki karelerde yalnız bu sınıflar
+# için NMS ve serileştirme yapar.
+#
+# Kalp atışı: el sıkışmada sunucu "heartbeat": true bildirdiyse istemci HEARTBEAT_MAGIC +
+# gönderim anı (">Q" ns) gönderebilir; sunucu aynı çerçeveyi geri yollar. Kare sayılmaz.
+# İki uç da bağlantının canlı olduğunu kare akışı dursa bile böylece bilir.
+import json
+import struct
+
+import numpy as np
+
+HELLO_MAGIC = b"HELO"
+FILTER_MAGIC = b"FILT"
+HEARTBEAT_MAGIC = b"BEAT"
+PROTOCOL_VERSION = 1
+FORMAT_JSON = "json"
+FORMAT_BINARY = "binary"
+SUPPORTED_FORMATS = (FORMAT_BINARY, FORMAT_JSON)
+
+RESULT_HEADER = struct.Struct("<IQQH")
+HEARTBEAT = struct.Struct(">Q")
+DETECTION_DTYPE = np.dtype([
+    ("cls", "<u2"),
+    ("conf", "<f4"),
+    ("dx", "<i2"),
+    ("dy", "<i2"),
+    ("area", "<u4"),
+    ("x1", "<i2"),
+    ("y1", "<i2"),
+    ("x2", "<i2"),
+    ("y2", "<i2"),
+])
+
+
+# ---------- SINIF TABLOSU ----------
+class ClassTable:
+    """
+    Sınıf adı <-> id eşlemesi. İkili modda sunucudan bir kez gelir; JSON modunda
+    gördükçe yeni id verilir, böylece istemci her karede metin karşılaştırmaz.
+    """
+
+    def __init__(self, names=None):
+        self.names = list(names or [])
+        self._ids = {name: i for i, name in enumerate(self.names)}
+
+    def id_of(self, name, add=True):
+        if name is None:
+            return None
+        cls = self._ids.get(name)
+        if cls is None and add:
+            cls = len(self.names)
+            self.names.append(name)
+            self._ids[name] = cls
+        return cls
+
+    def name_of(self, cls):
+        return self.names[cls] if 0 <= cls < len(self.names) else str(cls)
+
+
+# ---------- EL SIKIŞMA ----------
+def make_hello(formats=SUPPORTED_FORMATS):
+    return HELLO_MAGIC + json.dumps({"version": PROTOCOL_VERSION, "formats": list(formats)}).encode('utf-8')
+
+def parse_hello(payload):
+    """Çerçeve bir el sıkışma ise sözlüğü, değilse (ör. JPEG) None döndürür."""
+    if bytes(payload[:len(HELLO_MAGIC)]) != HELLO_MAGIC:
+        return None
+    try:
+        return json.loads(str(payload[len(HELLO_MAGIC):], 'utf-8'))
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return {}
+
+def choose_format(hello):
+    for fmt in hello.get("formats", []):
+        if fmt in SUPPORTED_FORMATS:
+            return fmt
+    return FORMAT_JSON
+
+def make_hello_reply(fmt, names):
+    return json.dumps({
+        "status": "hello",
+        "version": PROTOCOL_VERSION,
+        "format": fmt,
+        "classes": list(names),
+        "filter": True,
+        "heartbeat": True,
+    }).encode('utf-8')
+
+
+# ---------- SINIF SÜZGECİ ----------
+def make_filter(names):
+    """names: sınıf adları listesi veya None (tüm sınıflar)."""
+    return FILTER_MAGIC + json.dumps({"classes": None if names is None else list(names)}).encode('utf-8')
+
+def parse_filter(payload):
+    """Çerçeve süzgeç ise (True, adlar veya None), değilse (False, None) döndürür."""
+    if bytes(payload[:len(FILTER_MAGIC)]) != FILTER_MAGIC:
+        return False, None
+    try:
+        return True, json.loads(str(payload[len(FILTER_MAGIC):], 'utf-8')).get("classes")
+    except (json.JSONDecodeError, UnicodeDecodeError, AttributeError):
+        return True, None
+
+
+# ---------- KALP ATIŞI ----------
+def make_heartbeat(sent_ns):
+    return HEARTBEAT_MAGIC + HEARTBEAT.pack(sent_ns)
+
+def parse_heartbeat(payload):
+    """Çerçeve kalp atışı ise gönderim anını (ns), değilse None döndürür."""
+    if len(payload) != len(HEARTBEAT_MAGIC) + HEARTBEAT.size or bytes(payload[:len(HEARTBEAT_MAGIC)]) != HEARTBEAT_MAGIC:
+        return None
+    return HEARTBEAT.unpack_from(payload, len(HEARTBEAT_MAGIC))[0]
+
+
+# ---------- KAYITLAR ----------
+def empty_records(n=0):
+    return np.zeros(n, dtype=DETECTION_DTYPE)
+
+def records_to_json_list(records, names):
+    return [
+        {
+            "etiket": names[int(r["cls"])],
+            "conf": round(float(r["conf"]), 2),
+            "dx": int(r["dx"]),
+            "dy": int(r["dy"]),
+            "alan": int(r["area"]),
+        }
+        for r in records
+    ]
+
+def json_list_to_records(hedefler, table):
+    records = empty_records(len(hedefler))
+    for i, hedef in enumerate(hedefler):
+        records[i]["cls"] = table.id_of(hedef.get("etiket"))
+        records[i]["conf"] = hedef.get("conf", 0.0)
+        records[i]["dx"] = hedef.get("dx", 0)
+        records[i]["dy"] = hedef.get("dy", 0)
+        records[i]["area"] = hedef.get("alan", 0)
+    return records
+
+def scale_records(records, factor):
+    """Piksel alanlarını `factor` ile ölçekler (alan factor² ile); yeni dizi döndürür."""
+    out = records.copy()
+    for field in ("dx", "dy", "x1", "y1", "x2", "y2"):
+        out[field] = np.round(records[field] * factor)
+    out["area"] = np.round(records["area"] * factor * factor)
+    return out
+
+def offset_records(records, x, y, dx, dy):
+    """Kırpılmış karenin kayıtlarını tam kareye taşır: kutulara (x, y), merkez farklarına (dx, dy) eklenir."""
+    out = records.copy()
+    out["x1"] += x
+    out["x2"] += x
+    out["y1"] += y
+    out["y2"] += y
+    out["dx"] += dx
+    out["dy"] += dy
+    return out
+
+
+# ---------- KODLAMA / ÇÖZME ----------
+def encode_json(frame_id, records, names):
+    response = {"status": "hedefler", "frame_id": frame_id, "hedefler": records_to_json_list(records, names)}
+    return json.dumps(response).encode('utf-8')
+
+def encode_binary(frame_id, recv_ns, send_ns, records):
+    records = np.ascontiguousarray(records, dtype=DETECTION_DTYPE)
+    return RESULT_HEADER.pack(frame_id & 0xFFFFFFFF, recv_ns, send_ns, len(records)) + records.tobytes()
+
+def decode_binary(payload):
+    """(frame_id, recv_ns, send_ns, records) döndürür; kayıtlar `payload` üzerine kopyasız bakıştır."""
+    frame_id, recv_ns, send_ns, count = RESULT_HEADER.unpack_from(payload)
+    records = np.frombuffer(payload, dtype=DETECTION_DTYPE, count=count, offset=RESULT_HEADER.size)
+    return frame_id, recv_ns, send_ns, records
+
+def decode_json(payload, table):
+    """(komut sözlüğü, kayıtlar) döndürür."""
+    command = json.loads(str(payload, 'utf-8'))
+    records = json_list_to_records(command.get("hedefler", []), table) if command.get("status") == "hedefler" else empty_records()
+    return command, records
@@ -0,0 +1,123 @@
+# rate_controller.py
+# Drone client için kapalı döngü gönderim hızı / JPEG kalitesi / ölçek denetleyicisi
+import struct
+import time
+
+try:
+    import fcntl
+    import termios
+except ImportError:  # Windows
+    fcntl = termios = None
+
+MODE_FIXED = "fixed"
+MODE_ADAPTIVE = "adaptive"
+
+
+def send_backlog(sock):
+    """Soketin gönderim kuyruğunda bekleyen bayt (Linux SIOCOUTQ); desteklenmiyorsa None."""
+    if fcntl is None:
+        return None
+    try:
+        buf = fcntl.ioctl(sock.fileno(), termios.TIOCOUTQ, b"\0\0\0\0")
+        return struct.unpack("i", buf)[0]
+    except (OSError, AttributeError, ValueError):
+        return None
+
+
+class RateController:
+    """
+    Ölçülen gidiş-dönüş süresi, sunucu çıkarım süresi ve soket gönderim kuyruğuna göre
+    gönderim hızını, JPEG kalitesini ve (izin verilirse) küçültme ölçeğini ayarlar;
+    hedef gecikme bütçesini (`target_latency`) tutmaya çalışır.
+
+    - Gecikmenin çoğu sunucudaysa kalite düşürmek işe yaramaz: sadece FPS ayarlanır.
+    - Ağ kaynaklıysa önce kalite, sonra ölçek, en son FPS düşürülür; toparlanınca ters sırayla artırılır.
+    MODE_FIXED bugünkü davranışı (sabit FPS ve kalite) birebir verir.
+    """
+
+    def __init__(self, mode=MODE_FIXED, fps=7, quality=60, scale=1.0, target_latency=0.15,
+                 min_fps=2, max_fps=15, min_quality=30, max_quality=80, min_scale=1.0,
+                 backlog_limit=64 * 1024, adjust_interval=0.5, log=None):
+        self.mode = mode
+        self.fps = fps
+        self.quality = quality
+        self.scale = scale
+        self.target_latency = target_latency
+        self.min_fps, self.max_fps = min_fps, max_fps
+        self.min_quality, self.max_quality = min_quality, max_quality
+        self.min_scale = min_scale
+        self.backlog_limit = backlog_limit
+        self.adjust_interval = adjust_interval
+        self.log = log
+        self.latency = None     # gidiş-dönüş EMA (sn)
+        self.server_time = None # sunucu içi süre EMA (sn)
+        self.backlog = 0
+        self.decisions = 0
+        self._last_adjust = 0.0
+
+    @property
+    def frame_delay(self):
+        return 1.0 / self.fps
+
+    def observe_backlog(self, nbytes):
+        if nbytes is not None:
+            self.backlog = nbytes
+
+    def observe_reply(self, rtt, server_time=None):
+        """Her yanıtta çağrılır; rtt: gönderimden yanıta (sn)."""
+        if rtt is None:
+            return
+        self.latency = rtt if self.latency is None else 0.8 * self.latency + 0.2 * rtt
+        if server_time is not None:
+            self.server_time = server_time if self.server_time is None else 0.8 * self.server_time + 0.2 * server_time
+        if self.mode != MODE_ADAPTIVE:
+            return
+        now = time.monotonic()
+        if now - self._last_adjust < self.adjust_interval:
+            return
+        self._last_adjust = now
+        self._adjust()
+
+    def _adjust(self):
+        old = (self.fps, self.quality, self.scale)
+        server_bound = self.server_time is not None and self.server_time > 0.7 * self.latency
+        overloaded = self.latency > self.target_latency or self.backlog > self.backlog_limit
+        underloaded = self.latency < 0.6 * self.target_latency and self.backlog < self.backlog_limit // 4
+
+        if overloaded:
+            if server_bound:
+                self.fps = max(self.min_fps, self.fps * 0.8)
+            elif self.quality > self.min_quality:
+                self.quality = max(self.min_quality, self.quality - 10)
+            elif self.scale > self.min_scale:
+                self.scale = max(self.min_scale, round(self.scale * 0.75, 2))
+            else:
+                self.fps = max(self.min_fps, self.fps * 0.8)
+        elif underloaded:
+            if server_bound or self.fps < self.max_fps and self.quality >= self.max_quality:
+                self.fps = min(self.max_fps, self.fps + 1)
+            elif self.scale < 1.0:
+                self.scale = min(1.0, round(self.scale / 0.75, 2))
+            elif self.quality < self.max_quality:
+                self.quality = min(self.max_quality, self.quality + 5)
+            else:
+                self.fps = min(self.max_fps, self.fps + 1)
+
+        if (self.fps, self.quality, self.scale) != old:
+            self.decisions += 1
+            if self.log is not None:
+                self.log(
+                    f"📶 Oran ayarı: {old[0]:.1f}→{self.fps:.1f} FPS, kalite {old[1]}→{self.quality}, "
+                    f"ölçek {old[2]}→{self.scale} (gecikme {self.latency * 1000:.0f} ms, "
+                    f"kuyruk {self.backlog} B{', sunucu sınırlı' if server_bound else ''})",
+                    "info",
+                )
+
+    def state(self):
+        return {
+            "fps": self.fps,
+            "quality": self.quality,
+            "scale": self.scale,
+            "latency_ms": (self.latency or 0.0) * 1000,
+            "backlog_bytes": self.backlog,
+        }
@@ -0,0 +1,170 @@
+# replay.py
+# Uçuş kaydını (flight_recorder) control.send_yaw_control / send_position_control üzerinden
+# yeniden oynatır. Araç yerine StubVehicle, PID saati kayıttaki zamanlardır; böylece
+# PID sabitleri uçmadan, gerçek zamandan hızlı denenebilir.
+#
+# Kullanım:
+#   python replay.py recordings/flight_20250101_120000.rec
+#   python replay.py ucus.rec --p-yaw 0.25 --kz 0.0008 --out yeni.json --baseline eski.json
+#   python replay.py ucus.rec --speed 1            (gerçek zamanlı)
+#   python replay.py ucus.rec --export-frames kareler/
+import argparse
+import contextlib
+import json
+import os
+import time
+
+import numpy as np
+
+import control
+import drone_control
+from flight_recorder import CONTROL_POSITION, CONTROL_YAW, FlightRecording
+from stub_vehicle import StubVehicle
+
+# Komut satırından ayarlanabilen control sabitleri: (argüman, control değişkeni)
+TUNABLES = (
+    ("p_yaw", "P_YAW"), ("i_yaw", "I_YAW"), ("d_yaw", "D_YAW"),
+    ("p_roll", "P_ROLL"), ("i_roll", "I_ROLL"), ("d_roll", "D_ROLL"),
+    ("kx", "K_X"), ("ky", "K_Y"), ("kz", "K_Z"), ("area_ref", "AREA_REF"),
+)
+
+
+class OutputCollector:
+    """control.recorder yerine geçer; oynatmada üretilen yeni çıktıları toplar."""
+
+    def __init__(self):
+        self.yaw = []
+        self.velocity = []
+
+    def record_yaw(self, dx, yaw):
+        self.yaw.append(yaw)
+
+    def record_position(self, dx, dy, area, vx, vy, vz):
+        self.velocity.append((vx, vy, vz))
+
+
+def series_stats(new, old):
+    new, old = np.asarray(new, dtype=float), np.asarray(old, dtype=float)
+    if len(new) == 0:
+        return None
+    diff = new - old
+    return {
+        "rms": float(np.sqrt(np.mean(new ** 2))),
+        "kayit_rms": float(np.sqrt(np.mean(old ** 2))),
+        "fark_rms": float(np.sqrt(np.mean(diff ** 2))),
+        "fark_maks": float(np.max(np.abs(diff))),
+        # Ardışık komutlar arası değişim: titreşim göstergesi
+        "titresim": float(np.sqrt(np.mean(np.diff(new, axis=0) ** 2))) if len(new) > 1 else 0.0,
+        "kayit_titresim": float(np.sqrt(np.mean(np.diff(old, axis=0) ** 2))) if len(old) > 1 else 0.0,
+    }
+
+
+def replay(recording, speed=0.0):
+    t, _, records = recording.controls()
+    if len(records) == 0:
+        return None
+
+    drone_control.vehicle = StubVehicle()
+    control.configure_PID()
+    clock = [t[0]]
+    for pid in (control.pidYaw, control.pidRoll):
+        pid.time_fn = lambda: clock[0]
+        pid.reset()
+    control.reset_filters()
+    collector = OutputCollector()
+    previous, control.recorder = control.recorder, collector
+
+    started = time.perf_counter()
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for ts, rec in zip(t, records):
+                clock[0] = ts
+                if speed > 0:
+                    time.sleep(max(0.0, (ts - t[0]) / speed - (time.perf_counter() - started)))
+                if rec["axis"] == CONTROL_YAW:
+                    control.send_yaw_control(int(rec["dx"]))
+                else:
+                    control.send_position_control(int(rec["dx"]), int(rec["dy"]), int(rec["area"]))
+    finally:
+        control.recorder = previous
+    elapsed = time.perf_counter() - started
+
+    yaw_rec = records[records["axis"] == CONTROL_YAW]
+    pos_rec = records[records["axis"] == CONTROL_POSITION]
+    old_velocity = np.stack([pos_rec["vx"], pos_rec["vy"], pos_rec["vz"]], axis=1)
+    return {
+        "komut": len(records),
+        "kayit_suresi_sn": float(t[-1] - t[0]),
+        "oynatma_sn": elapsed,
+        "hizlanma": float(t[-1] - t[0]) / elapsed if elapsed > 0 else None,
+        "ort_abs_dx": float(np.mean(np.abs(records["dx"]))),
+        "yaw": series_stats(collector.yaw, yaw_rec["yaw"]),
+        "hiz": series_stats(collector.velocity, old_velocity),
+    }
+
+
+def export_frames(recording, directory):
+    os.makedirs(directory, exist_ok=True)
+    n = 0
+    for frame_id, _, jpeg in recording.frames():
+        with open(os.path.join(directory, f"frame_{frame_id:06d}.jpg"), "wb") as f:
+            f.write(jpeg)
+        n += 1
+    return n
+
+
+def compare(result, baseline):
+    print("📊 Önceki oynatmaya göre:")
+    for axis in ("yaw", "hiz"):
+        old, new = baseline.get(axis), result.get(axis)
+        if old and new:
+            for key in ("rms", "titresim"):
+                print(f"  {axis:<4} {key:<9} {old[key]:8.4f} → {new[key]:8.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Uçuş kaydını control.* üzerinden yeniden oynat")
+    parser.add_argument("recording")
+    parser.add_argument("--speed", type=float, default=0.0, help="0 = olabildiğince hızlı, 1 = gerçek zaman")
+    for arg, name in TUNABLES:
+        parser.add_argument(f"--{arg.replace('_', '-')}", dest=arg, type=float, default=None,
+                            help=f"control.{name} (varsayılan {getattr(control, name)})")
+    parser.add_argument("--out", default=None, help="sonuç JSON dosyası")
+    parser.add_argument("--baseline", default=None, help="karşılaştırılacak önceki oynatma sonucu")
+    parser.add_argument("--export-frames", default=None, help="JPEG kareleri bu klasöre çıkar")
+    args = parser.parse_args()
+
+    params = {}
+    for arg, name in TUNABLES:
+        value = getattr(args, arg)
+        if value is not None:
+            setattr(control, name, value)
+        params[name] = getattr(control, name)
+
+    recording = FlightRecording(args.recording)
+    print(f"📼 {args.recording}: {len(recording)} kayıt")
+    if args.export_frames:
+        print(f"🖼️ {export_frames(recording, args.export_frames)} kare → {args.export_frames}")
+
+    result = replay(recording, args.speed)
+    if result is None:
+        print("⚠️ Kayıtta control komutu yok")
+        return
+    result["parametreler"] = params
+    print(f"✅ {result['komut']} komut, {result['kayit_suresi_sn']:.1f} sn kayıt {result['oynatma_sn']:.2f} sn'de "
+          f"oynatıldı (x{result['hizlanma']:.0f})")
+    for axis in ("yaw", "hiz"):
+        st = result[axis]
+        if st:
+            print(f"   {axis:<4} rms {st['rms']:.4f} (kayıt {st['kayit_rms']:.4f}), fark rms {st['fark_rms']:.4f}, "
+                  f"titreşim {st['titresim']:.4f} (kayıt {st['kayit_titresim']:.4f})")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(result, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,29 @@
+import argparse
+import collections
+import os
 import socket
-import struct
+import sys
 import cv2
 import numpy as np
-import json
 import threading
-from flask import Flask, Response
-from ultralytics import YOLO
+import selectors
+import time
+from flask import Flask, Response, jsonify
+from pipeline import LatestQueue
+from batching import FrameBatcher
+from mjpeg import MjpegBroadcaster
+from framing import BufferPool, FrameAssembler, send_frame
+from frame_trace import (SERVER_SPANS, SERVER_STAGES, SRV_DECODE_START, SRV_DECODED, SRV_INFER_END,
+                         SRV_INFER_START, SRV_SENT, FrameTrace, SpanRecorder)
+from metrics import PROMETHEUS_CONTENT_TYPE, Registry
+from tracking import DetectTracker
+from backends import BACKENDS, create_backend, results_to_records
+from inference_pool import InferencePool
+from link_supervisor import Backoff, enable_keepalive
+from tiling import Tiler, roi_from_records
+from protocol import (FORMAT_BINARY, FORMAT_JSON, choose_format, empty_records, encode_binary, encode_json,
+                      make_hello_reply, parse_filter, parse_heartbeat, parse_hello)
+from udp_transport import KIND_DATA, MAX_DATAGRAM, PACKET_VERSION, UdpChannel
 
 FRAME_WIDTH = 640
 FRAME_HEIGHT = 320
@@ -13,108 +31,755 @@ FRAME_CENTER_X = FRAME_WIDTH // 2
 FRAME_CENTER_Y = FRAME_HEIGHT // 2
 HOST = '0.0.0.0'
 PORT = 8000
+# Yerel önizleme penceresi; ekransız (DISPLAY yok) Linux'ta kendiliğinden kapalı
+SHOW_WINDOW = not sys.platform.startswith("linux") or bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
 
-model = YOLO("yolov8s.pt")
-labels = model.names
-latest_frame = None
+LISTEN_BACKLOG = 16
+SEND_TIMEOUT = 2.0
+# Bağlantı denetimi (bkz. link_supervisor.py): kalp atışı gönderen TCP istemcisi bu kadar
+# sessiz kalırsa kapatılır, yarı açık bağlantılar birikmez. Keepalive eski istemciler için de.
+SESSION_TIMEOUT = 5.0
+KEEPALIVE_IDLE = 2       # sn
+KEEPALIVE_INTERVAL = 1   # sn
+KEEPALIVE_COUNT = 3
+
+# Kayba dayanıklı UDP taşıma (bkz. udp_transport.py); TCP ile aynı anda dinlenir. None = kapalı
+UDP_PORT = 8001
+UDP_SESSION_TIMEOUT = 10.0  # sn; bu kadar datagram gelmeyen UDP istemcisi kapatılır
+UDP_READ_BURST = 64         # selector uyanışı başına okunan en fazla datagram
+
+# Aşama kuyruk boyutları (1 = her zaman en yeni kare)
+RAW_QUEUE_SIZE = 1
+RESULT_QUEUE_SIZE = 8
+RENDER_QUEUE_SIZE = 4   # çizim iş parçacığına bekleyen kare (eskiler atılır)
+
+# Toplu çıkarım: ilk kareden sonra diğer drone'lar için en fazla bu kadar beklenir
+MAX_BATCH_SIZE = 8
+MAX_BATCH_WAIT = 0.010  # sn
+STATS_INTERVAL = 5.0    # sn
+
+# /stream: aynı anda en fazla izleyici ve yayın JPEG kalitesi
+MAX_STREAM_VIEWERS = 4
+STREAM_JPEG_QUALITY = 95  # cv2 varsayılanı
+
+# Çıkarım arka ucu: "pytorch", "onnx" veya "openvino" (bkz. backends.py)
+MODEL_BACKEND = "pytorch"
+MODEL_WEIGHTS = "yolov8s.pt"
+MODEL_IMGSZ = 640
+MODEL_INT8 = False
+WARMUP_RUNS = 3  # bağlantı kabul edilmeden önce boş kare ile çıkarım
+
+# Çıkarım işçi süreçleri (bkz. inference_pool.py): 0 = model bu süreçte (tek kopya),
+# N = her biri kendi model kopyasıyla N süreç. Kareler paylaşımlı bellek yuvalarıyla gider.
+INFERENCE_WORKERS = 0
+WORKER_THREADS = None   # işçi başına PyTorch iş parçacığı (None = kütüphane varsayılanı)
+WORKER_PIN_CPUS = False # işçileri ayrı çekirdek kümelerine sabitle (Linux)
+WORKER_DEPTH = 2        # işçi başına bekleyen toplu çağrı
+POOL_SUBMIT_TIMEOUT = 2.0  # sn; hazır/boş işçi bu sürede bulunamazsa toplu çağrı başarısız sayılır
+
+# Bu güvenin altındaki kutular modelin içinde (NMS'ten önce) elenir
+CONF_THRESHOLD = 0.4
+
+# Döşemeli çıkarım (bkz. tiling.py): kare TILE_SIZE px örtüşen döşemelere bölünür, her döşeme
+# MODEL_IMGSZ'e büyütülür (320 px döşeme + 640 imgsz ≈ tam karede imgsz 1280). 0 = kapalı.
+TILE_SIZE = 0
+TILE_OVERLAP = 0.2
+TILE_FULL_FRAME = True   # döşemelerle aynı toplu çağrıda tam kare (büyük hedefler için)
+TILE_MERGE_THRESHOLD = 0.5
+TILE_ROI = False         # döşemeler son tespitlerin çevresiyle sınırlanır
+TILE_ROI_MARGIN = 2.0    # hedef kutusunun katı
+TILE_ROI_TTL = 5         # bu kadar tespitte hedef görülmezse tüm kareye dönülür
+
+# Tespit + takip: tam çıkarım her N karede bir (veya takip güveni düşünce), arada
+# kutular optik akışla taşınır. N hareket azaldıkça MAX'a, arttıkça MIN'e yaklaşır.
+# Sınır: takip edilen karelerde kadraja YENİ giren insan görülmez. İlk tespite kadar geçen
+# süre en fazla DETECT_MAX_AGE (+ bir çıkarım süresi); 7 FPS'te DETECT_INTERVAL_MAX = 4 kare
+# ≈ 0.57 sn olduğundan pratikte DETECT_MAX_AGE belirleyicidir. Güvenlik durdurmasının
+# gecikmesini artırmamak için bu değerleri büyütmeyin.
+TRACKING = False
+DETECT_INTERVAL_MIN = 2
+DETECT_INTERVAL_MAX = 4
+DETECT_MAX_AGE = 0.5  # sn
+
+# Model yolo_server() başlarken load_model() ile yüklenir
+model = None
+pool = None
+tiler = None
+labels = {}
+class_names = []
+class_ids = {}
+broadcaster = MjpegBroadcaster(MAX_STREAM_VIEWERS, STREAM_JPEG_QUALITY)
 
 app = Flask(__name__)
 
 @app.route("/stream")
 def stream():
-    def generate():
-        global latest_frame
-        while True:
-            if latest_frame is None:
-                continue
-            _, buffer = cv2.imencode('.jpg', latest_frame)
-            frame = buffer.tobytes()
-            yield (
-                b'--frame\r\n'
-                b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n'
-            )
-    return Response(generate(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    if broadcaster.full():  # yuva üreteç ilk çalıştığında alınır (bkz. MjpegBroadcaster.frames)
+        return Response("İzleyici sınırına ulaşıldı", status=503)
+    return Response(broadcaster.frames(), mimetype='multipart/x-mixed-replace; boundary=frame')
 
-def yolo_server():
-    global latest_frame
-    while True:  # Sonsuz tekrar döngüsü (bağlantı koparsa tekrar accept)
-        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        server_socket.bind((HOST, PORT))
-        server_socket.listen(1)
-        print(f"🚀 Server başlatıldı: {HOST}:{PORT}, bağlantı bekleniyor...")
-
-        conn, addr = server_socket.accept()
-        print(f"📡 Bağlantı alındı: {addr}")
-        buffer = b""
+# ---------- İSTEMCİ OTURUMU ----------
+class ClientStats:
+    """İstemci başına FPS ve kuyruk gecikmesi (alındı → çıkarım başladı)."""
+
+    def __init__(self):
+        self.received = 0
+        self.responded = 0
+        self.fps = 0.0
+        self.queue_delay_ms = 0.0
+        self.batch_size = 0
+        self.inferred = 0
+        self.tracked = 0
+        self._last_response = None
+
+    def on_inference(self, queue_delay, batch_size):
+        ms = queue_delay * 1000
+        self.queue_delay_ms = 0.9 * self.queue_delay_ms + 0.1 * ms if self.queue_delay_ms else ms
+        self.batch_size = batch_size
+
+    def on_response(self):
+        now = time.monotonic()
+        if self._last_response is not None and now > self._last_response:
+            fps = 1.0 / (now - self._last_response)
+            self.fps = 0.9 * self.fps + 0.1 * fps if self.fps else fps
+        self._last_response = now
+        self.responded += 1
+
+class ClientSession:
+    """conn: TCP bağlantısı; UDP istemcisinde conn None, yanıtlar `channel` üzerinden gider."""
+
+    def __init__(self, conn, addr, channel=None):
+        self.conn = conn
+        self.addr = addr
+        self.channel = channel
+        self.name = f"{addr[0]}:{addr[1]}" if channel is None else f"udp:{addr[0]}:{addr[1]}"
+        self.last_seen = time.monotonic()
+        self.assembler = FrameAssembler(frame_pool)
+        self.next_frame_id = 0
+        self.fmt = FORMAT_JSON
+        self.classes = None  # istemcinin istediği sınıf id'leri (None = hepsi)
+        self.raw_q = LatestQueue(RAW_QUEUE_SIZE, on_drop=lambda item: frame_pool.release(item[2]))
+        self.result_q = LatestQueue(RESULT_QUEUE_SIZE)
+        self.stats = ClientStats()
+        self.trace = FrameTrace(capacity=64, stages=SERVER_STAGES)
+        self.trace.add_listener(server_spans)
+        self.tracker = DetectTracker(DETECT_INTERVAL_MIN, DETECT_INTERVAL_MAX,
+                                     max_age=DETECT_MAX_AGE) if TRACKING else None
+        self.pending = collections.deque()  # havuzdaki toplu çağrılar (gönderim sırasıyla)
+        self.heartbeats = False  # istemci kalp atışı gönderiyor: sessizlik SESSION_TIMEOUT ile sınırlı
+        self.send_lock = threading.Lock()
+        self.roi = None  # döşemeli çıkarımda hedef bölgesi (TILE_ROI)
+        self.roi_misses = 0
+        self.threads = []
+
+    def on_frame(self, payload, frame_id=None):
+        """frame_id: UDP'de datagram başlığındaki kare id'si; TCP'de bağlantıdaki sıra kullanılır."""
+        if parse_heartbeat(payload) is not None:
+            self.heartbeats = True
+            self.echo(bytes(payload))
+            frame_pool.release(payload)
+            return
+        is_filter, names = parse_filter(payload)
+        if is_filter:
+            frame_pool.release(payload)
+            self.set_classes(names)
+            return
+        if self.stats.received == 0:
+            hello = parse_hello(payload)
+            if hello is not None:
+                # El sıkışma: yanıt biçimi seçilir, sınıf tablosu bir kez gönderilir
+                self.fmt = choose_format(hello)
+                self.send(make_hello_reply(self.fmt, class_names))
+                frame_pool.release(payload)
+                print(f"🤝 {self.name}: yanıt biçimi {self.fmt}")
+                return
+        if frame_id is not None:
+            self.next_frame_id = frame_id
+        now = time.monotonic()
+        self.trace.begin(self.next_frame_id, now)
+        m_received.inc()
+        self.raw_q.put((self.next_frame_id, now, payload))
+        self.next_frame_id += 1
+        self.stats.received += 1
+
+    def send(self, payload, frame_id=None):
+        with self.send_lock:
+            if self.channel is None:
+                send_frame(self.conn, payload)
+            else:
+                self.channel.send(payload, frame_id)
 
+    def echo(self, payload):
+        """
+        Kalp atışını ağ döngüsünden geri yollar. Yanıt aşaması o an gönderiyorsa atlanır:
+        giden yanıt da istemci için canlılık işaretidir, ağ döngüsü beklemez.
+        """
+        if not self.send_lock.acquire(blocking=False):
+            return
         try:
-            while True:
-                while len(buffer) < 4:
-                    recv_data = conn.recv(4096)
-                    if not recv_data:
-                        raise ConnectionError("Bağlantı koptu!")
-                    buffer += recv_data
-                img_size = struct.unpack(">L", buffer[:4])[0]
-                buffer = buffer[4:]
-
-                while len(buffer) < img_size:
-                    recv_data = conn.recv(4096)
-                    if not recv_data:
-                        raise ConnectionError("Bağlantı koptu!")
-                    buffer += recv_data
-                img_data = buffer[:img_size]
-                buffer = buffer[img_size:]
-
-                np_data = np.frombuffer(img_data, dtype=np.uint8)
-                frame = cv2.imdecode(np_data, cv2.IMREAD_COLOR)
-
-                results = model(frame, verbose=False)[0]
-                hedef_listesi = []
-                for box in results.boxes:
-                    if box.conf.item() > 0.4:
-                        cls = int(box.cls.item())
-                        label = labels[cls]
-                        xmin, ymin, xmax, ymax = map(int, box.xyxy.squeeze())
-                        x_center = (xmin + xmax) // 2
-                        y_center = (ymin + ymax) // 2
-                        area = (xmax - xmin) * (ymax - ymin)
-                        dx = x_center - FRAME_CENTER_X
-                        dy = y_center - FRAME_CENTER_Y
-                        hedef = {
-                            "etiket": label,
-                            "conf": round(float(box.conf.item()), 2),
-                            "dx": dx,
-                            "dy": dy,
-                            "alan": area
-                        }
-                        hedef_listesi.append(hedef)
-                        cv2.rectangle(frame, (xmin, ymin), (xmax, ymax), (0, 255, 0), 2)
-                        cv2.putText(frame, f"{label} ({hedef['conf']})", (xmin, ymin - 10),
-                                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
-                cv2.circle(frame, (FRAME_CENTER_X, FRAME_CENTER_Y), 5, (0, 0, 255), -1)
-                latest_frame = frame.copy()
-                response = {"status": "hedefler", "hedefler": hedef_listesi}
-                response_json = json.dumps(response).encode('utf-8')
-                conn.sendall(struct.pack(">L", len(response_json)) + response_json)
-                cv2.imshow("YOLO Server - PC", frame)
-                if cv2.waitKey(1) & 0xFF == ord('q'):
-                    raise KeyboardInterrupt
+            if self.channel is None:
+                send_frame(self.conn, payload)
+            else:
+                self.channel.send(payload)
+            m_heartbeats.inc()
+        except OSError:
+            pass  # bağlantı hatası okuma tarafında görülür
+        finally:
+            self.send_lock.release()
+
+    def set_classes(self, names):
+        if names is None:
+            self.classes = None
+        else:
+            self.classes = np.array(sorted({class_ids[n] for n in names if n in class_ids}), dtype=np.int64)
+        print(f"🎯 {self.name}: sınıf süzgeci {names if names is not None else 'yok (tümü)'}")
+
+    def update_roi(self, records):
+        """Sonraki karenin döşeme bölgesi: son kutuların çevresi; hedef TILE_ROI_TTL kez görülmezse tüm kare."""
+        if len(records):
+            self.roi, self.roi_misses = roi_from_records(records, TILE_ROI_MARGIN), 0
+            return
+        self.roi_misses += 1
+        if self.roi_misses >= TILE_ROI_TTL:
+            self.roi = None
+
+    def close(self):
+        self.raw_q.close()
+
+# ---------- METRİKLER ----------
+metrics_registry = Registry("yolo_")
+server_spans = SpanRecorder(metrics_registry, "stage_seconds",
+                            "Sunucu aşama süreleri (alım → yanıt)", SERVER_SPANS)
+m_received = metrics_registry.counter("frames_received_total", "Alınan kare")
+m_responded = metrics_registry.counter("responses_total", "Gönderilen yanıt")
+m_inferred = metrics_registry.counter("frames_inferred_total", "Tam YOLO çıkarımı yapılan kare")
+m_tracked = metrics_registry.counter("frames_tracked_total", "Çıkarım yapılmadan takiple yanıtlanan kare")
+m_track_fallback = {reason: metrics_registry.counter("tracking_fallbacks_total",
+                                                     "Takip güveni düştüğü için tam tespite dönülen kare",
+                                                     labels={"reason": reason})
+                    for reason in ("points", "frame_exit")}
+m_track_dropped = metrics_registry.counter("tracking_boxes_dropped_total",
+                                           "Yeterli noktası kalmadığı için takipten düşen kutu")
+m_failed = metrics_registry.counter("frames_failed_total", "İşlenemeyip boş yanıtla geçilen kare")
+m_tiles = metrics_registry.counter("tiles_total", "Döşemeli çıkarımda modele verilen pencere (tam kare dahil)")
+m_heartbeats = metrics_registry.counter("heartbeats_echoed_total", "Yankılanan istemci kalp atışı")
+m_expired = metrics_registry.counter("sessions_expired_total", "Sessiz kaldığı için kapatılan oturum")
+m_loop_restarts = metrics_registry.counter("network_loop_restarts_total", "Hata sonrası yeniden başlatılan ağ döngüsü")
+m_pool_rejected = metrics_registry.counter("inference_pool_rejected_total",
+                                           "Havuza verilemeyen toplu çağrı (hazır işçi yok / zaman aşımı)")
+m_batch_size = metrics_registry.histogram("batch_size", "Toplu çıkarım boyutu",
+                                          bounds=(1, 2, 4, 8, 16, 32))
+
+def _per_client(field):
+    return lambda: {name: st[field] for name, st in client_stats().items()}
+
+metrics_registry.gauge("client_fps", "İstemci başına yanıt hızı", fn=_per_client("fps"), label="client")
+metrics_registry.gauge("client_queue_delay_ms", "İstemci başına kuyruk gecikmesi (ort.)",
+                       fn=_per_client("queue_delay_ms"), label="client")
+metrics_registry.gauge("client_dropped_frames", "İstemci başına eski diye atılan kare",
+                       fn=_per_client("dropped"), label="client")
+metrics_registry.gauge("client_queue_depth", "İstemci başına bekleyen kare (ham + yanıt)",
+                       fn=_per_client("queue_depth"), label="client")
+metrics_registry.gauge("client_detect_interval", "İstemci başına güncel tespit aralığı (kare)",
+                       fn=_per_client("detect_interval"), label="client")
+metrics_registry.gauge("clients", "Bağlı istemci sayısı", fn=lambda: len(sessions))
+
+def udp_stats():
+    total = {}
+    for session in list(sessions.values()):
+        if session.channel is not None:
+            for key, value in session.channel.stats().items():
+                total[key] = total.get(key, 0) + value
+    return total
+
+metrics_registry.gauge("inference_pool", "Çıkarım havuzu sayaçları (INFERENCE_WORKERS > 0)", label="kind",
+                       fn=lambda: pool.stats() if pool is not None else None)
+metrics_registry.gauge("udp", "UDP istemcilerinin mesaj/paket sayaçları (tamamlanan, atılan, geç gelen...)",
+                       fn=udp_stats, label="kind")
+m_rendered = metrics_registry.counter("frames_rendered_total", "Çizilip izleyiciye verilen kare")
+metrics_registry.gauge("stream_viewers", "/stream izleyici sayısı", fn=lambda: broadcaster.viewers)
+
+frame_pool = BufferPool()
+sessions = {}
+sessions_lock = threading.Lock()
+pending_lock = threading.Lock()
+batcher = FrameBatcher(MAX_BATCH_SIZE, MAX_BATCH_WAIT)
+render_q = LatestQueue(RENDER_QUEUE_SIZE)
+
+# ---------- PIPELINE AŞAMALARI ----------
+def decode_stage(session):
+    while True:
+        item = session.raw_q.get()
+        if item is None:
+            break
+        frame_id, t_recv, img_data = item
+        session.trace.mark(frame_id, SRV_DECODE_START, time.monotonic())
+        np_data = np.frombuffer(img_data, dtype=np.uint8)  # kopyasız
+        frame = cv2.imdecode(np_data, cv2.IMREAD_COLOR)
+        del np_data
+        frame_pool.release(img_data)
+        if frame is None:
+            print(f"⚠️ Kare çözülemedi: {session.name} #{frame_id}")
+            reply_empty(session, frame_id, t_recv)
+            continue
+        session.trace.mark(frame_id, SRV_DECODED, time.monotonic())
+        tracker = session.tracker
+        if tracker is not None:
+            # Önceki tespit bitmeden takip edilmez: yanıt sırası korunur
+            started = time.monotonic()
+            dropped = tracker.dropped_boxes
+            records = tracker.track(frame) if tracker.wait_idle() else None
+            if tracker.dropped_boxes != dropped:
+                m_track_dropped.inc(tracker.dropped_boxes - dropped)
+            if tracker.fallback is not None:
+                m_track_fallback[tracker.fallback].inc()
+            if records is not None:
+                # Takip edilen karede "inference" aralığı takip süresini gösterir
+                session.trace.mark(frame_id, SRV_INFER_START, started)
+                session.trace.mark(frame_id, SRV_INFER_END, time.monotonic())
+                session.stats.tracked += 1
+                m_tracked.inc()
+                if TILE_ROI:
+                    session.update_roi(records)
+                session.result_q.put((frame_id, t_recv, frame, records))
+                continue
+            tracker.begin_detection()
+        batcher.submit(session, (frame_id, t_recv, frame))
+    batcher.remove(session)
+    session.result_q.close()
+
+def parse_result(results, classes=None):
+    """YOLO sonucunu protocol.DETECTION_DTYPE kayıt dizisine çevirir; `classes` verilirse yalnız o sınıflar."""
+    return results_to_records(results, CONF_THRESHOLD, classes)
+
+def merge_class_filters(filters):
+    """Toplu çağrı için süzgeçlerin birleşimi; biri bile tüm sınıfları istiyorsa None."""
+    if any(f is None for f in filters):
+        return None
+    return sorted(set().union(*(f.tolist() for f in filters)))
+
+def detect_batch(frames, filters, rois=None):
+    """
+    Tüm istemcilerin karelerini tek model çağrısında işler. Güven eşiği ve sınıf
+    birleşimi modele verilir (NMS yalnız bu sınıflarda); kare başına süzgeç sonra uygulanır.
+    Döşemeli çıkarımda tüm karelerin döşemeleri yine tek çağrıda gider.
+    """
+    classes = merge_class_filters(filters)
+    per_frame = [f if classes is not None and len(f) < len(classes) else None for f in filters]
+    if tiler is not None:
+        return tiler.records(model, frames, CONF_THRESHOLD, classes, per_frame, rois)
+    results = model.predict(frames, CONF_THRESHOLD, classes)
+    return [parse_result(r, f) for r, f in zip(results, per_frame)]
+
+def finish_detection(session, item, records, started, finished, batch_size):
+    frame_id, t_recv, frame = item
+    session.trace.mark(frame_id, SRV_INFER_START, started)
+    session.trace.mark(frame_id, SRV_INFER_END, finished)
+    session.stats.on_inference(started - t_recv, batch_size)
+    session.stats.inferred += 1
+    m_inferred.inc()
+    if session.tracker is not None:
+        session.tracker.reset(frame, records)
+    if TILE_ROI:
+        session.update_roi(records)
+    session.result_q.put((frame_id, t_recv, frame, records))
+
+def reply_empty(session, frame_id, t_recv, frame=None):
+    """
+    İşlenemeyen kare için boş yanıt: istemcinin kümülatif onayı ilerler. Yanıt hiç gitmezse TCP
+    istemcisi penceresi dolu kalıp bekler; kalp atışları sürdüğü için bağlantı bayat da sayılmaz.
+    """
+    m_failed.inc()
+    session.result_q.put((frame_id, t_recv, frame, empty_records()))
+
+def fail_detection(session, item):
+    """Çıkarımı başarısız (hata, havuz reddi, ölen işçi) kare: takip bekletilmez, boş yanıt gider."""
+    if session.tracker is not None:
+        session.tracker.cancel_detection()
+    reply_empty(session, *item)
+
+class PoolTicket:
+    """Havuza giden toplu çağrının sunucu tarafı; oturumların `pending` kuyruklarında bekler."""
 
+    def __init__(self, batch, started):
+        self.batch = batch
+        self.started = started
+        self.task = None
+
+def submit_to_pool(batch, frames, filters, rois, started):
+    """
+    Toplu çağrıyı havuza verir (işçiler doluysa en fazla POOL_SUBMIT_TIMEOUT bekler; verilemezse
+    kareler boş yanıtla geçilir). Sonuçlar işçilerden farklı sırada dönebilir; her oturum kendi
+    karelerinin yanıtını gönderim sırasıyla alır.
+    """
+    classes = merge_class_filters(filters)
+    per_frame = [f.tolist() if classes is not None and len(f) < len(classes) else None for f in filters]
+    ticket = PoolTicket(batch, started)
+    with pending_lock:
+        for session, _ in batch:
+            session.pending.append(ticket)
+    try:
+        task = pool.submit(frames, classes, per_frame, callback=lambda task: on_pool_result(ticket, task),
+                           rois=rois, timeout=POOL_SUBMIT_TIMEOUT)
+        if task is None:
+            print(f"⛔ Çıkarım havuzu {POOL_SUBMIT_TIMEOUT} sn içinde hazır işçi vermedi")
+    except RuntimeError as e:
+        print("⛔ Çıkarım havuzu kullanılamıyor:", e)
+        task = None
+    if task is None:
+        m_pool_rejected.inc()
+        on_pool_result(ticket, None)
+
+def on_pool_result(ticket, task):
+    ready = []
+    with pending_lock:
+        ticket.task = task if task is not None else False
+        for session, _ in ticket.batch:
+            while session.pending and session.pending[0].task is not None:
+                ready.append((session, session.pending.popleft()))
+    if task is not None and task.error is not None:
+        print("⛔ Çıkarım hatası:", task.error)
+    for session, done in ready:
+        index = next(i for i, (s, _) in enumerate(done.batch) if s is session)
+        if not done.task or done.task.error is not None:
+            fail_detection(session, done.batch[index][1])
+            continue
+        finish_detection(session, done.batch[index][1], done.task.records[index], done.started,
+                         done.task.finished, len(done.batch))
+
+def inference_stage():
+    while True:
+        batch = batcher.next_batch()
+        if not batch:
+            if batcher.closed:
+                break
+            continue
+        started = time.monotonic()
+        frames = [item[2] for _, item in batch]
+        filters = [session.classes for session, _ in batch]
+        rois = [session.roi for session, _ in batch] if TILE_ROI else None
+        m_batch_size.observe(len(batch))
+        if tiler is not None:
+            m_tiles.inc(sum(len(tiler.windows(f.shape[1], f.shape[0], r))
+                            for f, r in zip(frames, rois or [None] * len(frames))))
+        if pool is not None:
+            submit_to_pool(batch, frames, filters, rois, started)
+            continue
+        try:
+            detections = detect_batch(frames, filters, rois)
         except Exception as e:
-            print("⛔ Hata veya bağlantı koptu:", e)
-        finally:
-            try:
-                conn.close()
-            except:
-                pass
+            print("⛔ Çıkarım hatası:", e)
+            for session, item in batch:
+                fail_detection(session, item)
+            continue
+        finished = time.monotonic()
+        for (session, item), records in zip(batch, detections):
+            finish_detection(session, item, records, started, finished, len(batch))
+
+def draw_detections(frame, records):
+    for r in records:
+        xmin, ymin, xmax, ymax = int(r["x1"]), int(r["y1"]), int(r["x2"]), int(r["y2"])
+        cv2.rectangle(frame, (xmin, ymin), (xmax, ymax), (0, 255, 0), 2)
+        cv2.putText(frame, f"{labels[int(r['cls'])]} ({float(r['conf']):.2f})", (xmin, ymin - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+    cv2.circle(frame, (frame.shape[1] // 2, frame.shape[0] // 2), 5, (0, 0, 255), -1)
+
+def responder_stage(session):
+    while True:
+        item = session.result_q.get()
+        if item is None:
+            break
+        frame_id, t_recv, frame, records = item
+        if session.fmt == FORMAT_BINARY:
+            payload = encode_binary(frame_id, int(t_recv * 1e9), time.monotonic_ns(), records)
+        else:
+            payload = encode_json(frame_id, records, labels)
+        try:
+            session.send(payload, frame_id)
+        except OSError as e:
+            print(f"⛔ Yanıt gönderilemedi ({session.name}):", e)
+            break
+        session.trace.mark(frame_id, SRV_SENT, time.monotonic())
+        session.trace.complete(frame_id)
+        session.stats.on_response()
+        m_responded.inc()
+
+        # Çizim yalnız izleyen varsa ve ayrı iş parçacığında; kare bu aşamadan sonra kullanılmıyor
+        if frame is not None and (SHOW_WINDOW or broadcaster.viewers):
+            render_q.put((session.name, frame, records))
+    # Ağ döngüsünün oturumu kapatması için bağlantıyı sonlandır
+    if session.conn is not None:
+        try:
+            session.conn.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+def render_stage():
+    """Kutuları çizer, /stream'e yayınlar ve (açıksa) önizleme penceresini günceller; tüm GUI çağrıları burada."""
+    while True:
+        item = render_q.get()
+        if item is None:
+            break
+        name, frame, records = item
+        draw_detections(frame, records)
+        m_rendered.inc()
+        if broadcaster.viewers:
+            broadcaster.publish(frame)
+        if SHOW_WINDOW:
+            cv2.imshow(f"YOLO Server - {name}", frame)
+            cv2.waitKey(1)
+
+# ---------- AĞ DÖNGÜSÜ (selector) ----------
+def open_session(sel, conn, addr, channel=None):
+    """TCP bağlantısı ya da (conn None, channel verilmiş) yeni UDP istemcisi için oturum açar."""
+    if conn is not None:
+        conn.settimeout(SEND_TIMEOUT)  # recv selector ile, sendall zaman aşımlı
+        enable_keepalive(conn, KEEPALIVE_IDLE, KEEPALIVE_INTERVAL, KEEPALIVE_COUNT, user_timeout=SEND_TIMEOUT * 2)
+    session = ClientSession(conn, addr, channel)
+    batcher.add(session)
+    session.threads = [
+        threading.Thread(target=decode_stage, args=(session,), daemon=True),
+        threading.Thread(target=responder_stage, args=(session,), daemon=True),
+    ]
+    for t in session.threads:
+        t.start()
+    with sessions_lock:
+        sessions[session.name] = session
+    if conn is not None:
+        sel.register(conn, selectors.EVENT_READ, session)
+    print(f"📡 Bağlantı alındı: {session.name} (aktif istemci: {len(sessions)})")
+    return session
+
+def close_session(sel, session):
+    session.close()
+    if session.conn is not None:  # UDP soketi tüm istemcilerle paylaşılıyor, kapatılmaz
+        try:
+            sel.unregister(session.conn)
+        except (KeyError, ValueError):
+            pass
+        try:
+            session.conn.close()
+        except OSError:
+            pass
+    with sessions_lock:
+        sessions.pop(session.name, None)
+    s = session.stats
+    print(f"⛔ Bağlantı kapandı: {session.name} | alınan: {s.received}, yanıtlanan: {s.responded}, "
+          f"atlanan (eski) kare: {session.raw_q.dropped + batcher.dropped(session)}, "
+          f"çıkarım/takip: {s.inferred}/{s.tracked}")
+
+def receive_udp(sel, udp_socket, view):
+    """Bekleyen datagramları okur; her biri gönderenin oturumunda parça olarak birleştirilir."""
+    now = time.monotonic()
+    for _ in range(UDP_READ_BURST):
+        try:
+            n, addr = udp_socket.recvfrom_into(view)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            continue  # ör. Windows'ta önceki gönderimin ICMP hatası
+        if n == 0 or view[0] != PACKET_VERSION:
+            continue
+        session = sessions.get(f"udp:{addr[0]}:{addr[1]}")
+        if session is None:
+            session = open_session(sel, None, addr, UdpChannel(udp_socket, addr, pool=frame_pool))
+        session.last_seen = now
+        message = session.channel.feed(view[:n])
+        if message is not None:
+            kind, msg_id, payload = message
+            session.on_frame(payload, msg_id if kind == KIND_DATA else None)
+
+def expire_sessions(sel):
+    """Sessiz UDP istemcilerini ve kalp atışı kesilen TCP istemcilerini kapatır."""
+    now = time.monotonic()
+    for session in list(sessions.values()):
+        if session.channel is not None:
+            timeout = UDP_SESSION_TIMEOUT
+        elif session.heartbeats:
+            timeout = SESSION_TIMEOUT
+        else:
+            continue
+        if now - session.last_seen > timeout:
+            print(f"⌛ {session.name}: {now - session.last_seen:.1f} sn sessiz, kapatılıyor")
+            m_expired.inc()
+            close_session(sel, session)
+
+def load_model():
+    """Seçili arka ucu yükler ve ısıtır; ilk gerçek kare tembel ilklendirme beklemez."""
+    global model, pool, tiler, labels, class_names, class_ids
+    if TILE_SIZE:
+        tiler = Tiler(TILE_SIZE, TILE_OVERLAP, TILE_FULL_FRAME, TILE_MERGE_THRESHOLD)
+        windows = len(tiler.windows(FRAME_WIDTH, FRAME_HEIGHT))
+        print(f"🧩 Döşemeli çıkarım: {TILE_SIZE} px, örtüşme {TILE_OVERLAP:.0%}, kare başına {windows} pencere"
+              f"{' (hedef çevresinde daha az)' if TILE_ROI else ''}")
+    if INFERENCE_WORKERS:
+        started = time.monotonic()
+        pool = InferencePool(MODEL_BACKEND, MODEL_WEIGHTS, MODEL_IMGSZ, MODEL_INT8, CONF_THRESHOLD,
+                             workers=INFERENCE_WORKERS, threads=WORKER_THREADS, pin_cpus=WORKER_PIN_CPUS,
+                             depth=WORKER_DEPTH, max_batch=MAX_BATCH_SIZE, warmup_runs=WARMUP_RUNS,
+                             warmup_shape=(FRAME_HEIGHT, FRAME_WIDTH, 3), tiler=tiler).start()
+        if not pool.wait_ready():
+            raise RuntimeError(f"Çıkarım havuzu başlatılamadı: {pool.error}")
+        print(f"🧠 {INFERENCE_WORKERS} işçi süreç hazır: {MODEL_WEIGHTS} ({MODEL_BACKEND}, {MODEL_IMGSZ}px) "
+              f"{time.monotonic() - started:.1f} sn")
+        labels = pool.names
+        class_names = [labels[i] for i in sorted(labels)]
+        class_ids = {name: i for i, name in labels.items()}
+        return
+    backend = create_backend(MODEL_BACKEND, MODEL_WEIGHTS, MODEL_IMGSZ, MODEL_INT8).load()
+    print(f"🧠 Model yüklendi: {MODEL_WEIGHTS} ({backend.label}, {MODEL_IMGSZ}px) {backend.load_seconds:.1f} sn")
+    if WARMUP_RUNS:
+        backend.warmup(WARMUP_RUNS, (FRAME_HEIGHT, FRAME_WIDTH, 3))
+        print(f"🔥 Isınma: {WARMUP_RUNS} çıkarım {backend.warmup_seconds:.2f} sn")
+    labels = backend.names
+    class_names = [labels[i] for i in sorted(labels)]
+    class_ids = {name: i for i, name in labels.items()}
+    model = backend
+
+def open_listener():
+    """Dinleyen TCP soketi; süreç boyunca bir kez açılır (ağ döngüsü yeniden başlasa da aynı soket)."""
+    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server_socket.bind((HOST, PORT))
+    server_socket.listen(LISTEN_BACKLOG)
+    server_socket.setblocking(False)
+    return server_socket
+
+def open_udp_socket():
+    udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    udp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+    udp_socket.bind((HOST, UDP_PORT))
+    udp_socket.setblocking(False)
+    return udp_socket
+
+def network_loop(sel, server_socket, udp_socket):
+    udp_view = memoryview(bytearray(MAX_DATAGRAM)) if udp_socket is not None else None
+    last_report = time.monotonic()
+    while True:
+        for key, _ in sel.select(timeout=1.0):
+            if key.data is None:
+                try:
+                    conn, addr = server_socket.accept()
+                except (BlockingIOError, InterruptedError):
+                    continue
+                except OSError as e:  # ör. dosya tanımlayıcı sınırı; dinleyici açık kalır
+                    print("⚠️ Bağlantı kabul edilemedi:", e)
+                    continue
+                open_session(sel, conn, addr)
+                continue
+            if key.data == "udp":
+                receive_udp(sel, udp_socket, udp_view)
+                continue
+            session = key.data
             try:
-                server_socket.close()
-            except:
-                pass
-            print("⏳ Tekrar bağlantı bekleniyor...\n")
+                payload = session.assembler.read_from(session.conn)
+            except (BlockingIOError, socket.timeout):
+                continue
+            except (OSError, ValueError):
+                close_session(sel, session)
+                continue
+            session.last_seen = time.monotonic()
+            if payload is not None:
+                session.on_frame(payload)
+
+        expire_sessions(sel)
+        if time.monotonic() - last_report >= STATS_INTERVAL and sessions:
+            for line in client_stats_lines():
+                print(line)
+            last_report = time.monotonic()
+
+def yolo_server():
+    load_model()
+    server_socket = open_listener()
+    print(f"🚀 Server başlatıldı: {HOST}:{PORT}, bağlantı bekleniyor...")
+
+    sel = selectors.DefaultSelector()
+    sel.register(server_socket, selectors.EVENT_READ, None)
+    udp_socket = None
+    if UDP_PORT is not None:
+        udp_socket = open_udp_socket()
+        sel.register(udp_socket, selectors.EVENT_READ, "udp")
+        print(f"📶 UDP taşıma: {HOST}:{UDP_PORT}")
+    threading.Thread(target=inference_stage, daemon=True).start()
+    threading.Thread(target=render_stage, daemon=True).start()
+
+    # Beklenmeyen hata ağ döngüsünü öldürmez: oturumlar ve dinleyici korunur, döngü yeniden girer
+    backoff = Backoff(0.05, 2.0)
+    while True:
+        started = time.monotonic()
+        try:
+            network_loop(sel, server_socket, udp_socket)
+        except Exception as e:
+            m_loop_restarts.inc()
+            if time.monotonic() - started > 10:
+                backoff.reset()
+            delay = backoff.next()
+            print(f"⛔ Ağ döngüsü hatası: {e!r}, {delay * 1000:.0f} ms sonra yeniden başlatılıyor")
+            time.sleep(delay)
+
+def client_stats():
+    with sessions_lock:
+        active = list(sessions.values())
+    return {
+        s.name: {
+            "fps": round(s.stats.fps, 2),
+            "queue_delay_ms": round(s.stats.queue_delay_ms, 2),
+            "batch_size": s.stats.batch_size,
+            "received": s.stats.received,
+            "responded": s.stats.responded,
+            "dropped": s.raw_q.dropped + batcher.dropped(s),
+            "queue_depth": len(s.raw_q) + len(s.result_q),
+            "inferred": s.stats.inferred,
+            "tracked": s.stats.tracked,
+            "detect_interval": s.tracker.interval if s.tracker is not None else 1,
+        }
+        for s in active
+    }
+
+def client_stats_lines():
+    return [
+        f"📊 {name}: {st['fps']:.1f} FPS, kuyruk {st['queue_delay_ms']:.1f} ms, "
+        f"batch {st['batch_size']}, atlanan {st['dropped']}, çıkarım/takip {st['inferred']}/{st['tracked']}"
+        for name, st in client_stats().items()
+    ]
+
+@app.route("/clients")
+def clients():
+    return jsonify(client_stats())
+
+@app.route("/metrics")
+def metrics():
+    return Response(metrics_registry.render(), mimetype=PROMETHEUS_CONTENT_TYPE)
 
-threading.Thread(target=yolo_server, daemon=True).start()
+def start_server():
+    thread = threading.Thread(target=yolo_server, daemon=True)
+    thread.start()
+    return thread
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="YOLO çıkarım sunucusu")
+    parser.add_argument("--backend", default=MODEL_BACKEND, choices=sorted(BACKENDS))
+    parser.add_argument("--model", default=MODEL_WEIGHTS, help="ağırlık dosyası (.pt)")
+    parser.add_argument("--imgsz", type=int, default=MODEL_IMGSZ)
+    parser.add_argument("--int8", action="store_true", help="INT8 nicemlenmiş model (onnx/openvino)")
+    parser.add_argument("--headless", "--no-window", dest="show_window", action="store_false",
+                        help="önizleme penceresi yok (çizim yalnız /stream izleyicisi varken)")
+    parser.add_argument("--udp-port", type=int, default=UDP_PORT, help="UDP taşıma portu (0 = kapalı)")
+    parser.add_argument("--workers", type=int, default=INFERENCE_WORKERS,
+                        help="çıkarım işçi süreci sayısı (0 = bu süreçte)")
+    parser.add_argument("--worker-threads", type=int, default=WORKER_THREADS, help="işçi başına iş parçacığı")
+    parser.add_argument("--pin-cpus", action="store_true", help="işçileri ayrı çekirdeklere sabitle")
+    parser.add_argument("--tile", type=int, default=TILE_SIZE, help="döşeme boyutu px (0 = döşemesiz)")
+    parser.add_argument("--tile-overlap", type=float, default=TILE_OVERLAP)
+    parser.add_argument("--no-tile-full", dest="tile_full", action="store_false",
+                        help="döşemelerle birlikte tam kare çalıştırma")
+    parser.add_argument("--tile-roi", action="store_true", help="döşemeleri hedef çevresiyle sınırla")
+    args = parser.parse_args()
+    MODEL_BACKEND, MODEL_WEIGHTS, MODEL_IMGSZ, MODEL_INT8 = args.backend, args.model, args.imgsz, args.int8
+    SHOW_WINDOW = args.show_window
+    UDP_PORT = args.udp_port or None
+    INFERENCE_WORKERS, WORKER_THREADS, WORKER_PIN_CPUS = args.workers, args.worker_threads, args.pin_cpus
+    TILE_SIZE, TILE_OVERLAP, TILE_FULL_FRAME = args.tile, args.tile_overlap, args.tile_full
+    TILE_ROI = args.tile_roi or TILE_ROI
+    start_server()
     app.run(host="0.0.0.0", port=8080)
@@ -0,0 +1,585 @@
+# sim_vehicle.py
+# Donanımsız test için yerel MAVLink araç simülatörü: dronekit'e ArduCopter gibi görünür,
+# UDP veya TCP loopback üzerinden bağlanılır:
+#   drone_control.connect_drone("udpout:127.0.0.1:14550")  ← SimVehicle("udp:127.0.0.1:14550")
+#   drone_control.connect_drone("udp:127.0.0.1:14550")     ← SimVehicle("udpout:127.0.0.1:14550")
+#   drone_control.connect_drone("tcp:127.0.0.1:5760")      ← SimVehicle("tcp:127.0.0.1:5760")
+#
+# Desteklenenler: HEARTBEAT, parametre listesi/okuma/yazma, GPS/EKF/ATTITUDE/GLOBAL_POSITION_INT
+# telemetrisi, COMMAND_LONG (ARM_DISARM, DO_SET_MODE, NAV_TAKEOFF, NAV_LAND, NAV_RETURN_TO_LAUNCH,
+# CONDITION_YAW, REQUEST_AUTOPILOT_CAPABILITIES) + COMMAND_ACK, SET_MODE ve
+# SET_POSITION_TARGET_LOCAL_NED (hız + yaw hızı; gövde veya yerel NED).
+#
+# Kinematik basittir: hız ve yaw hızı birinci dereceden gecikmeyle (`response`) komuta yaklaşır;
+# kalkış/iniş/RTL sabit hızlarla. ArduCopter davranışları: hız setpoint'i kalkışı iptal eder,
+# GUIDED_TIMEOUT boyunca yeni setpoint gelmezse araç durur, yerde kalkışsız bekleyen araç
+# DISARM_DELAY sonra disarm olur, disarm yalnız yerde kabul edilir.
+#
+# `baud` verilirse iki yön de seri hat gibi sınırlanır (bayt başına 10 bit, SERIAL_BUFFER bayt
+# tampon; taşan veri atılır): Pi'deki /dev/serial0 57600 baud bağlantısının kapasitesini benzetir.
+#
+# Kullanım: python sim_vehicle.py --connect udp:127.0.0.1:14550 [--baud 57600]
+import argparse
+import collections
+import math
+import select
+import socket
+import threading
+import time
+
+from pymavlink import mavutil
+
+mavlink = mavutil.mavlink
+
+# ---------- AYARLAR ----------
+HOME = (39.9255, 32.8663, 850.0)  # enlem, boylam, deniz seviyesinden irtifa (m)
+PHYSICS_HZ = 50
+TELEMETRY_HZ = 10
+HEARTBEAT_HZ = 1
+PREARM_DELAY = 1.0    # sn; EKF/GPS hazır olana kadar is_armable False
+CLIMB_RATE = 2.5      # m/s (kalkış)
+LAND_RATE = 1.0       # m/s (LAND/RTL inişi)
+RTL_SPEED = 5.0       # m/s (eve yatay dönüş)
+RTL_ALT = 15.0        # m
+RESPONSE = 0.3        # sn; hız/yaw hızı zaman sabiti
+GUIDED_TIMEOUT = 3.0  # sn; setpoint gelmezse hız sıfırlanır
+DISARM_DELAY = 10.0   # sn
+METERS_PER_DEG = 111319.5
+SERIAL_BUFFER = 4096  # bayt; seri hat benzetiminde yön başına tampon
+
+MODES = mavutil.mode_mapping_bynumber(mavlink.MAV_TYPE_QUADROTOR)  # numara → ad
+MODE_IDS = {name: number for number, name in MODES.items()}
+FLYING_MODES = ("GUIDED", "LOITER", "ALT_HOLD", "STABILIZE", "POSHOLD")
+
+PARAMS = {"SYSID_THISMAV": 1, "FRAME_CLASS": 1, "WPNAV_SPEED": 500, "WPNAV_SPEED_UP": 250,
+          "LAND_SPEED": LAND_RATE * 100, "RTL_ALT": RTL_ALT * 100, "DISARM_DELAY": DISARM_DELAY,
+          "GUID_TIMEOUT": GUIDED_TIMEOUT, "ANGLE_MAX": 3000}
+
+EKF_READY = (mavlink.EKF_ATTITUDE | mavlink.EKF_VELOCITY_HORIZ | mavlink.EKF_VELOCITY_VERT
+             | mavlink.EKF_POS_HORIZ_REL | mavlink.EKF_POS_HORIZ_ABS | mavlink.EKF_POS_VERT_ABS
+             | mavlink.EKF_PRED_POS_HORIZ_REL | mavlink.EKF_PRED_POS_HORIZ_ABS)
+
+# type_mask bitleri: 3-5 hız yok say, 11 yaw hızı yok say
+IGNORE_VELOCITY = 0b111 << 3
+IGNORE_YAW_RATE = 1 << 11
+BODY_FRAMES = (mavlink.MAV_FRAME_BODY_NED, mavlink.MAV_FRAME_BODY_OFFSET_NED)
+
+
+# ---------- BAĞLANTI ----------
+class _UdpServer:
+    """
+    Son paket gelen adrese yazar (ArduPilot'un udpin davranışı). peer verilirse (SITL'in
+    --out udp: davranışı) baştan oraya yazar; istemci dinleyen uçtur.
+    """
+
+    def __init__(self, host, port, peer=None):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((host, port))
+        self.peer = peer
+        self.sessions = 0 if peer is None else 1
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def read(self):
+        data, peer = self.sock.recvfrom(65535)
+        if peer != self.peer:
+            self.peer = peer
+            self.sessions += 1
+        return data
+
+    def write(self, buf):
+        if self.peer is not None:
+            try:
+                self.sock.sendto(buf, self.peer)
+            except OSError:
+                pass
+
+    def close(self):
+        self.sock.close()
+
+
+class _TcpServer:
+    """Tek istemcili TCP sunucusu; istemci kopunca yenisini kabul eder."""
+
+    def __init__(self, host, port):
+        self.listen = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listen.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listen.bind((host, port))
+        self.listen.listen(1)
+        self.conn = None
+        self.sessions = 0
+
+    def fileno(self):
+        return (self.conn or self.listen).fileno()
+
+    def read(self):
+        if self.conn is None:
+            self.conn, _ = self.listen.accept()
+            self.conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.sessions += 1
+            return b""
+        try:
+            data = self.conn.recv(65536)
+        except OSError:
+            data = b""
+        if not data:
+            self._drop()
+        return data
+
+    def write(self, buf):
+        if self.conn is not None:
+            try:
+                self.conn.sendall(buf)
+            except OSError:
+                self._drop()
+
+    def _drop(self):
+        self.conn.close()
+        self.conn = None
+
+    def close(self):
+        if self.conn is not None:
+            self._drop()
+        self.listen.close()
+
+
+def open_link(address):
+    """"udp:host:port" / "tcp:host:port" dinler; "udpout:host:port" o adrese yazar."""
+    kind, host, port = address.split(":")
+    if kind == "udp":
+        return _UdpServer(host, int(port))
+    if kind == "udpout":
+        return _UdpServer("0.0.0.0", 0, peer=(host, int(port)))
+    if kind == "tcp":
+        return _TcpServer(host, int(port))
+    raise ValueError(f"Bilinmeyen adres: {address} (udp:, udpout: veya tcp:host:port)")
+
+
+class _SerialLine:
+    """Baud hızında akan bayt kuyruğu: write() ile girer, due() ile iletimi biten parçalar çıkar."""
+
+    def __init__(self, baud, buffer=SERIAL_BUFFER):
+        self.byte_time = 10.0 / baud
+        self.buffer = buffer
+        self.dropped = 0
+        self._free_at = 0.0
+        self._queue = collections.deque()
+
+    def write(self, data):
+        now = time.monotonic()
+        start = max(now, self._free_at)
+        if (start - now) / self.byte_time + len(data) > self.buffer:
+            self.dropped += len(data)
+            return
+        self._free_at = start + len(data) * self.byte_time
+        self._queue.append((self._free_at, data))
+
+    def next_due(self):
+        return self._queue[0][0] if self._queue else None
+
+    def due(self, now):
+        while self._queue and self._queue[0][0] <= now:
+            yield self._queue.popleft()[1]
+
+
+def _wrap(angle):
+    return (angle + math.pi) % (2 * math.pi) - math.pi
+
+
+def _approach(value, target, dt, tau):
+    return value + (target - value) * min(1.0, dt / tau)
+
+
+# ---------- ARAÇ ----------
+class SimVehicle:
+    """
+    start() → (dronekit bağlanır) → stop(). Durum tek iş parçacığında ilerler; okuma için
+    snapshot(). add_listener(callback(msg, t)) her gelen MAVLink mesajında, alındığı anda
+    (time.monotonic) çağrılır (benchmark'ın komut → araç gecikmesi için).
+    """
+
+    def __init__(self, address="udp:127.0.0.1:14550", physics_hz=PHYSICS_HZ, telemetry_hz=TELEMETRY_HZ,
+                 prearm_delay=PREARM_DELAY, climb_rate=CLIMB_RATE, land_rate=LAND_RATE, response=RESPONSE,
+                 baud=None):
+        self.address = address
+        self.baud = baud
+        self.physics_hz = physics_hz
+        self.telemetry_hz = telemetry_hz
+        self.prearm_delay = prearm_delay
+        self.climb_rate = climb_rate
+        self.land_rate = land_rate
+        self.response = response
+        self.params = dict(PARAMS)
+        self.received = {}
+        self.sent = 0
+        self.acks = 0
+        self.bad_packets = 0
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread = None
+        self._link = None
+        self._mav = None
+        self._session = 0
+        self._rx = _SerialLine(baud) if baud else None
+        self._tx = _SerialLine(baud) if baud else None
+        self._boot = time.monotonic()
+        self.mode = "STABILIZE"
+        self.armed = False
+        self.pos = [0.0, 0.0, 0.0]     # kuzey, doğu, aşağı (m)
+        self.vel = [0.0, 0.0, 0.0]     # yer NED (m/s)
+        self.yaw = 0.0                 # rad
+        self.yaw_rate = 0.0            # rad/s
+        self._cmd_vel = [0.0, 0.0, 0.0]
+        self._cmd_yaw_rate = 0.0
+        self._cmd_at = None
+        self._yaw_target = None        # (hedef, hız rad/s) CONDITION_YAW
+        self._takeoff_alt = None
+        self._armed_at = None
+
+    # ---------- YAŞAM DÖNGÜSÜ ----------
+    def start(self):
+        self._link = open_link(self.address)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        if self._link is not None:
+            self._link.close()
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def _run(self):
+        dt = 1.0 / self.physics_hz
+        telemetry_every = max(1, round(self.physics_hz / self.telemetry_hz))
+        heartbeat_every = max(1, round(self.physics_hz / HEARTBEAT_HZ))
+        tick, next_tick = 0, time.monotonic()
+        while self._running:
+            wake = min([next_tick] + [line.next_due() for line in (self._rx, self._tx)
+                                      if line is not None and line.next_due() is not None])
+            ready, _, _ = select.select([self._link], [], [], max(0.0, wake - time.monotonic()))
+            data = b""
+            if ready:
+                try:
+                    data = self._link.read()
+                except OSError:
+                    continue
+            if self._link.sessions != self._session:
+                self._session = self._link.sessions
+                self._mav = mavlink.MAVLink(self._tx or self._link, srcSystem=1, srcComponent=1)
+            if data:
+                if self._rx is not None:
+                    self._rx.write(data)
+                else:
+                    self._receive(data)
+            now = time.monotonic()
+            if self._rx is not None:
+                for data in self._rx.due(now):
+                    self._receive(data)
+            if self._tx is not None:
+                for data in self._tx.due(now):
+                    self._link.write(data)
+            if now < next_tick:
+                continue
+            with self._lock:
+                self._step(dt, now)
+            if tick % heartbeat_every == 0:
+                self._send_heartbeat()
+            if tick % telemetry_every == 0:
+                self._send_telemetry()
+            tick += 1
+            next_tick += dt
+            if next_tick < now - dt:  # geride kaldık: yetişmeye çalışma
+                next_tick = now + dt
+
+    # ---------- FİZİK ----------
+    def _step(self, dt, now):
+        on_ground = self.pos[2] >= 0.0
+        target = [0.0, 0.0, 0.0]
+        target_yaw_rate = 0.0
+
+        if self.armed and on_ground and self._takeoff_alt is None and self._armed_at is not None \
+                and now - self._armed_at > DISARM_DELAY:
+            self._disarm()
+        if not self.armed:
+            self.vel = [0.0, 0.0, 0.0]
+            self.yaw_rate = 0.0
+            return
+
+        if self.mode in ("LAND", "RTL"):
+            if on_ground:  # iniş tamam (veya yerdeyken LAND/RTL): motorlar durur
+                self._disarm()
+                return
+            target = self._descend_or_return()
+        elif self._takeoff_alt is not None:
+            target[2] = -self.climb_rate
+            if -self.pos[2] - self.vel[2] * self.response >= self._takeoff_alt:  # kalan yavaşlama payı
+                self._takeoff_alt = None
+                target[2] = 0.0
+        elif self.mode == "GUIDED" and self._cmd_at is not None:
+            if now - self._cmd_at > GUIDED_TIMEOUT:
+                self._cmd_vel, self._cmd_yaw_rate, self._cmd_at = [0.0, 0.0, 0.0], 0.0, None
+            target = list(self._cmd_vel)
+            target_yaw_rate = self._cmd_yaw_rate
+
+        if self._yaw_target is not None:
+            heading, speed = self._yaw_target
+            error = _wrap(heading - self.yaw)
+            if abs(error) < math.radians(0.5):
+                self._yaw_target = None
+            target_yaw_rate = math.copysign(min(speed, abs(error) / (4 * self.response)), error)  # kritik sönüm
+
+        if on_ground and target[2] >= 0.0:  # yerde ve tırmanmıyor: kıpırdamaz
+            self.vel = [0.0, 0.0, 0.0]
+            self.yaw_rate = 0.0
+            return
+        for i in range(3):
+            self.vel[i] = _approach(self.vel[i], target[i], dt, self.response)
+            self.pos[i] += self.vel[i] * dt
+        self.yaw_rate = _approach(self.yaw_rate, target_yaw_rate, dt, self.response)
+        self.yaw = _wrap(self.yaw + self.yaw_rate * dt)
+        if self.pos[2] > 0.0:  # yere değdi
+            self.pos[2] = 0.0
+            self.vel[2] = 0.0
+
+    def _descend_or_return(self):
+        if self.mode == "LAND":
+            return [0.0, 0.0, self.land_rate]
+        alt, distance = -self.pos[2], math.hypot(self.pos[0], self.pos[1])
+        if distance > 0.5 and alt < RTL_ALT - 0.2:
+            return [0.0, 0.0, -self.climb_rate]
+        if distance > 0.5:
+            speed = min(RTL_SPEED, distance)  # yaklaşınca yavaşla
+            return [-self.pos[0] / distance * speed, -self.pos[1] / distance * speed, 0.0]
+        return [0.0, 0.0, self.land_rate]
+
+    def _disarm(self):
+        self.armed = False
+        self._armed_at = None
+        self._takeoff_alt = None
+        self._cmd_at = None
+        self._yaw_target = None
+
+    def _ready(self):
+        return time.monotonic() - self._boot >= self.prearm_delay
+
+    # ---------- GELEN MESAJLAR ----------
+    def _receive(self, data):
+        t = time.monotonic()
+        try:
+            messages = self._mav.parse_buffer(data) or []
+        except mavlink.MAVError:
+            self.bad_packets += 1
+            return
+        for msg in messages:
+            name = msg.get_type()
+            if name == "BAD_DATA":
+                self.bad_packets += 1
+                continue
+            self.received[name] = self.received.get(name, 0) + 1
+            for callback in self._listeners:
+                callback(msg, t)
+            handler = getattr(self, "_on_" + name.lower(), None)
+            if handler is not None:
+                with self._lock:
+                    handler(msg, t)
+
+    def _on_command_long(self, msg, t):
+        handler = getattr(self, f"_cmd_{msg.command}", None)
+        result = handler(msg, t) if handler is not None else mavlink.MAV_RESULT_UNSUPPORTED
+        self._send(self._mav.command_ack_encode(msg.command, result))
+        self.acks += 1
+
+    def _on_set_mode(self, msg, t):
+        self._set_mode(msg.custom_mode)
+
+    def _set_mode(self, number):
+        name = MODES.get(int(number))
+        if name is None:
+            return mavlink.MAV_RESULT_DENIED
+        self.mode = name
+        if name != "GUIDED":
+            self._cmd_at = None
+            self._takeoff_alt = None
+        return mavlink.MAV_RESULT_ACCEPTED
+
+    def _on_set_position_target_local_ned(self, msg, t):
+        if self.mode != "GUIDED" or not self.armed:
+            return
+        if not msg.type_mask & IGNORE_VELOCITY:
+            vx, vy = msg.vx, msg.vy
+            if msg.coordinate_frame in BODY_FRAMES:
+                c, s = math.cos(self.yaw), math.sin(self.yaw)
+                vx, vy = vx * c - vy * s, vx * s + vy * c
+            self._cmd_vel = [vx, vy, msg.vz]
+            self._takeoff_alt = None  # ArduCopter: hız komutu kalkışı keser
+        self._cmd_yaw_rate = 0.0 if msg.type_mask & IGNORE_YAW_RATE else msg.yaw_rate
+        self._yaw_target = None
+        self._cmd_at = t
+
+    def _on_param_request_list(self, msg, t):
+        for index, name in enumerate(self.params):
+            self._send_param(name, index)
+
+    def _on_param_request_read(self, msg, t):
+        names = list(self.params)
+        name = names[msg.param_index] if 0 <= msg.param_index < len(names) else _param_name(msg.param_id)
+        if name in self.params:
+            self._send_param(name, names.index(name))
+
+    def _on_param_set(self, msg, t):
+        name = _param_name(msg.param_id)
+        if name in self.params:
+            self.params[name] = msg.param_value
+            self._send_param(name, list(self.params).index(name))
+
+    # ---------- KOMUTLAR (COMMAND_LONG) ----------
+    def _cmd_400(self, msg, t):  # COMPONENT_ARM_DISARM
+        if msg.param1 >= 0.5:
+            if self.armed:
+                return mavlink.MAV_RESULT_ACCEPTED
+            if not self._ready() or self.mode not in FLYING_MODES:
+                return mavlink.MAV_RESULT_FAILED
+            self.armed = True
+            self._armed_at = t
+            return mavlink.MAV_RESULT_ACCEPTED
+        if self.pos[2] < -0.1 and int(msg.param2) != 21196:  # havada yalnız zorla
+            return mavlink.MAV_RESULT_FAILED
+        self._disarm()
+        return mavlink.MAV_RESULT_ACCEPTED
+
+    def _cmd_176(self, msg, t):  # DO_SET_MODE
+        return self._set_mode(msg.param2)
+
+    def _cmd_22(self, msg, t):  # NAV_TAKEOFF
+        if self.mode != "GUIDED" or not self.armed or self.pos[2] < -0.1:
+            return mavlink.MAV_RESULT_FAILED
+        self._takeoff_alt = max(0.5, msg.param7)
+        return mavlink.MAV_RESULT_ACCEPTED
+
+    def _cmd_21(self, msg, t):  # NAV_LAND
+        return self._set_mode(MODE_IDS["LAND"])
+
+    def _cmd_20(self, msg, t):  # NAV_RETURN_TO_LAUNCH
+        return self._set_mode(MODE_IDS["RTL"])
+
+    def _cmd_115(self, msg, t):  # CONDITION_YAW: açı, hız (°/s), yön (-1/1), göreli (1)
+        if not self.armed:
+            return mavlink.MAV_RESULT_FAILED
+        angle = math.radians(msg.param1)
+        heading = (self.yaw + (angle if msg.param3 >= 0 else -angle)) if msg.param4 else angle
+        self._yaw_target = (_wrap(heading), math.radians(msg.param2 or 30))
+        return mavlink.MAV_RESULT_ACCEPTED
+
+    def _cmd_520(self, msg, t):  # REQUEST_AUTOPILOT_CAPABILITIES
+        capabilities = (mavlink.MAV_PROTOCOL_CAPABILITY_PARAM_FLOAT
+                        | mavlink.MAV_PROTOCOL_CAPABILITY_SET_POSITION_TARGET_LOCAL_NED
+                        | mavlink.MAV_PROTOCOL_CAPABILITY_COMMAND_INT)
+        self._send(self._mav.autopilot_version_encode(capabilities, 0, 0, 0, 0, bytes(8), bytes(8), bytes(8),
+                                                      0, 0, 0))
+        return mavlink.MAV_RESULT_ACCEPTED
+
+    def _cmd_511(self, msg, t):  # SET_MESSAGE_INTERVAL (telemetri sabit hızda)
+        return mavlink.MAV_RESULT_ACCEPTED
+
+    # ---------- GİDEN MESAJLAR ----------
+    def _send(self, msg):
+        if self._mav is not None:
+            self._mav.send(msg)
+            self.sent += 1
+
+    def _send_param(self, name, index):
+        self._send(self._mav.param_value_encode(name.encode(), float(self.params[name]),
+                                                mavlink.MAV_PARAM_TYPE_REAL32, len(self.params), index))
+
+    def _send_heartbeat(self):
+        if self._mav is None:
+            return
+        base = mavlink.MAV_MODE_FLAG_CUSTOM_MODE_ENABLED | mavlink.MAV_MODE_FLAG_STABILIZE_ENABLED
+        if self.armed:
+            base |= mavlink.MAV_MODE_FLAG_SAFETY_ARMED
+        status = mavlink.MAV_STATE_ACTIVE if self.armed else mavlink.MAV_STATE_STANDBY
+        self._send(self._mav.heartbeat_encode(
+            mavlink.MAV_TYPE_QUADROTOR, mavlink.MAV_AUTOPILOT_ARDUPILOTMEGA, base, MODE_IDS[self.mode], status, 3))
+
+    def _send_telemetry(self):
+        if self._mav is None:
+            return
+        with self._lock:
+            ms = int((time.monotonic() - self._boot) * 1000) & 0xFFFFFFFF
+            north, east, down = self.pos
+            vn, ve, vd = self.vel
+            yaw, yaw_rate, ready = self.yaw, self.yaw_rate, self._ready()
+        lat = HOME[0] + north / METERS_PER_DEG
+        lon = HOME[1] + east / (METERS_PER_DEG * math.cos(math.radians(HOME[0])))
+        alt = -down
+        heading = math.degrees(yaw) % 360
+        mav = self._mav
+        self._send(mav.attitude_encode(ms, 0.0, 0.0, yaw, 0.0, 0.0, yaw_rate))
+        self._send(mav.global_position_int_encode(ms, int(lat * 1e7), int(lon * 1e7), int((HOME[2] + alt) * 1000),
+                                                  int(alt * 1000), int(vn * 100), int(ve * 100), int(vd * 100),
+                                                  int(heading * 100)))
+        self._send(mav.local_position_ned_encode(ms, north, east, down, vn, ve, vd))
+        self._send(mav.vfr_hud_encode(0.0, math.hypot(vn, ve), int(heading), 50 if self.armed else 0,
+                                      HOME[2] + alt, -vd))
+        self._send(mav.gps_raw_int_encode(ms * 1000, 3 if ready else 1, int(lat * 1e7), int(lon * 1e7),
+                                          int((HOME[2] + alt) * 1000), 80, 120, int(math.hypot(vn, ve) * 100),
+                                          int(heading * 100), 12 if ready else 3))
+        self._send(mav.ekf_status_report_encode(EKF_READY if ready else 0, 0.1, 0.1, 0.1, 0.1, 0.0))
+        self._send(mav.sys_status_encode(0, 0, 0, 200, 12600, 500, 90, 0, 0, 0, 0, 0, 0))
+
+    # ---------- DURUM ----------
+    def snapshot(self):
+        with self._lock:
+            return {"mode": self.mode, "armed": self.armed, "north": round(self.pos[0], 3),
+                    "east": round(self.pos[1], 3), "alt": round(-self.pos[2], 3),
+                    "yaw_deg": round(math.degrees(self.yaw), 2),
+                    "yaw_rate_dps": round(math.degrees(self.yaw_rate), 2)}
+
+    def stats(self):
+        values = {"received": dict(self.received), "sent": self.sent, "acks": self.acks,
+                  "bad_packets": self.bad_packets, "sessions": self._session}
+        if self.baud:
+            values.update(rx_dropped_bytes=self._rx.dropped, tx_dropped_bytes=self._tx.dropped)
+        return values
+
+
+def _param_name(raw):
+    if isinstance(raw, bytes):
+        raw = raw.decode(errors="ignore")
+    return raw.rstrip("\x00")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yerel MAVLink araç simülatörü (ArduCopter benzeri)")
+    parser.add_argument("--connect", default="udp:127.0.0.1:14550",
+                        help="udp:host:port (dinle), udpout:host:port (oraya yaz) veya tcp:host:port")
+    parser.add_argument("--prearm-delay", type=float, default=PREARM_DELAY)
+    parser.add_argument("--baud", type=int, default=None, help="seri hat benzetimi (ör. 57600)")
+    parser.add_argument("--status-every", type=float, default=2.0, help="durum yazdırma aralığı (sn)")
+    args = parser.parse_args()
+
+    sim = SimVehicle(args.connect, prearm_delay=args.prearm_delay, baud=args.baud).start()
+    kind, where = args.connect.split(":", 1)
+    client = {"udp": "udpout", "udpout": "udp", "tcp": "tcp"}[kind]
+    print(f"🛩️ Simülatör: {args.connect} (bağlantı: {client}:{where})")
+    try:
+        while True:
+            time.sleep(args.status_every)
+            print(sim.snapshot())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sim.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# stub_vehicle.py
+# drone_control.vehicle yerine kullanılan, süreç içi sahte araç (donanımsız test/benchmark)
+import threading
+import time
+
+
+class _Frame:
+    def __init__(self):
+        self.alt = 0.0
+
+
+class _Location:
+    def __init__(self):
+        self.global_relative_frame = _Frame()
+
+
+class _MessageFactory:
+    """Mesajları kodlamaz; (isim, argümanlar) çiftini döndürür."""
+
+    def set_position_target_local_ned_encode(self, *args):
+        return ("SET_POSITION_TARGET_LOCAL_NED", args)
+
+    def command_long_encode(self, *args):
+        return ("COMMAND_LONG", args)
+
+
+class StubVehicle:
+    """
+    dronekit.Vehicle'ın drone_control'ün kullandığı kısmını taklit eder.
+    Gönderilen MAVLink mesajları sayılır; kalkış ve iniş anında tamamlanır.
+    armed/mode/konum değişiklikleri dronekit gibi öznitelik dinleyicilerine bildirilir.
+    """
+
+    def __init__(self):
+        self._mode = None
+        self._armed = False
+        self.is_armable = True
+        self.location = _Location()
+        self.message_factory = _MessageFactory()
+        self.sent = {}
+        self.last_message = None
+        self.last_sent_at = None
+        self._listeners = {}
+        self._lock = threading.Lock()
+
+    # ---------- DİNLEYİCİLER ----------
+    def add_attribute_listener(self, name, callback):
+        self._listeners.setdefault(name, []).append(callback)
+
+    def remove_attribute_listener(self, name, callback):
+        callbacks = self._listeners.get(name, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def notify_attribute_listeners(self, name, value):
+        for callback in list(self._listeners.get(name, [])):
+            callback(self, name, value)
+
+    @property
+    def armed(self):
+        return self._armed
+
+    @armed.setter
+    def armed(self, value):
+        self._armed = value
+        self.notify_attribute_listeners("armed", value)
+
+    @property
+    def mode(self):
+        return self._mode
+
+    @mode.setter
+    def mode(self, value):
+        self._mode = value
+        self.notify_attribute_listeners("mode", value)
+        if getattr(value, "name", value) in ("LAND", "RTL"):
+            self._set_alt(0.0)
+            self.armed = False
+
+    def _set_alt(self, alt):
+        self.location.global_relative_frame.alt = alt
+        self.notify_attribute_listeners("location.global_relative_frame", self.location.global_relative_frame)
+
+    def simple_takeoff(self, altitude):
+        self._set_alt(altitude)
+
+    def send_mavlink(self, msg):
+        name = msg[0]
+        with self._lock:
+            self.sent[name] = self.sent.get(name, 0) + 1
+            self.last_message = msg
+            self.last_sent_at = time.monotonic()
+
+    def close(self):
+        pass
@@ -0,0 +1,210 @@
+# target_tracker.py
+# Drone tarafı çoklu nesne takibi: sabit hızlı Kalman filtresi (dx, dy, √alan),
+# Mahalanobis kapılı atama, kararlı iz id'leri, tek hedefe kilit ve hedefin
+# eyleme anına (yakalama zamanından itibaren) ileri kestirimi.
+import threading
+
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # scipy yoksa açgözlü atama
+    linear_sum_assignment = None
+
+# Ölçüm: z = [dx, dy, s] (s = √alan); durum: [dx, dy, s, vdx, vdy, vs]
+DIM = 3
+H = np.hstack([np.eye(DIM), np.zeros((DIM, DIM))])
+GATE_CHI2 = 11.34  # 3 serbestlik derecesi, %99
+
+
+def greedy_assignment(cost):
+    """En düşük maliyetten başlayarak satır/sütunu bir kez kullanan eşleştirme."""
+    rows, cols = [], []
+    if cost.size == 0:
+        return np.array(rows, dtype=int), np.array(cols, dtype=int)
+    flat_cost = cost.ravel()
+    order = np.flatnonzero(np.isfinite(flat_cost))
+    order = order[np.argsort(flat_cost[order])]
+    used_r, used_c = set(), set()
+    for flat in order:
+        r, c = divmod(int(flat), cost.shape[1])
+        if r in used_r or c in used_c:
+            continue
+        used_r.add(r)
+        used_c.add(c)
+        rows.append(r)
+        cols.append(c)
+    return np.array(rows, dtype=int), np.array(cols, dtype=int)
+
+
+class MultiTracker:
+    """
+    Tüm izler tek dizilerde tutulur (n x 6 durum, n x 6 x 6 kovaryans); tahmin, kapı
+    ve maliyet matrisi n·m boyutunda vektörel hesaplanır. Aynı sınıftan olmayan
+    tespit-iz çiftleri eşleşmez.
+
+    - update(records, t): t = karenin yakalama anı (time.monotonic()).
+    - lock(cls): kilitli iz yaşıyorsa onu, yoksa bu sınıftan en güvenli onaylı izi döndürür.
+    - predict(track_id, t): izin t anındaki (dx, dy, alan) kestirimi.
+    """
+
+    def __init__(self, min_hits=2, max_age=1.0, max_tracks=64, max_predict=0.5,
+                 pos_noise=400.0, size_noise=40.0, pos_std=6.0, size_std=3.0, init_vel_std=300.0):
+        self.min_hits = min_hits
+        self.max_age = max_age
+        self.max_tracks = max_tracks
+        self.max_predict = max_predict
+        self.q = np.array([pos_noise, pos_noise, size_noise])
+        self.R = np.diag([pos_std ** 2, pos_std ** 2, size_std ** 2])
+        self.init_vel_var = init_vel_std ** 2
+        self.x = np.zeros((0, 2 * DIM))
+        self.P = np.zeros((0, 2 * DIM, 2 * DIM))
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.cls = np.zeros(0, dtype=np.int64)
+        self.conf = np.zeros(0)
+        self.hits = np.zeros(0, dtype=np.int64)
+        self.last_update = np.zeros(0)
+        self.t = None          # durumun geçerli olduğu an
+        self.locked = None     # kilitli iz id'si
+        self.created = 0
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    # ---------- KALMAN ----------
+    def _transition(self, dt):
+        F = np.eye(2 * DIM)
+        F[:DIM, DIM:] = np.eye(DIM) * dt
+        # Beyaz gürültü ivme modeli
+        Q = np.zeros((2 * DIM, 2 * DIM))
+        Q[:DIM, :DIM] = np.diag(self.q * dt ** 3 / 3)
+        Q[:DIM, DIM:] = Q[DIM:, :DIM] = np.diag(self.q * dt ** 2 / 2)
+        Q[DIM:, DIM:] = np.diag(self.q * dt)
+        return F, Q
+
+    def _predict_all(self, t):
+        if self.t is None:
+            self.t = t
+            return
+        dt = max(0.0, t - self.t)
+        if dt > 0 and len(self.ids):
+            F, Q = self._transition(dt)
+            self.x = self.x @ F.T
+            self.P = F @ self.P @ F.T + Q
+        self.t = max(self.t, t)
+
+    @staticmethod
+    def measurements(records):
+        return np.stack([records["dx"].astype(float), records["dy"].astype(float),
+                         np.sqrt(np.maximum(records["area"].astype(float), 0.0))], axis=1)
+
+    def _costs(self, z, det_cls):
+        """n x m Mahalanobis² maliyeti; kapı dışı ve sınıfı farklı çiftler inf."""
+        S = H @ self.P @ H.T + self.R                     # (n, 3, 3)
+        S_inv = np.linalg.inv(S)
+        innov = z[None, :, :] - (self.x @ H.T)[:, None, :]  # (n, m, 3)
+        d2 = np.einsum("nmi,nij,nmj->nm", innov, S_inv, innov)
+        d2[(d2 > GATE_CHI2) | (self.cls[:, None] != det_cls[None, :])] = np.inf
+        return d2
+
+    def update(self, records, t):
+        with self._lock:
+            self._predict_all(t)
+            z = self.measurements(records) if len(records) else np.zeros((0, DIM))
+            det_cls = records["cls"].astype(np.int64) if len(records) else np.zeros(0, dtype=np.int64)
+
+            matched_t = matched_d = np.zeros(0, dtype=int)
+            if len(self.ids) and len(z):
+                cost = self._costs(z, det_cls)
+                if linear_sum_assignment is not None:
+                    finite = np.where(np.isfinite(cost), cost, 1e9)
+                    rows, cols = linear_sum_assignment(finite)
+                    keep = np.isfinite(cost[rows, cols])
+                    matched_t, matched_d = rows[keep], cols[keep]
+                else:
+                    matched_t, matched_d = greedy_assignment(cost)
+
+            if len(matched_t):
+                # Eşleşen izlerin Kalman güncellemesi (toplu)
+                P = self.P[matched_t]
+                S = H @ P @ H.T + self.R
+                K = P @ H.T @ np.linalg.inv(S)                       # (k, 6, 3)
+                innov = z[matched_d] - self.x[matched_t] @ H.T
+                self.x[matched_t] += np.einsum("kij,kj->ki", K, innov)
+                self.P[matched_t] = (np.eye(2 * DIM) - K @ H) @ P
+                self.hits[matched_t] += 1
+                self.last_update[matched_t] = t
+                self.conf[matched_t] = records["conf"][matched_d]
+
+            # Yeni izler
+            new = np.setdiff1d(np.arange(len(z)), matched_d)[: max(0, self.max_tracks - len(self.ids))]
+            if len(new):
+                x0 = np.hstack([z[new], np.zeros((len(new), DIM))])
+                P0 = np.zeros((len(new), 2 * DIM, 2 * DIM))
+                P0[:, :DIM, :DIM] = self.R
+                P0[:, DIM:, DIM:] = np.eye(DIM) * self.init_vel_var
+                ids = np.arange(self._next_id, self._next_id + len(new))
+                self._next_id += len(new)
+                self.created += len(new)
+                self.x = np.vstack([self.x, x0])
+                self.P = np.concatenate([self.P, P0])
+                self.ids = np.concatenate([self.ids, ids])
+                self.cls = np.concatenate([self.cls, det_cls[new]])
+                self.conf = np.concatenate([self.conf, records["conf"][new].astype(float)])
+                self.hits = np.concatenate([self.hits, np.ones(len(new), dtype=np.int64)])
+                self.last_update = np.concatenate([self.last_update, np.full(len(new), t)])
+
+            # Uzun süredir güncellenmeyen izler silinir
+            alive = t - self.last_update <= self.max_age
+            if not alive.all():
+                self.x, self.P, self.ids, self.cls = self.x[alive], self.P[alive], self.ids[alive], self.cls[alive]
+                self.conf, self.hits, self.last_update = self.conf[alive], self.hits[alive], self.last_update[alive]
+                if self.locked is not None and self.locked not in self.ids:
+                    self.locked = None
+
+    # ---------- HEDEF ----------
+    def _index(self, track_id):
+        idx = np.flatnonzero(self.ids == track_id)
+        return int(idx[0]) if len(idx) else None
+
+    def lock(self, cls=None, exclude=None):
+        """
+        Kilitli izi korur; kilit yoksa (veya sınıf değiştiyse) `cls` sınıfından
+        (None = `exclude` dışındaki tüm sınıflar) en güvenli onaylı ize kilitlenir.
+        """
+        with self._lock:
+            i = self._index(self.locked) if self.locked is not None else None
+            if i is not None and (cls is None or self.cls[i] == cls) and (exclude is None or self.cls[i] != exclude):
+                return self.locked
+            mask = self.hits >= self.min_hits
+            if cls is not None:
+                mask &= self.cls == cls
+            if exclude is not None:
+                mask &= self.cls != exclude
+            if not mask.any():
+                self.locked = None
+                return None
+            candidates = np.flatnonzero(mask)
+            self.locked = int(self.ids[candidates[np.argmax(self.conf[candidates])]])
+            return self.locked
+
+    def unlock(self):
+        self.locked = None
+
+    def updated_at(self, track_id):
+        with self._lock:
+            i = self._index(track_id)
+            return None if i is None else float(self.last_update[i])
+
+    def predict(self, track_id, t):
+        """İzin t anındaki (dx, dy, alan) kestirimi; ileri kestirim en fazla `max_predict` sn."""
+        with self._lock:
+            i = self._index(track_id)
+            if i is None:
+                return None
+            dt = min(max(0.0, t - self.t), self.max_predict) if self.t is not None else 0.0
+            pos = self.x[i, :DIM] + self.x[i, DIM:] * dt
+            size = max(float(pos[2]), 0.0)
+            return float(pos[0]), float(pos[1]), size * size
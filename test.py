@@ -1,7 +1,10 @@
 from pymavlink import mavutil
+import sys
 import time
 
-master = mavutil.mavlink_connection('/dev/serial0', baud=57600)
+# Simülatörle (bkz. sim_vehicle.py): python test.py tcp:127.0.0.1:5760 veya udp:127.0.0.1:14550
+connection = sys.argv[1] if len(sys.argv) > 1 else '/dev/serial0'
+master = mavutil.mavlink_connection(connection, baud=57600)
 
 master.wait_heartbeat()
 print(f"✅ Bağlantı sağlandı! Sistem ID: {master.target_system}, Komponent ID: {master.target_component}")
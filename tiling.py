@@ -0,0 +1,135 @@
+# tiling.py
+# Döşemeli (tiled) çıkarım: kare örtüşen döşemelere bölünür, tüm döşemeler (isteğe bağlı
+# tam kare ile birlikte) tek toplu model çağrısında işlenir; kutular kare koordinatlarına
+# taşınıp döşemeler arası NMS ile birleştirilir. Döşeme model giriş boyutuna (imgsz)
+# büyütüldüğü için uzakta birkaç düzine piksele inen hedefler tam karede kaçırılmaz.
+#
+# Maliyet döşeme sayısıyla artar (her döşeme bir imgsz x imgsz girişi). Hedefin yeri
+# biliniyorsa `roi` ile döşemeler hedef çevresiyle sınırlanır (çoğu zaman tek döşeme).
+import numpy as np
+
+from backends import boxes_to_records
+
+EMPTY_BOXES = np.empty((0, 6), dtype=np.float32)
+
+
+def _axis(lo, hi, limit, size, stride):
+    """[lo, hi) aralığını `size` boyunda, adımı en fazla `stride` olan döşemelerle kaplar (0..limit içinde)."""
+    span = hi - lo
+    if span <= size:
+        starts = [(lo + hi - size) // 2]  # bölge döşemeden küçük: döşeme bölgeyi ortalar
+    else:
+        count = -(-(span - size) // stride) + 1
+        starts = [lo + round(i * (span - size) / (count - 1)) for i in range(count)]
+    return sorted({min(max(0, s), limit - size) for s in starts})
+
+
+def tile_grid(width, height, size=320, overlap=0.2, region=None):
+    """
+    Döşeme pencereleri [(x0, y0, x1, y1), ...]. Tüm döşemeler aynı boyuttadır (son sıra
+    kenara yaslanır), böylece toplu çağrıda aynı biçimde ölçeklenir. `region` verilirse
+    yalnız o bölge kaplanır.
+    """
+    x0, y0, x1, y1 = region if region is not None else (0, 0, width, height)
+    tw, th = min(size, width), min(size, height)
+    stride = max(1, int(size * (1 - overlap)))
+    xs = _axis(max(0, x0), min(width, x1), width, tw, stride)
+    ys = _axis(max(0, y0), min(height, y1), height, th, stride)
+    return [(x, y, x + tw, y + th) for y in ys for x in xs]
+
+
+def roi_from_records(records, margin=2.0):
+    """Kayıtların birleşim kutusu, merkezi etrafında `margin` katına genişletilmiş; kayıt yoksa None."""
+    if len(records) == 0:
+        return None
+    x1, y1 = int(records["x1"].min()), int(records["y1"].min())
+    x2, y2 = int(records["x2"].max()), int(records["y2"].max())
+    cx, cy = (x1 + x2) // 2, (y1 + y2) // 2
+    hw, hh = int((x2 - x1) * margin) // 2 + 1, int((y2 - y1) * margin) // 2 + 1
+    return cx - hw, cy - hh, cx + hw, cy + hh
+
+
+def merge_boxes(data, threshold=0.5, metric="ios"):
+    """
+    Sınıf bazlı açgözlü birleştirme; güveni yüksek kutu eşiği aşan aynı sınıf kutuları yutar.
+    metric "ios": kesişim / küçük kutunun alanı. Döşeme kenarında kesilmiş parça kutu komşu
+    döşemedeki tam kutunun içinde kaldığından yutulur ve kalan kutu ikisinin birleşimine
+    genişletilir. "iou": klasik NMS (kutu genişletilmez).
+    """
+    if len(data) < 2:
+        return data
+    data = data[np.argsort(-data[:, 4])]
+    boxes = data[:, :4].copy()
+    area = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep = np.ones(len(data), dtype=bool)
+    for i in range(len(data) - 1):
+        if not keep[i]:
+            continue
+        rest = np.nonzero(keep[i + 1:] & (data[i + 1:, 5] == data[i, 5]))[0] + i + 1
+        if not len(rest):
+            continue
+        w = np.minimum(boxes[i, 2], boxes[rest, 2]) - np.maximum(boxes[i, 0], boxes[rest, 0])
+        h = np.minimum(boxes[i, 3], boxes[rest, 3]) - np.maximum(boxes[i, 1], boxes[rest, 1])
+        inter = np.clip(w, 0, None) * np.clip(h, 0, None)
+        if metric == "ios":
+            denom = np.minimum(area[i], area[rest])
+        else:
+            denom = area[i] + area[rest] - inter
+        merged = rest[inter > threshold * np.maximum(denom, 1e-6)]
+        if not len(merged):
+            continue
+        keep[merged] = False
+        if metric == "ios":
+            boxes[i, :2] = np.minimum(boxes[i, :2], boxes[merged, :2].min(axis=0))
+            boxes[i, 2:] = np.maximum(boxes[i, 2:], boxes[merged, 2:].max(axis=0))
+    data[:, :4] = boxes
+    return data[keep]
+
+
+class Tiler:
+    """
+    detect(backend, frames, conf, classes, rois): her karenin pencereleri (tam kare +
+    döşemeler) tek `backend.predict` çağrısında işlenir; kare başına (n, 6) kutu döner.
+    rois[i] verilirse o karenin döşemeleri yalnız bu bölgeyi kaplar (bkz. roi_from_records).
+    Pencere sayısı `tiles` sayacında toplanır.
+    """
+
+    def __init__(self, size=320, overlap=0.2, full_frame=True, threshold=0.5, metric="ios"):
+        self.size = size
+        self.overlap = overlap
+        self.full_frame = full_frame
+        self.threshold = threshold
+        self.metric = metric
+        self.tiles = 0
+
+    def windows(self, width, height, roi=None):
+        tiles = tile_grid(width, height, self.size, self.overlap, roi)
+        if self.full_frame and tiles != [(0, 0, width, height)]:
+            tiles.insert(0, (0, 0, width, height))
+        return tiles
+
+    def detect(self, backend, frames, conf=0.25, classes=None, rois=None):
+        rois = rois if rois is not None else [None] * len(frames)
+        crops, owners = [], []
+        for i, (frame, roi) in enumerate(zip(frames, rois)):
+            height, width = frame.shape[:2]
+            for x0, y0, x1, y1 in self.windows(width, height, roi):
+                crops.append(frame[y0:y1, x0:x1])
+                owners.append((i, x0, y0))
+        self.tiles += len(crops)
+        parts = [[] for _ in frames]
+        for (i, x0, y0), result in zip(owners, backend.predict(crops, conf, classes)):
+            data = result.boxes.data.cpu().numpy()
+            if len(data):
+                data = data.astype(np.float32, copy=True)
+                data[:, [0, 2]] += x0
+                data[:, [1, 3]] += y0
+                parts[i].append(data)
+        return [merge_boxes(np.concatenate(p), self.threshold, self.metric) if p else EMPTY_BOXES
+                for p in parts]
+
+    def records(self, backend, frames, conf=0.25, classes=None, filters=None, rois=None):
+        """detect() + kare başına protocol.DETECTION_DTYPE kayıtları (dx/dy tam karenin merkezine göre)."""
+        filters = filters if filters is not None else [None] * len(frames)
+        return [boxes_to_records(data, frame.shape[1], frame.shape[0], conf, f)
+                for frame, data, f in zip(frames, self.detect(backend, frames, conf, classes, rois), filters)]
@@ -0,0 +1,186 @@
+# tracking.py
+# Tespit arası kutu takibi: tam YOLO çıkarımı her N karede bir, aradaki kareler
+# Lucas-Kanade optik akışıyla (yalnız CPU) taşınır. N hareket miktarına göre ayarlanır.
+# Takip yalnız bilinen kutuları taşır: kadraja yeni giren nesne bir sonraki tespite kadar
+# görülmez; bu süre `max_age` ile sınırlanır.
+import threading
+import time
+
+import cv2
+import numpy as np
+
+LK_PARAMS = dict(winSize=(21, 21), maxLevel=3,
+                 criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+
+
+class DetectTracker:
+    """
+    İstemci başına tespit/takip durumu.
+
+    - `track(frame)` kutuları son tespitten bu kareye taşır ve yeni kayıt dizisini
+      döndürür; tespit gerekiyorsa (aralık veya `max_age` doldu, hiçbir kutu güvenle
+      izlenemedi, kutu kadrajdan çıktı, hiç kutu yok) None döndürür. Yeterli noktası
+      kalmayan kutu tek başına düşürülür (`dropped_boxes`); takip güveni yüzünden tespite
+      dönüldüğünde `fallback` nedeni ("points", "frame_exit") yazılır, sayaç için.
+    - Tespit gerekince `begin_detection()`, sonuç gelince `reset(frame, records)` çağrılır.
+      Bekleyen tespit bitene kadar `wait_idle()` sonraki kareyi bekletir; böylece yanıt
+      sırası korunur.
+
+    Tespit aralığı, kare başına ortanca nokta kayması `motion_low` pikselin altındaysa
+    `max_interval`, `motion_high` üstündeyse `min_interval` olur (arada doğrusal). Kare hızı
+    ne olursa olsun son tespitten `max_age` sn geçince yeniden tespit edilir.
+    """
+
+    def __init__(self, min_interval=2, max_interval=10, motion_low=0.5, motion_high=4.0,
+                 points_per_box=30, min_points=5, min_survival=0.5, max_fb_error=1.5, max_age=None):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.motion_low = motion_low
+        self.motion_high = motion_high
+        self.points_per_box = points_per_box
+        self.min_points = min_points
+        self.min_survival = min_survival
+        self.max_fb_error = max_fb_error
+        self.max_age = max_age
+        self.interval = min_interval
+        self.motion = 0.0
+        self.since_detection = 0
+        self.dropped_boxes = 0
+        self.fallback = None   # son track() çağrısında takip güveni yüzünden tespite dönüldüyse nedeni
+        self._detected_at = 0.0
+        self._gray = None
+        self._records = None
+        self._boxes = None     # (k, 4) float32 x1, y1, x2, y2
+        self._points = None    # (n, 1, 2) float32
+        self._owner = None     # (n,) nokta -> kutu indeksi
+        self._initial = None   # (k,) kutu başına ilk nokta sayısı
+        self._idle = threading.Event()
+        self._idle.set()
+
+    # ---------- TESPİT ----------
+    def begin_detection(self):
+        self._idle.clear()
+
+    def cancel_detection(self):
+        """Çıkarım başarısız oldu: takip durumu sıfırlanır, bir sonraki kare yine tespite gider."""
+        self._gray = None
+        self._idle.set()
+
+    def wait_idle(self, timeout=1.0):
+        return self._idle.wait(timeout)
+
+    def reset(self, frame, records):
+        """Yeni tespit sonucu: her kutunun içinden izlenecek köşe noktaları seçilir."""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        height, width = gray.shape
+        points, owner, initial = [], [], []
+        for i, r in enumerate(records):
+            x1, y1 = max(0, int(r["x1"])), max(0, int(r["y1"]))
+            x2, y2 = min(width, int(r["x2"])), min(height, int(r["y2"]))
+            found = None
+            if x2 - x1 >= 4 and y2 - y1 >= 4:
+                found = cv2.goodFeaturesToTrack(gray[y1:y2, x1:x2], self.points_per_box, 0.01, 3)
+            n = 0 if found is None else len(found)
+            if n:
+                found[:, 0, 0] += x1
+                found[:, 0, 1] += y1
+                points.append(found)
+                owner.append(np.full(n, i, dtype=np.int32))
+            initial.append(n)
+        self._gray = gray
+        self._records = records.copy()
+        self._boxes = np.stack([records["x1"], records["y1"], records["x2"], records["y2"]],
+                               axis=1).astype(np.float32)
+        self._points = np.concatenate(points) if points else np.empty((0, 1, 2), np.float32)
+        self._owner = np.concatenate(owner) if owner else np.empty(0, np.int32)
+        self._initial = np.array(initial, dtype=np.int32)
+        self.since_detection = 0
+        self._detected_at = time.monotonic()
+        self._idle.set()
+
+    # ---------- TAKİP ----------
+    def track(self, frame):
+        self.fallback = None
+        if self._gray is None or len(self._records) == 0 or self.since_detection + 1 >= self.interval:
+            return None
+        if self.max_age is not None and time.monotonic() - self._detected_at >= self.max_age:
+            return None
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if gray.shape != self._gray.shape or len(self._points) == 0:
+            self.fallback = "points" if len(self._points) == 0 else None
+            return None
+
+        # İleri-geri optik akış: geri dönüşte başladığı yere uzak düşen nokta güvenilmez
+        new, st, _ = cv2.calcOpticalFlowPyrLK(self._gray, gray, self._points, None, **LK_PARAMS)
+        back, st_back, _ = cv2.calcOpticalFlowPyrLK(gray, self._gray, new, None, **LK_PARAMS)
+        fb_error = np.linalg.norm((back - self._points).reshape(-1, 2), axis=1)
+        good = (st.ravel() == 1) & (st_back.ravel() == 1) & (fb_error < self.max_fb_error)
+
+        old_pts = self._points.reshape(-1, 2)[good]
+        new_pts = new.reshape(-1, 2)[good]
+        owner = self._owner[good]
+        counts = np.bincount(owner, minlength=len(self._records))
+        keep = counts >= np.maximum(self.min_points, self.min_survival * self._initial)
+        if not keep.any():
+            self.fallback = "points"
+            return None
+        if not keep.all():
+            # Güvenle izlenemeyen kutu (küçük/dokusuz) düşer; diğerleri takip edilmeye devam eder
+            self.dropped_boxes += int((~keep).sum())
+            index = np.full(len(keep), -1, dtype=np.int32)
+            index[keep] = np.arange(int(keep.sum()), dtype=np.int32)
+            sel = keep[owner]
+            old_pts, new_pts, owner = old_pts[sel], new_pts[sel], index[owner[sel]]
+            self._records = self._records[keep]
+            self._boxes = self._boxes[keep]
+            self._initial = self._initial[keep]
+
+        height, width = gray.shape
+        boxes = self._boxes.copy()
+        for i in range(len(boxes)):
+            sel = owner == i
+            old_i, new_i = old_pts[sel], new_pts[sel]
+            shift = np.median(new_i - old_i, axis=0)
+            spread_old = np.median(np.abs(old_i - np.median(old_i, axis=0)))
+            spread_new = np.median(np.abs(new_i - np.median(new_i, axis=0)))
+            scale = float(np.clip(spread_new / spread_old, 0.8, 1.25)) if spread_old > 1e-3 else 1.0
+            cx = (boxes[i, 0] + boxes[i, 2]) / 2 + shift[0]
+            cy = (boxes[i, 1] + boxes[i, 3]) / 2 + shift[1]
+            if not (0 <= cx < width and 0 <= cy < height):
+                self.fallback = "frame_exit"  # hedef kadrajdan çıkıyor
+                return None
+            half_w = (boxes[i, 2] - boxes[i, 0]) * scale / 2
+            half_h = (boxes[i, 3] - boxes[i, 1]) * scale / 2
+            boxes[i] = (cx - half_w, cy - half_h, cx + half_w, cy + half_h)
+
+        motion = float(np.median(np.linalg.norm(new_pts - old_pts, axis=1)))
+        self.motion = 0.7 * self.motion + 0.3 * motion
+        self._adapt_interval()
+
+        self._gray = gray
+        self._boxes = boxes
+        self._points = new_pts.reshape(-1, 1, 2)
+        self._owner = owner
+        self.since_detection += 1
+        return self._to_records(boxes, width, height)
+
+    def _adapt_interval(self):
+        if self.motion <= self.motion_low:
+            self.interval = self.max_interval
+        elif self.motion >= self.motion_high:
+            self.interval = self.min_interval
+        else:
+            t = (self.motion - self.motion_low) / (self.motion_high - self.motion_low)
+            self.interval = int(round(self.max_interval - t * (self.max_interval - self.min_interval)))
+
+    def _to_records(self, boxes, width, height):
+        records = self._records.copy()
+        boxes = np.rint(boxes)
+        records["x1"] = np.clip(boxes[:, 0], 0, width - 1)
+        records["y1"] = np.clip(boxes[:, 1], 0, height - 1)
+        records["x2"] = np.clip(boxes[:, 2], 0, width - 1)
+        records["y2"] = np.clip(boxes[:, 3], 0, height - 1)
+        records["dx"] = (records["x1"].astype(np.int32) + records["x2"]) // 2 - width // 2
+        records["dy"] = (records["y1"].astype(np.int32) + records["y2"]) // 2 - height // 2
+        records["area"] = (records["x2"].astype(np.int32) - records["x1"]) * (records["y2"].astype(np.int32) - records["y1"])
+        return records
@@ -0,0 +1,178 @@
+# udp_transport.py
+# Kayba dayanıklı UDP taşıma: her mesaj (kare, el sıkışma, yanıt) datagramlara bölünür,
+# alıcıda mesaj id'sine göre birleştirilir. Eksik kalan ya da daha yenisi tamamlanan
+# mesajlar atılır; kayıp bir paket sonraki kareleri bekletmez (TCP'deki satır başı tıkanması yok).
+#
+# Paket: PACKET_HEADER (sürüm, tür, mesaj id, parça no, parça sayısı) + en fazla `max_payload` bayt.
+import socket
+import struct
+import threading
+import time
+
+PACKET_HEADER = struct.Struct(">BBIHH")
+PACKET_VERSION = 0xD1
+KIND_DATA = 0     # kareler ve yanıtları: id = frame_id, yenisi eskisini geçersiz kılar
+KIND_CONTROL = 1  # el sıkışma / sınıf süzgeci
+MAX_PAYLOAD = 1200  # Wi-Fi MTU altında kalır (IP/UDP başlıklarıyla ~1240 bayt)
+MAX_DATAGRAM = PACKET_HEADER.size + MAX_PAYLOAD
+
+
+class Reassembler:
+    """
+    Tek mesaj akışı için parça birleştirici. En fazla `max_pending` mesaj yarım tutulur;
+    bir mesaj tamamlanınca ondan eski yarım mesajlar atılır, sonradan gelen eski parçalar yok sayılır.
+    `max_age` saniyeden uzun süredir tamamlanmayan mesajlar da atılır.
+    `pool` (framing.BufferPool) verilirse birleştirme tamponları oradan alınır, atılanlar iade edilir.
+    """
+
+    def __init__(self, max_payload=MAX_PAYLOAD, max_pending=4, max_age=1.0, pool=None):
+        self.max_payload = max_payload
+        self.pool = pool
+        self.max_pending = max_pending
+        self.max_age = max_age
+        self.last_done = -1
+        self.completed = 0
+        self.superseded = 0  # yenisi tamamlandığı için atılan yarım mesaj
+        self.late = 0        # tamamlanan mesajdan eski olduğu için yok sayılan parça
+        self._pending = {}   # msg_id -> [tampon, alınan bitleri, kalan, toplam uzunluk, ilk parça anı]
+
+    def add(self, msg_id, index, count, data):
+        """Parçayı ekler; mesaj tamamlandıysa içeriğini (memoryview) döndürür."""
+        if msg_id <= self.last_done:
+            self.late += 1
+            return None
+        if count == 0 or index >= count:
+            return None
+        entry = self._pending.get(msg_id)
+        if entry is None:
+            now = time.monotonic()
+            for old_id in [i for i, e in self._pending.items() if now - e[4] > self.max_age]:
+                self._discard(old_id)
+            if len(self._pending) >= self.max_pending:
+                self._discard(min(self._pending))
+            size = count * self.max_payload
+            buf = self.pool.get(size) if self.pool is not None else bytearray(size)
+            entry = self._pending[msg_id] = [buf, bytearray(count), count, 0, now]
+        buf, received = entry[0], entry[1]
+        if received[index]:
+            return None  # tekrar gelen parça
+        received[index] = 1
+        start = index * self.max_payload
+        buf[start:start + len(data)] = data
+        entry[2] -= 1
+        if index == count - 1:
+            entry[3] = start + len(data)
+        if entry[2]:
+            return None
+
+        del self._pending[msg_id]
+        for old_id in [i for i in self._pending if i < msg_id]:
+            self._discard(old_id)
+        self.last_done = msg_id
+        self.completed += 1
+        return memoryview(buf)[:entry[3]]
+
+    def _discard(self, msg_id):
+        entry = self._pending.pop(msg_id)
+        self.superseded += 1
+        if self.pool is not None:
+            self.pool.release(entry[0])
+
+
+class UdpChannel:
+    """
+    Bir karşı uca mesaj gönderir / ondan gelen parçaları birleştirir.
+
+    - İstemci: `UdpChannel(sock)` (connect edilmiş UDP soketi), read_frame() bloklayarak okur.
+    - Sunucu: tek soket tüm istemcilerle paylaşılır; `UdpChannel(sock, peer)`, gelen datagramlar
+      feed() ile verilir.
+    """
+    lossy = True
+
+    def __init__(self, sock, peer=None, max_payload=MAX_PAYLOAD, max_pending=4, pool=None):
+        self.sock = sock
+        self.peer = peer
+        self.max_payload = max_payload
+        self.streams = {KIND_DATA: Reassembler(max_payload, max_pending, pool=pool),
+                        KIND_CONTROL: Reassembler(max_payload, max_pending, pool=pool)}
+        self.packets_sent = 0
+        self.packets_dropped = 0  # gönderim tamponu dolu olduğu için atılan
+        self.packets_received = 0
+        self._next_control_id = 0
+        self._send_lock = threading.Lock()
+        self._recv_buf = bytearray(PACKET_HEADER.size + max_payload)
+        self._recv_view = memoryview(self._recv_buf)
+
+    # ---------- GÖNDERME ----------
+    def send(self, payload, msg_id=None):
+        """msg_id verilirse veri (kare/yanıt) akışı, verilmezse kontrol akışı."""
+        with self._send_lock:
+            self._send(payload, msg_id)
+
+    def _send(self, payload, msg_id):
+        if msg_id is None:
+            kind, msg_id = KIND_CONTROL, self._next_control_id
+            self._next_control_id += 1
+        else:
+            kind = KIND_DATA
+        payload = memoryview(payload).cast("B")
+        count = max(1, -(-len(payload) // self.max_payload))
+        if count > 0xFFFF:
+            raise ValueError(f"Mesaj UDP için çok büyük: {len(payload)} bayt")
+        for index in range(count):
+            header = PACKET_HEADER.pack(PACKET_VERSION, kind, msg_id & 0xFFFFFFFF, index, count)
+            chunk = payload[index * self.max_payload:(index + 1) * self.max_payload]
+            try:
+                if self.peer is None:
+                    self.sock.sendmsg([header, chunk])
+                else:
+                    self.sock.sendmsg([header, chunk], [], 0, self.peer)
+            except BlockingIOError:
+                # Paylaşılan bloklamayan sunucu soketi dolu: UDP'de olduğu gibi paket kaybolur
+                self.packets_dropped += 1
+                continue
+            self.packets_sent += 1
+
+    # ---------- ALMA ----------
+    def feed(self, datagram):
+        """Tek datagramı işler; bir mesaj tamamlandıysa (tür, id, içerik) döndürür."""
+        if len(datagram) < PACKET_HEADER.size:
+            return None
+        version, kind, msg_id, index, count = PACKET_HEADER.unpack_from(datagram)
+        stream = self.streams.get(kind)
+        if version != PACKET_VERSION or stream is None:
+            return None
+        self.packets_received += 1
+        payload = stream.add(msg_id, index, count, datagram[PACKET_HEADER.size:])
+        return None if payload is None else (kind, msg_id, payload)
+
+    def read_message(self):
+        """Bir mesaj tamamlanana kadar bekler; (tür, id, içerik). Soket zaman aşımına uyar."""
+        while True:
+            n = self.sock.recv_into(self._recv_buf)
+            message = self.feed(self._recv_view[:n])
+            if message is not None:
+                return message
+
+    def read_frame(self):
+        """FrameReader ile aynı arayüz: sıradaki tam mesajın içeriği."""
+        return self.read_message()[2]
+
+    def stats(self):
+        data = self.streams[KIND_DATA]
+        return {"completed": data.completed, "superseded": data.superseded, "late": data.late,
+                "packets_sent": self.packets_sent, "packets_received": self.packets_received,
+                "packets_dropped": self.packets_dropped}
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def open_client_channel(host, port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+    sock.connect((host, port))
+    return UdpChannel(sock)
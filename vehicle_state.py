@@ -0,0 +1,80 @@
+# vehicle_state.py
+# dronekit öznitelik dinleyicileriyle güncellenen araç durumu önbelleği. Okuyanlar araca
+# sormaz, bekleyenler (wait_for) uyku döngüsü yerine her telemetri geri çağrısında uyanır.
+import threading
+import time
+
+# dronekit'in bildirim gönderdiği öznitelikler; is_armable mode/gps_0/ekf_ok'tan türetilir
+ATTRIBUTES = ("armed", "mode", "location.global_relative_frame", "system_status", "gps_0", "ekf_ok")
+
+
+class VehicleState:
+    """
+    Alanlar: armed, mode (ad), alt (m, göreli), is_armable, system_status.
+    wait_for(koşul, timeout, cancel): koşul sağlanınca True; zaman aşımı veya iptalde False.
+    """
+
+    def __init__(self, vehicle, attributes=ATTRIBUTES):
+        self.vehicle = vehicle
+        self.armed = False
+        self.mode = None
+        self.alt = 0.0
+        self.is_armable = False
+        self.system_status = None
+        self.updates = 0
+        self.updated_at = None
+        self._attributes = attributes
+        self._cond = threading.Condition()
+        with self._cond:
+            self._refresh()
+        for name in attributes:
+            vehicle.add_attribute_listener(name, self._on_attribute)
+
+    def _refresh(self):
+        v = self.vehicle
+        self.armed = bool(v.armed)
+        self.mode = getattr(v.mode, "name", v.mode)
+        frame = v.location.global_relative_frame
+        self.alt = float(frame.alt) if frame is not None and frame.alt is not None else 0.0
+        self.is_armable = bool(v.is_armable)
+        status = getattr(v, "system_status", None)
+        self.system_status = getattr(status, "state", status)
+        self.updated_at = time.monotonic()
+
+    def _on_attribute(self, vehicle, name, value):
+        with self._cond:
+            self._refresh()
+            self.updates += 1
+            self._cond.notify_all()
+
+    def snapshot(self):
+        with self._cond:
+            age = time.monotonic() - self.updated_at
+            return {"armed": self.armed, "mode": self.mode, "alt": round(self.alt, 2),
+                    "is_armable": self.is_armable, "system_status": self.system_status,
+                    "updates": self.updates, "age_s": round(age, 3)}
+
+    def wait_for(self, predicate, timeout=None, cancel=None):
+        """predicate(state) kilit altında çağrılır; iptal için `cancel` (Event) + interrupt()."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not predicate(self):
+                if cancel is not None and cancel.is_set():
+                    return False
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def interrupt(self):
+        """Bekleyenleri uyandırır (ör. iş iptal edildiğinde)."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def close(self):
+        for name in self._attributes:
+            try:
+                self.vehicle.remove_attribute_listener(name, self._on_attribute)
+            except Exception:
+                pass